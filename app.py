@@ -1,11 +1,12 @@
 import os
 import logging
-from flask import Flask
+from flask import Flask, g
 
 from config import Config
-from database import create_tables
+from database import create_tables, begin_unit_of_work, end_unit_of_work
 from services.database_service import DatabaseService
 from services.file_service import FileService
+from services.health_service import HealthService
 from routes import register_routes
 
 app = Flask(__name__)
@@ -13,6 +14,15 @@ app.config.from_object(Config)
 app.secret_key = Config.SECRET_KEY
 logging.basicConfig(level=logging.INFO)
 
+# Uma sessão de banco por requisição, compartilhada pelos métodos do DatabaseService
+@app.before_request
+def begin_db_session():
+    g.db_unit_of_work = begin_unit_of_work()
+
+@app.teardown_request
+def end_db_session(exc=None):
+    end_unit_of_work(g.pop('db_unit_of_work', None))
+
 # Inicializa banco de dados
 create_tables()
 
@@ -25,12 +35,21 @@ def setup_initial_data():
     # Cria chave de API inicial se não existir
     if not DatabaseService.get_api_keys():
         DatabaseService.create_api_key("Chave Inicial")
+    
+    # Texto de busca dos arquivos registrados antes do índice de busca
+    try:
+        DatabaseService.ensure_media_search_text()
+    except Exception as e:
+        logging.warning(f"Erro ao preparar índice de busca de arquivos: {e}")
 
 setup_initial_data()
 
 # Registra todas as rotas
 register_routes(app)
 
+# Verificações de saúde em segundo plano
+HealthService.start()
+
 if __name__ == '__main__':
     # Garante que o arquivo de cookies está disponível na inicialização
     FileService.ensure_cookies_available()
@@ -15,38 +15,83 @@ class Config:
     FLASK_RUN_PORT = int(os.getenv('FLASK_RUN_PORT', 5000))
 
     DOWNLOAD_FOLDER = 'downloads'
+    # Pastas temporárias dos downloads em andamento (dentro de DOWNLOAD_FOLDER: a movimentação final é atômica)
+    STAGING_FOLDER = os.path.join(DOWNLOAD_FOLDER, '.staging')
+
+    # Limpeza (file_cleanup.py): idade (s) dos arquivos removidos e das pastas de staging
+    # sem atividade, deixadas por workers que caíram no meio de um download
+    CLEANUP_OLDER_THAN_SECONDS = int(os.getenv('CLEANUP_OLDER_THAN_SECONDS', 30 * 86400))
+    STAGING_MAX_AGE_SECONDS = int(os.getenv('STAGING_MAX_AGE_SECONDS', 6 * 3600))
+
+    # Entrega de /api/download: 'direct' (Flask, com Range/ETag), 'x-accel' (nginx) ou 'x-sendfile'
+    DOWNLOAD_SERVE_MODE = os.getenv('DOWNLOAD_SERVE_MODE', 'direct').strip().lower()
+    # Location interna do nginx que aponta para DOWNLOAD_FOLDER (modo x-accel)
+    X_ACCEL_REDIRECT_PREFIX = os.getenv('X_ACCEL_REDIRECT_PREFIX', '/protected-downloads')
+    # Os nomes dos arquivos são UUIDs e o conteúdo nunca muda: cache longo e imutável
+    DOWNLOAD_CACHE_MAX_AGE = int(os.getenv('DOWNLOAD_CACHE_MAX_AGE', 31536000))
+    # Lido pelo Flask (app.config.from_object): send_file responde com o cabeçalho X-Sendfile
+    USE_X_SENDFILE = DOWNLOAD_SERVE_MODE == 'x-sendfile'
+
+    # Validade (s) do registro de um download em andamento, renovada a cada atualização de progresso
+    INFLIGHT_TTL = int(os.getenv('INFLIGHT_TTL', 300))
+
+    # Quantidade de vídeos de uma playlist baixados em paralelo por tarefa
+    PLAYLIST_CONCURRENCY = int(os.getenv('PLAYLIST_CONCURRENCY', 4))
+
+    # Intervalo mínimo (s) e avanço mínimo (%) entre atualizações de progresso de download
+    PROGRESS_MIN_INTERVAL = float(os.getenv('PROGRESS_MIN_INTERVAL', 0.5))
+    PROGRESS_MIN_STEP = float(os.getenv('PROGRESS_MIN_STEP', 1.0))
+
+    # Streams de eventos das tarefas (SSE): intervalo (s) dos comentários de keepalive e
+    # duração máxima (s) de cada conexão, após a qual o navegador reconecta sozinho
+    TASK_EVENTS_KEEPALIVE = float(os.getenv('TASK_EVENTS_KEEPALIVE', 15))
+    TASK_EVENTS_MAX_DURATION = float(os.getenv('TASK_EVENTS_MAX_DURATION', 300))
+    # Validade (s) dos tokens de /api/tasks/<task_id>/events?token= (EventSource não envia cabeçalhos)
+    TASK_EVENTS_TOKEN_TTL = int(os.getenv('TASK_EVENTS_TOKEN_TTL', 3600))
+    # Espera máxima (s) aceita em GET /api/tasks/<task_id>?wait=N (long-poll)
+    TASK_STATUS_MAX_WAIT = float(os.getenv('TASK_STATUS_MAX_WAIT', 30))
+    # Quantidade máxima de task_ids por consulta em POST /api/tasks/status
+    TASK_STATUS_BATCH_LIMIT = int(os.getenv('TASK_STATUS_BATCH_LIMIT', 500))
+
+    # Verificações de saúde em segundo plano (/api/health responde do cache)
+    HEALTH_CHECK_INTERVAL = int(os.getenv('HEALTH_CHECK_INTERVAL', 30))
+    HEALTH_COOKIE_CHECK_INTERVAL = int(os.getenv('HEALTH_COOKIE_CHECK_INTERVAL', 300))
+    HEALTH_MIN_FREE_DISK_MB = int(os.getenv('HEALTH_MIN_FREE_DISK_MB', 1024))
+    COOKIE_PROBE_URL = os.getenv('COOKIE_PROBE_URL', 'https://www.youtube.com/feed/subscriptions')
+
+    # Tempo máximo (s) que a cópia local das configurações é usada sem consultar o banco
+    SETTINGS_CACHE_TTL = int(os.getenv('SETTINGS_CACHE_TTL', 300))
+
+    # Cache das chaves de API ativas e intervalo (s) de gravação do último uso
+    API_KEY_CACHE_TTL = int(os.getenv('API_KEY_CACHE_TTL', 60))
+    API_KEY_LAST_USED_FLUSH_INTERVAL = int(os.getenv('API_KEY_LAST_USED_FLUSH_INTERVAL', 30))
+
+    # Gravação em lote do histórico de requisições
+    HISTORY_BATCH_SIZE = int(os.getenv('HISTORY_BATCH_SIZE', 100))
+    HISTORY_FLUSH_INTERVAL = float(os.getenv('HISTORY_FLUSH_INTERVAL', 2.0))
+    HISTORY_QUEUE_MAX_SIZE = int(os.getenv('HISTORY_QUEUE_MAX_SIZE', 10000))
+
+    # Intervalo (s) da varredura que reconcilia o inventário de arquivos com o disco
+    INVENTORY_SCAN_INTERVAL = int(os.getenv('INVENTORY_SCAN_INTERVAL', 600))
+
+    # Itens por página nas listagens do painel (arquivos e histórico) e limite aceito via ?limit=
+    ADMIN_PAGE_SIZE = int(os.getenv('ADMIN_PAGE_SIZE', 50))
+    ADMIN_MAX_PAGE_SIZE = int(os.getenv('ADMIN_MAX_PAGE_SIZE', 200))
 
     @staticmethod
     def get_settings():
-        """Retorna configurações do banco de dados com fallbacks"""
-        try:
-            settings = DatabaseService.get_all_settings()
-            
-            # Configurações padrão
-            defaults = {
-                "DEFAULT_RATE_LIMIT": "20 per minute",
-                "TASK_COMPLETION_TIMEOUT": 60
-            }
-            
-            # Mescla com padrões
-            for key, default_value in defaults.items():
-                if key not in settings:
-                    settings[key] = default_value
-                    DatabaseService.set_setting(key, default_value)
-            
-            return settings
-        except Exception as e:
-            logging.warning(f"Erro ao carregar configurações do banco: {e}")
-            return {
-                "DEFAULT_RATE_LIMIT": "20 per minute",
-                "TASK_COMPLETION_TIMEOUT": 60
-            }
+        """Retorna configurações do banco de dados com fallbacks (cacheadas em memória)"""
+        from services.settings_service import SettingsService
+        return SettingsService.get_all()
 
     @staticmethod
     def save_settings(settings_data):
-        """Salva configurações no banco de dados"""
+        """Salva configurações no banco de dados e invalida o cache dos demais processos"""
+        from services.settings_service import SettingsService
         try:
             for key, value in settings_data.items():
-                DatabaseService.set_setting(key, value)
+                DatabaseService.set_setting(key, value, broadcast=False)
         except Exception as e:
-            logging.error(f"Erro ao salvar configurações: {e}")
\ No newline at end of file
+            logging.error(f"Erro ao salvar configurações: {e}")
+        finally:
+            SettingsService.invalidate()
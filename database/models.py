@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, JSON, LargeBinary
+from sqlalchemy import true, event, DDL, Index, literal_column, Column, Integer, BigInteger, String, Text, Date, DateTime, Boolean, JSON, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -39,7 +39,17 @@ class RequestHistory(Base):
     request_data = Column(JSON, nullable=False)
     response_data = Column(JSON, nullable=False)
     status = Column(String(20), nullable=False)
+    task_id = Column(String(50), nullable=True, index=True)
+    filename = Column(String(255), nullable=True)  # Arquivo gerado pela tarefa
+    duration_seconds = Column(Integer, nullable=True)  # Da requisição até o fim da tarefa
+    completed_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=func.now())
+    
+    # Paginação por (created_at, id) e filtro por status
+    __table_args__ = (
+        Index('ix_request_history_created_at_id', created_at, id),
+        Index('ix_request_history_status_created_at', status, created_at, id),
+    )
 
 class MediaFile(Base):
     __tablename__ = 'media_files'
@@ -59,7 +69,44 @@ class MediaFile(Base):
     media_type = Column(String(10), nullable=False)  # 'audio' or 'video'
     folder_id = Column(Integer, nullable=True)
     tags = Column(JSON, nullable=True)  # For categorization
+    cache_key = Column(String(64), nullable=True, index=True)  # URL normalizada + tipo + qualidade
+    # Inventário do arquivo no disco (atualizado pelos processadores e pela varredura periódica)
+    file_exists = Column(Boolean, nullable=False, default=True, server_default=true())
+    size_bytes = Column(BigInteger, nullable=True)
+    file_mtime = Column(DateTime, nullable=True)
+    inventory_checked_at = Column(DateTime, nullable=True)
+    search_text = Column(Text, nullable=True)  # Título, autor, descrição e tags normalizados para busca
+    search_updated_at = Column(DateTime, nullable=True)  # Última alteração de search_text
     created_at = Column(DateTime, default=func.now())
+    
+    __table_args__ = (
+        # Paginação por (created_at, id), com ou sem os filtros de pasta e tipo
+        Index('ix_media_files_created_at_id', created_at, id),
+        Index('ix_media_files_folder_created_at', folder_id, created_at, id),
+        Index('ix_media_files_type_created_at', media_type, created_at, id),
+        # URLs podem passar do limite de tamanho de uma entrada btree; só há buscas por igualdade
+        Index('ix_media_files_original_url', original_url, postgresql_using='hash'),
+        # Atualização incremental do índice de busca em memória (bancos sem PostgreSQL)
+        Index('ix_media_files_search_updated_at', search_updated_at),
+        # Índices de busca (somente PostgreSQL): trigramas para trechos de palavras e tsvector para relevância
+        Index('ix_media_files_search_trgm', search_text,
+              postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        Index('ix_media_files_search_tsv', func.to_tsvector(literal_column("'simple'::regconfig"), search_text),
+              postgresql_using='gin').ddl_if(dialect='postgresql'),
+    )
+    
+    @property
+    def actual_size_mb(self):
+        """Tamanho real no disco segundo o inventário (MB)"""
+        if not self.file_exists:
+            return 0
+        if self.size_bytes is None:
+            return self.file_size_mb or 0
+        return round(self.size_bytes / (1024 * 1024), 2)
+
+# Extensão usada pelo índice de trigramas de media_files
+event.listen(Base.metadata, 'before_create',
+             DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'))
 
 class CookieFile(Base):
     __tablename__ = 'cookie_files'
@@ -105,4 +152,16 @@ class BatchDownload(Base):
     completed_files = Column(Integer, default=0)
     failed_files = Column(Integer, default=0)
     created_at = Column(DateTime, default=func.now())
-    completed_at = Column(DateTime, nullable=True)
\ No newline at end of file
+    completed_at = Column(DateTime, nullable=True)
+
+class DailyRequestStats(Base):
+    __tablename__ = 'daily_request_stats'
+    
+    day = Column(Date, primary_key=True)
+    total_requests = Column(Integer, nullable=False, default=0)
+    completed_requests = Column(Integer, nullable=False, default=0)
+    failed_requests = Column(Integer, nullable=False, default=0)
+    processing_requests = Column(Integer, nullable=False, default=0)
+    audio_completed = Column(Integer, nullable=False, default=0)
+    video_completed = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
@@ -0,0 +1,113 @@
+import os
+import time
+import logging
+import threading
+from sqlalchemy.pool import QueuePool, NullPool
+
+logger = logging.getLogger(__name__)
+
+# Esperas no checkout acima deste limite (ms) são registradas no log
+SLOW_CHECKOUT_MS = float(os.getenv('DB_POOL_SLOW_CHECKOUT_MS', 100))
+
+def _setting(role: str, name: str, default, cast=int):
+    """Lê {ROLE}_{NAME} (ex.: WORKER_DB_POOL_SIZE) com fallback para {NAME} e para o padrão"""
+    value = os.getenv(f"{role.upper()}_{name}", os.getenv(name))
+    if value is None or value.strip() == '':
+        return default
+    if cast is bool:
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return cast(value)
+
+class PoolMetrics:
+    """Tempo de espera no checkout de conexões do pool deste processo"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def _clear(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.slow_checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            slow = wait * 1000 >= SLOW_CHECKOUT_MS
+            if slow:
+                self.slow_checkouts += 1
+        if slow:
+            logger.warning(f"Espera de {wait * 1000:.0f} ms por uma conexão do pool"
+                           f"{' (tempo esgotado)' if timed_out else ''}")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'slow_checkouts': self.slow_checkouts,
+                'avg_wait_ms': round(self.total_wait / self.checkouts * 1000, 2) if self.checkouts else 0.0,
+                'max_wait_ms': round(self.max_wait * 1000, 2),
+            }
+
+pool_metrics = PoolMetrics()
+
+class _TimedCheckoutMixin:
+    """Mede o tempo para obter uma conexão (espera na fila ou abertura de uma nova)"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            pool_metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.record(time.perf_counter() - started)
+        return connection
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+class TimedNullPool(_TimedCheckoutMixin, NullPool):
+    pass
+
+def build_engine_options(role: str, url: str) -> dict:
+    """Opções do create_engine para o tipo de processo ('web' ou 'worker').
+
+    DB_POOL_MODE=null desativa o pool da aplicação (uma conexão por checkout), para uso
+    com pgbouncer em transaction pooling, onde o pool fica a cargo do pgbouncer.
+    """
+    if url.startswith('sqlite'):
+        # SQLite (desenvolvimento): mantém o pool padrão do SQLAlchemy
+        return {}
+
+    mode = _setting(role, 'DB_POOL_MODE', 'queue', str).strip().lower()
+    if mode == 'null':
+        return {'poolclass': TimedNullPool}
+
+    return {
+        'poolclass': TimedQueuePool,
+        'pool_size': _setting(role, 'DB_POOL_SIZE', 5),
+        'max_overflow': _setting(role, 'DB_MAX_OVERFLOW', 10),
+        'pool_timeout': _setting(role, 'DB_POOL_TIMEOUT', 30, float),
+        'pool_recycle': _setting(role, 'DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': _setting(role, 'DB_POOL_PRE_PING', True, bool),
+    }
+
+def get_pool_stats(pool) -> dict:
+    """Estado atual do pool e métricas de checkout"""
+    stats = {'pool': type(pool).__name__, **pool_metrics.snapshot()}
+    if hasattr(pool, 'checkedout'):
+        stats.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+    return stats
@@ -1,6 +1,8 @@
 import os
 import time
+import shutil
 from config import Config
+from services.database_service import DatabaseService
 
 def cleanup_old_files():
     folder = Config.DOWNLOAD_FOLDER
@@ -10,12 +12,44 @@ def cleanup_old_files():
 
     cutoff = time.time() - Config.CLEANUP_OLDER_THAN_SECONDS
 
+    removed = []
     for filename in os.listdir(folder):
         file_path = os.path.join(folder, filename)
         if os.path.isfile(file_path):
             if os.path.getmtime(file_path) < cutoff:
                 print(f"Removendo arquivo antigo: {filename}")
                 os.remove(file_path)
+                removed.append(filename)
+
+    # Mantém o inventário de arquivos em dia
+    DatabaseService.mark_media_files_missing(removed)
+
+    cleanup_stale_staging_dirs()
+
+def _last_activity(path):
+    """Modificação mais recente da pasta ou de qualquer arquivo dentro dela"""
+    latest = os.path.getmtime(path)
+    for root, dirs, files in os.walk(path):
+        for name in dirs + files:
+            try:
+                latest = max(latest, os.path.getmtime(os.path.join(root, name)))
+            except OSError:
+                pass
+    return latest
+
+def cleanup_stale_staging_dirs():
+    """Remove pastas de staging abandonadas por downloads interrompidos"""
+    folder = Config.STAGING_FOLDER
+    if not os.path.isdir(folder):
+        return
+
+    cutoff = time.time() - Config.STAGING_MAX_AGE_SECONDS
+
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        if os.path.isdir(path) and _last_activity(path) < cutoff:
+            print(f"Removendo pasta de staging abandonada: {name}")
+            shutil.rmtree(path, ignore_errors=True)
 
 if __name__ == "__main__":
     print("Iniciando limpeza de arquivos antigos...")
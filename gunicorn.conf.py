@@ -0,0 +1,20 @@
+import os
+
+# Servidor de produção: workers gevent, em que cada requisição (inclusive as que aguardam
+# uma tarefa, os long-polls e os streams de eventos) ocupa só um greenlet. Poucos processos
+# atendem milhares de clientes esperando ao mesmo tempo.
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+# Conexões simultâneas por processo
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+# Com gevent o timeout só vigia o processo travado, não a duração das requisições
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+accesslog = '-'
+
+def post_fork(server, worker):
+    """Torna o psycopg2 cooperativo: sem isso cada consulta bloqueia todos os greenlets do processo"""
+    if worker_class == 'gevent':
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
@@ -0,0 +1,32 @@
+from logging.config import fileConfig
+
+from alembic import context
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import engine
+from database.models import Base
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_online() -> None:
+    """Aplica as migrações usando o mesmo engine da aplicação (DATABASE_URL)"""
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    # As migrações consultam o schema atual antes de alterar, o que exige conexão
+    raise RuntimeError('Migrações em modo offline (--sql) não são suportadas')
+
+run_migrations_online()
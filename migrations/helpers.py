@@ -0,0 +1,71 @@
+"""Passos idempotentes usados pelas migrações.
+
+Bancos criados antes das migrações (via create_all) podem já ter parte do schema, e a
+aplicação continua chamando create_all na inicialização: cada passo verifica se o
+objeto já existe. Tabelas ausentes (banco novo) são criadas completas por create_all.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+def is_postgresql() -> bool:
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def has_table(table: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(table)
+
+
+def columns(table: str) -> set:
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def indexes(table: str) -> set:
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def add_columns(table: str, *new_columns: sa.Column) -> None:
+    if not has_table(table):
+        return
+    existing = columns(table)
+    for column in new_columns:
+        if column.name not in existing:
+            op.add_column(table, column)
+
+
+def drop_columns(table: str, names) -> None:
+    if not has_table(table):
+        return
+    existing = columns(table)
+    with op.batch_alter_table(table) as batch_op:
+        for name in names:
+            if name in existing:
+                batch_op.drop_column(name)
+
+
+def create_indexes(table: str, new_indexes) -> None:
+    """Cria os índices ausentes (no PostgreSQL sem bloquear escritas na tabela)"""
+    if not has_table(table):
+        return
+    existing = indexes(table)
+    missing = [index for index in new_indexes if index[0] not in existing]
+    if not missing:
+        return
+
+    if is_postgresql():
+        with op.get_context().autocommit_block():
+            for name, index_columns, kwargs in missing:
+                op.create_index(name, table, index_columns, postgresql_concurrently=True, **kwargs)
+    else:
+        for name, index_columns, kwargs in missing:
+            kwargs = {key: value for key, value in kwargs.items() if not key.startswith('postgresql_')}
+            op.create_index(name, table, index_columns, **kwargs)
+
+
+def drop_indexes(table: str, names) -> None:
+    if not has_table(table):
+        return
+    existing = indexes(table)
+    for name in names:
+        if name in existing:
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,31 @@
+"""chave de cache dos arquivos de mídia
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 12:00:00
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from migrations.helpers import add_columns, create_indexes, drop_columns, drop_indexes
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # URL normalizada + tipo + qualidade/bitrate, usada para reaproveitar downloads
+    add_columns('media_files', sa.Column('cache_key', sa.String(length=64), nullable=True))
+    create_indexes('media_files', [('ix_media_files_cache_key', ['cache_key'], {})])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_indexes('media_files', ['ix_media_files_cache_key'])
+    drop_columns('media_files', ['cache_key'])
@@ -0,0 +1,75 @@
+"""totais diários de requisições do dashboard
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_table
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+request_history = sa.table(
+    'request_history',
+    sa.column('id', sa.Integer),
+    sa.column('request_data', sa.JSON),
+    sa.column('status', sa.String),
+    sa.column('created_at', sa.DateTime),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not has_table('daily_request_stats'):
+        op.create_table(
+            'daily_request_stats',
+            sa.Column('day', sa.Date(), primary_key=True),
+            sa.Column('total_requests', sa.Integer(), nullable=False),
+            sa.Column('completed_requests', sa.Integer(), nullable=False),
+            sa.Column('failed_requests', sa.Integer(), nullable=False),
+            sa.Column('processing_requests', sa.Integer(), nullable=False),
+            sa.Column('audio_completed', sa.Integer(), nullable=False),
+            sa.Column('video_completed', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+
+    # Preenche os totais a partir do histórico existente uma única vez, antes de a
+    # aplicação subir; daí em diante eles são mantidos pela gravação do histórico
+    bind = op.get_bind()
+    stats = sa.table(
+        'daily_request_stats',
+        *[sa.column(name) for name in ('day', 'total_requests', 'completed_requests', 'failed_requests',
+                                       'processing_requests', 'audio_completed', 'video_completed', 'updated_at')]
+    )
+    if not has_table('request_history') or bind.execute(sa.select(stats.c.day).limit(1)).first():
+        return
+
+    request_type = request_history.c.request_data['type'].as_string()
+    completed = request_history.c.status == 'completed'
+    day = sa.func.date(request_history.c.created_at)
+    totals = sa.select(
+        day,
+        sa.func.count(),
+        sa.func.count().filter(completed),
+        sa.func.count().filter(request_history.c.status == 'failed'),
+        sa.func.count().filter(request_history.c.status == 'processing'),
+        sa.func.count().filter(completed, request_type == 'audio'),
+        sa.func.count().filter(completed, request_type == 'video'),
+        sa.func.now(),
+    ).where(request_history.c.created_at.isnot(None)).group_by(day)
+    op.execute(stats.insert().from_select(list(stats.c), totals))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if has_table('daily_request_stats'):
+        op.drop_table('daily_request_stats')
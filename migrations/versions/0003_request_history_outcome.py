@@ -0,0 +1,37 @@
+"""resultado das tarefas no histórico de requisições
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 12:00:00
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from migrations.helpers import add_columns, create_indexes, drop_columns, drop_indexes
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Tarefa, arquivo gerado e tempo até a conclusão
+    add_columns(
+        'request_history',
+        sa.Column('task_id', sa.String(length=50), nullable=True),
+        sa.Column('filename', sa.String(length=255), nullable=True),
+        sa.Column('duration_seconds', sa.Integer(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+    )
+    create_indexes('request_history', [('ix_request_history_task_id', ['task_id'], {})])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_indexes('request_history', ['ix_request_history_task_id'])
+    drop_columns('request_history', ['completed_at', 'duration_seconds', 'filename', 'task_id'])
@@ -0,0 +1,35 @@
+"""inventário dos arquivos de mídia no disco
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 12:00:00
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from migrations.helpers import add_columns, drop_columns
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Arquivos existentes contam como presentes até a primeira varredura do inventário
+    add_columns(
+        'media_files',
+        sa.Column('file_exists', sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column('size_bytes', sa.BigInteger(), nullable=True),
+        sa.Column('file_mtime', sa.DateTime(), nullable=True),
+        sa.Column('inventory_checked_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_columns('media_files', ['inventory_checked_at', 'file_mtime', 'size_bytes', 'file_exists'])
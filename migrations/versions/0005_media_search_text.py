@@ -0,0 +1,48 @@
+"""texto de busca dos arquivos de mídia
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import add_columns, create_indexes, drop_columns, drop_indexes, is_postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Preenchido para os arquivos existentes na inicialização da aplicação (ensure_media_search_text)
+    add_columns(
+        'media_files',
+        sa.Column('search_text', sa.Text(), nullable=True),
+        sa.Column('search_updated_at', sa.DateTime(), nullable=True),
+    )
+    create_indexes('media_files', [('ix_media_files_search_updated_at', ['search_updated_at'], {})])
+
+    # Busca textual: somente PostgreSQL (nos demais bancos a busca usa o índice em memória)
+    if is_postgresql():
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        create_indexes('media_files', [
+            ('ix_media_files_search_trgm', ['search_text'],
+             {'postgresql_using': 'gin', 'postgresql_ops': {'search_text': 'gin_trgm_ops'}}),
+            ('ix_media_files_search_tsv', [sa.text("to_tsvector('simple'::regconfig, search_text)")],
+             {'postgresql_using': 'gin'}),
+        ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_indexes('media_files', [
+        'ix_media_files_search_tsv', 'ix_media_files_search_trgm', 'ix_media_files_search_updated_at',
+    ])
+    drop_columns('media_files', ['search_updated_at', 'search_text'])
@@ -0,0 +1,40 @@
+"""índices de paginação por (created_at, id)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from migrations.helpers import create_indexes, drop_indexes
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    create_indexes('request_history', [
+        ('ix_request_history_created_at_id', ['created_at', 'id'], {}),
+        ('ix_request_history_status_created_at', ['status', 'created_at', 'id'], {}),
+    ])
+
+    create_indexes('media_files', [
+        ('ix_media_files_created_at_id', ['created_at', 'id'], {}),
+        ('ix_media_files_folder_created_at', ['folder_id', 'created_at', 'id'], {}),
+        ('ix_media_files_type_created_at', ['media_type', 'created_at', 'id'], {}),
+        ('ix_media_files_original_url', ['original_url'], {'postgresql_using': 'hash'}),
+    ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_indexes('media_files', [
+        'ix_media_files_original_url', 'ix_media_files_type_created_at',
+        'ix_media_files_folder_created_at', 'ix_media_files_created_at_id',
+    ])
+    drop_indexes('request_history', ['ix_request_history_status_created_at', 'ix_request_history_created_at_id'])
@@ -1,11 +1,14 @@
-import os
 import logging
 from flask import Blueprint, render_template, request, session, redirect, url_for, flash, jsonify
 from werkzeug.utils import secure_filename
 from services.database_service import DatabaseService
 from services.file_service import FileService
+from services.cookie_service import CookieService
 from services.admin_service import AdminService
+from services.batch_results_service import BatchResultsService
+from services.task_event_service import TaskEventService
 from utils.decorators import login_required
+from utils.pagination import next_cursor
 from config import Config
 
 admin_bp = Blueprint('admin', __name__)
@@ -13,33 +16,32 @@ admin_bp = Blueprint('admin', __name__)
 @admin_bp.route('/dashboard')
 @login_required
 def dashboard():
+    # Apenas o esqueleto da página: cada seção é carregada ao ser aberta
+    app_settings = DatabaseService.get_app_settings()
     if session.get('force_change'):
-        return render_template('admin/dashboard.html', force_change=True, stats={"chart_data": [],"audio_requests": 0,"video_requests": 0})
+        return render_template('admin/dashboard.html', force_change=True, app_settings=app_settings)
+    return render_template('admin/dashboard.html',
+                           app_settings=app_settings,
+                           sections=AdminService.DASHBOARD_SECTIONS)
+
+@admin_bp.route('/sections/<section>')
+@login_required
+def dashboard_section(section):
     try:
-        history = AdminService.get_processed_history()
-        settings = Config.get_settings()
-        api_keys = DatabaseService.get_api_keys()
-        cookie_file_exists = DatabaseService.get_cookie_file() is not None
-        cookie_status = FileService.check_cookie_status()
-        stats = AdminService.get_dashboard_stats()
-        files = AdminService.get_downloaded_files()
-        folders = DatabaseService.get_folders()
-        app_settings = DatabaseService.get_app_settings()
+        context = AdminService.get_section_context(section)
+        if context is None:
+            return jsonify({'success': False, 'error': 'Seção não encontrada'}), 404
         
-        return render_template('admin/dashboard.html', 
-                               history=history, 
-                               files=files, 
-                               folders=folders,
-                               app_settings=app_settings,
-                               settings=settings,
-                               api_keys=api_keys,
-                               cookie_file_exists=cookie_file_exists,
-                               cookie_status=cookie_status,
-                               stats=stats)
+        html = render_template(f'admin/sections/{section}.html', **context)
+        return jsonify({
+            'success': True,
+            'section': section,
+            'html': html,
+            'data': context.get('data', {})
+        })
     except Exception as e:
-        logging.error(f"Erro no dashboard: {e}")
-        flash('Erro ao carregar dashboard. Tente novamente.', 'error')
-        return redirect(url_for('auth.login'))
+        logging.error(f"Erro ao carregar seção '{section}' do dashboard: {e}")
+        return jsonify({'success': False, 'error': 'Erro ao carregar seção'}), 500
 
 @admin_bp.route('/settings', methods=['POST'])
 @login_required
@@ -108,10 +110,9 @@ def sync_cookies():
 def delete_cookie_file():
     try:
         if DatabaseService.delete_cookie_file():
-            cookies_path = os.path.join(os.getcwd(), 'cookies.txt')
-            if os.path.exists(cookies_path):
-                os.remove(cookies_path)
-                logging.info("Arquivo de cookies removido do filesystem")
+            # Workers descartam a cópia local ao ver a nova versão
+            CookieService.publish_version(None)
+            logging.info("Arquivo de cookies removido")
             return jsonify({'success': True, 'message': 'Cookies removidos com sucesso'})
         else:
             return jsonify({'success': False, 'error': 'Nenhum arquivo de cookies para remover'}), 404
@@ -146,6 +147,26 @@ def delete_history_item():
         return jsonify({'success': True})
     return jsonify({'success': False}), 404
 
+@admin_bp.route('/history/page')
+@login_required
+def history_page():
+    cursor = request.args.get('cursor') or None
+    limit = _get_page_size()
+    try:
+        history = AdminService.get_processed_history(limit=limit, cursor=cursor)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    # Renderizar apenas as linhas da tabela
+    html = render_template('admin/components/history_rows.html', history=history)
+    
+    return jsonify({
+        'success': True,
+        'html': html,
+        'count': len(history),
+        'next_cursor': next_cursor(history, limit)
+    })
+
 @admin_bp.route('/history/clear', methods=['POST'])
 @login_required
 def clear_history():
@@ -191,29 +212,23 @@ def filter_files():
     folder_id = request.args.get('folder_id')
     media_type = request.args.get('media_type')
     sort = request.args.get('sort', 'created_at-desc')
+    cursor = request.args.get('cursor') or None
+    limit = _get_page_size()
     
     sort_by, sort_order = sort.split('-')
     
-    files = DatabaseService.get_media_files(
-        folder_id=int(folder_id) if folder_id else None,
-        search=search,
-        media_type=media_type,
-        sort_by=sort_by,
-        sort_order=sort_order,
-        limit=50
-    )
-    
-    # Verificar existência dos arquivos
-    for file in files:
-        file_path = os.path.join(Config.DOWNLOAD_FOLDER, file.filename)
-        file.file_exists = os.path.exists(file_path)
-        if file.file_exists:
-            try:
-                file.actual_size_mb = round(os.path.getsize(file_path) / (1024 * 1024), 2)
-            except:
-                file.actual_size_mb = 0
-        else:
-            file.actual_size_mb = 0
+    try:
+        files = DatabaseService.get_media_files(
+            folder_id=int(folder_id) if folder_id else None,
+            search=search,
+            media_type=media_type,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     
     # Renderizar apenas os cards dos arquivos
     html = render_template('admin/components/file_cards.html', files=files)
@@ -221,9 +236,16 @@ def filter_files():
     return jsonify({
         'success': True,
         'html': html,
-        'count': len(files)
+        'count': len(files),
+        # O cursor só se aplica à ordenação por data; nas demais a lista fica na primeira página
+        'next_cursor': next_cursor(files, limit) if sort_by == 'created_at' else None
     })
 
+def _get_page_size() -> int:
+    """Tamanho de página pedido via ?limit=, dentro do máximo configurado"""
+    limit = request.args.get('limit', type=int) or Config.ADMIN_PAGE_SIZE
+    return max(1, min(limit, Config.ADMIN_MAX_PAGE_SIZE))
+
 @admin_bp.route('/files/cleanup', methods=['POST'])
 @login_required
 def cleanup_missing_files():
@@ -315,6 +337,17 @@ def batch_download():
         if not urls:
             return jsonify({'success': False, 'error': 'Nenhuma URL fornecida'}), 400
         
+        folder_id = int(folder_id) if folder_id else None
+        batch = DatabaseService.create_batch_download(
+            batch_name,
+            urls,
+            media_type,
+            quality=quality,
+            bitrate=bitrate,
+            folder_id=folder_id,
+            status='processing'
+        )
+        
         # Inicia tarefa de batch download
         from tasks import process_batch_download
         task = process_batch_download.delay(
@@ -322,14 +355,16 @@ def batch_download():
             media_type=media_type,
             quality=quality,
             bitrate=bitrate,
-            folder_id=int(folder_id) if folder_id else None,
+            folder_id=folder_id,
             batch_name=batch_name,
-            task_id=None  # Será definido automaticamente pelo Celery
+            task_id=None,  # Será definido automaticamente pelo Celery
+            batch_id=batch.id
         )
         
         return jsonify({
             'success': True, 
             'task_id': task.id,
+            'batch_id': batch.id,
             'total_urls': len(urls),
             'message': f'Download em lote "{batch_name}" iniciado com {len(urls)} URLs'
         })
@@ -337,6 +372,43 @@ def batch_download():
         logging.error(f"Erro ao criar download em lote: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _build_task_status(state, info):
+    """Monta o status de uma tarefa no formato usado pelo painel"""
+    if state == 'PENDING':
+        return {
+            'state': 'PENDING',
+            'message': 'Tarefa aguardando processamento...',
+            'progress': 0
+        }
+    elif state == 'PROGRESS':
+        return {
+            'state': 'PROGRESS',
+            'progress': info.get('progress', 0),
+            'message': info.get('message', 'Processando...'),
+            'stage': info.get('stage', 'unknown'),
+            **info
+        }
+    elif state == 'SUCCESS':
+        return {
+            'state': 'SUCCESS',
+            'message': 'Tarefa concluída com sucesso!',
+            'progress': 100,
+            'result': info
+        }
+    elif state == 'FAILURE':
+        return {
+            'state': 'FAILURE',
+            'message': f'Tarefa falhou: {str(info)}',
+            'progress': 0,
+            'error': str(info)
+        }
+    else:
+        return {
+            'state': state,
+            'message': f'Estado: {state}',
+            'progress': 0
+        }
+
 @admin_bp.route('/tasks/<task_id>/status', methods=['GET'])
 @login_required
 def get_task_status_admin(task_id):
@@ -346,47 +418,33 @@ def get_task_status_admin(task_id):
         from tasks import celery
         
         task_result = AsyncResult(task_id, app=celery)
-        
-        if task_result.state == 'PENDING':
-            response = {
-                'state': 'PENDING',
-                'message': 'Tarefa aguardando processamento...',
-                'progress': 0
-            }
-        elif task_result.state == 'PROGRESS':
-            response = {
-                'state': 'PROGRESS',
-                'progress': task_result.info.get('progress', 0),
-                'message': task_result.info.get('message', 'Processando...'),
-                'stage': task_result.info.get('stage', 'unknown'),
-                **task_result.info
-            }
-        elif task_result.state == 'SUCCESS':
-            response = {
-                'state': 'SUCCESS',
-                'message': 'Tarefa concluída com sucesso!',
-                'progress': 100,
-                'result': task_result.result
-            }
-        elif task_result.state == 'FAILURE':
-            response = {
-                'state': 'FAILURE',
-                'message': f'Tarefa falhou: {str(task_result.info)}',
-                'progress': 0,
-                'error': str(task_result.info)
-            }
-        else:
-            response = {
-                'state': task_result.state,
-                'message': f'Estado: {task_result.state}',
-                'progress': 0
-            }
-        
-        return jsonify(response)
+        return jsonify(_build_task_status(task_result.state, task_result.info))
     except Exception as e:
         logging.error(f"Erro ao obter status da tarefa {task_id}: {e}")
         return jsonify({
             'state': 'ERROR',
             'message': f'Erro ao obter status: {str(e)}',
             'progress': 0
-        }), 500
\ No newline at end of file
+        }), 500
+
+@admin_bp.route('/tasks/<task_id>/events', methods=['GET'])
+@login_required
+def stream_task_events_admin(task_id):
+    """Stream (SSE) do progresso de uma tarefa, no mesmo formato de /tasks/<task_id>/status"""
+    DatabaseService.release_connection()
+    return TaskEventService.event_stream(task_id, _build_task_status)
+
+@admin_bp.route('/tasks/<task_id>/results', methods=['GET'])
+@login_required
+def get_task_results_admin(task_id):
+    """Retorna os resultados por URL de um lote, paginados por cursor"""
+    try:
+        cursor = int(request.args.get('cursor', 0))
+        limit = min(int(request.args.get('limit', 100)), 500)
+        page = BatchResultsService.get_page(task_id, cursor, limit)
+        return jsonify({'success': True, **page})
+    except ValueError:
+        return jsonify({'success': False, 'error': 'cursor e limit devem ser números inteiros'}), 400
+    except Exception as e:
+        logging.error(f"Erro ao obter resultados da tarefa {task_id}: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
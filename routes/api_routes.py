@@ -1,17 +1,25 @@
+import json
+import hashlib
 import logging
-from flask import Blueprint, jsonify, request, send_from_directory
+from flask import Blueprint, jsonify, request
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from celery.result import AsyncResult, TimeoutError
+from celery.result import AsyncResult
+from typing import List
 from pydantic import BaseModel, ValidationError, validator
-from redis import Redis
-from redis.exceptions import ConnectionError as RedisConnectionError
 
 from config import Config
 from tasks import celery, process_media
+from services.request_history_service import RequestHistoryService
+from services.health_service import HealthService
 from services.database_service import DatabaseService
-from services.file_service import FileService
+from services.media_cache_service import MediaCacheService
+from services.download_service import DownloadService
+from services.inflight_service import InflightService
+from services.task_event_service import TaskEventService
+from services.task_state_service import TaskStateService
 from utils.decorators import require_api_key
+from utils.media_keys import build_media_key
 
 api_bp = Blueprint('api', __name__)
 
@@ -37,6 +45,7 @@ class MediaRequest(BaseModel):
     url: str
     quality: str = None
     bitrate: str = None
+    refresh: bool = False
     
     @validator('type')
     def type_must_be_valid(cls, v):
@@ -50,31 +59,123 @@ class MediaRequest(BaseModel):
             raise ValueError('URL é obrigatória')
         return v.strip()
 
-@api_bp.route('/health')
-def health_check():
-    try:
-        Redis.from_url(Config.REDIS_URL).ping()
-        redis_status = 'ok'
-    except RedisConnectionError: 
-        redis_status = 'error'
+class TaskStatusRequest(BaseModel):
+    task_ids: List[str]
+
+def start_media_task(data):
+    """Inicia o processamento ou se junta à tarefa idêntica já em andamento"""
+    media_key = build_media_key(data.url, data.type, data.quality, data.bitrate)
+    task, _ = InflightService.get_or_start(
+        media_key,
+        lambda task_id: process_media.apply_async(
+            args=(data.url, data.type, data.quality, data.bitrate),
+            task_id=task_id
+        )
+    )
+    return task
+
+def normalize_download_url(download_url):
+    """Links de download sempre com https://"""
+    if download_url and not download_url.startswith(('http://', 'https://')):
+        download_url = f"https://{download_url}"
+    elif download_url and download_url.startswith('http://'):
+        download_url = download_url.replace('http://', 'https://', 1)
+    return download_url
+
+def build_completed_response(task_id, result):
+    """Monta a resposta de um download concluído de vídeo único"""
+    download_url = normalize_download_url(result.get('download_url'))
+
+    status = {
+        "task": "completed",
+        "task_id": task_id,
+        "time_spend": result.get('time_spend', 'N/A'),
+        "download_url": download_url,
+    }
+    if result.get('cached'):
+        status["cached"] = True
+
+    return {
+        "status": status,
+        "metadata": {
+            "description": result.get('description'),
+            "duration_string": result.get('duration_string'),
+            "like_count": result.get('like_count'),
+            "thumbnail": result.get('thumbnail'),
+            "title": result.get('title'),
+            "upload_date": result.get('upload_date'),
+            "uploader": result.get('uploader'),
+            "view_count": result.get('view_count'),
+            "youtube_url": result.get('webpage_url')
+        }
+    }
+
+# Status registrado no histórico para cada resposta de resolve_media_request
+HISTORY_STATUS = {200: 'completed', 202: 'processing'}
+
+def resolve_media_request(data, failure_status):
+    """Atende uma requisição de mídia: cache, tarefa em andamento ou espera pelo término.
+
+    Retorna (response_data, http_status): 200 com o resultado, 202 com o link de
+    acompanhamento (playlists ou tempo esgotado) ou failure_status se a tarefa falhou.
+    """
+    # Para playlists e batch, retorna imediatamente o link de acompanhamento
+    is_playlist = 'playlist' in data.url.lower() or 'list=' in data.url
+
+    # Reaproveita um arquivo idêntico já baixado, a menos que refresh=true
+    if not is_playlist and not data.refresh:
+        cached = MediaCacheService.lookup(data.url, data.type, data.quality, data.bitrate)
+        if cached:
+            return build_completed_response(None, cached), 200
     
-    try:
-        DatabaseService.get_user()
-        db_status = 'ok'
-    except:
-        db_status = 'error'
+    task = start_media_task(data)
+    processing = {
+        "status": "processing", 
+        "task_id": task.id, 
+        "check_status_url": f"{Config.BASE_URL}/api/tasks/{task.id}"
+    }
     
-    cookie_status = FileService.check_cookie_status()
+    if is_playlist:
+        return {**processing, "type": "playlist"}, 202
     
-    status = 'ok' if redis_status == 'ok' and db_status == 'ok' and cookie_status == 'ok' else 'warning'
+    timeout = Config.get_settings().get("TASK_COMPLETION_TIMEOUT", 60)
+
+    # A espera pode levar até o timeout: não segura uma conexão do pool enquanto isso
+    DatabaseService.release_connection()
+    try:
+        # Aguarda o aviso de término via Redis pub/sub, sem consultar o backend em laço
+        if not TaskEventService.wait_until_ready(task.id, timeout):
+            return processing, 202
+        if task.state != 'SUCCESS':
+            raise task.info
+        result = task.result
+
+        if result.get('playlist'):
+            return {"status": "completed", "task_id": task.id, "type": "playlist", "result": result}, 200
+        return build_completed_response(task.id, result), 200
+    except Exception as e:
+        logging.error(f"A tarefa {task.id} falhou durante a execução: {e}")
+        return {"status": "failed", "task_id": task.id, "error": str(e)}, failure_status
+
+@api_bp.route('/health')
+def health_check():
+    # Resultado mantido pelo verificador em segundo plano: nenhuma conexão é aberta aqui
+    checks = HealthService.get_snapshot()
+    redis_status = checks.get('redis', {}).get('status', 'unknown')
+    db_status = checks.get('database', {}).get('status', 'unknown')
+    cookie_status = checks.get('cookies', {}).get('status', 'unknown')
+    
+    if HealthService.is_starting():
+        # Primeira rodada ainda em andamento: não reprova o processo que acabou de subir
+        status = 'starting'
+    else:
+        status = 'ok' if redis_status == 'ok' and db_status == 'ok' and cookie_status == 'ok' else 'warning'
     return jsonify({
         'status': status, 
-        'dependencies': {
-            'redis': redis_status,
-            'database': db_status,
-            'cookies': cookie_status
-        }
-    }), 200 if status == 'ok' else 503
+        'dependencies': {name: check['status'] for name, check in checks.items()},
+        'checks': checks,
+        'database_pool': DatabaseService.get_pool_stats()
+    }), 200 if status in ('ok', 'starting') else 503
 
 @api_bp.route('/media', methods=['GET'])
 @require_api_key
@@ -86,139 +187,145 @@ def download_media():
     except ValidationError as e:
         return jsonify({'error': 'Dados de entrada inválidos', 'details': e.errors()}), 400
     
-    FileService.ensure_cookies_available()
-    
-    task = process_media.delay(data.url, data.type, data.quality, data.bitrate)
-    
-    # Para playlists e batch, retorna imediatamente o link de acompanhamento
-    is_playlist = 'playlist' in data.url.lower() or 'list=' in data.url
-    if is_playlist:
-        response_data = {
-            "status": "processing", 
-            "task_id": task.id, 
-            "check_status_url": f"{Config.BASE_URL}/api/tasks/{task.id}",
-            "type": "playlist"
-        }
-        DatabaseService.log_request(api_key, request.args.to_dict(), response_data, "processing")
-        return jsonify(response_data), 202
-    
-    timeout = Config.get_settings().get("TASK_COMPLETION_TIMEOUT", 60)
+    response_data, http_status = resolve_media_request(data, failure_status=504)
+    RequestHistoryService.log(api_key, request.args.to_dict(), response_data, HISTORY_STATUS.get(http_status, 'failed'))
+    return jsonify(response_data), http_status
 
-    try:
-        result = task.get(timeout=timeout)
-        if task.failed():
-            raise task.info
-        
-        download_url = result.get('download_url')
-        if download_url and not download_url.startswith(('http://', 'https://')):
-            download_url = f"https://{download_url}"
-        elif download_url and download_url.startswith('http://'):
-            download_url = download_url.replace('http://', 'https://', 1)
-
-        if result.get('playlist'):
-            response_data = {
-                "status": "completed",
-                "task_id": task.id,
-                "type": "playlist",
-                "result": result
-            }
-        else:
-            response_data = {
-                "status": {
-                    "task": "completed",
-                    "task_id": task.id,
-                    "time_spend": result.get('time_spend', 'N/A'),
-                    "download_url": download_url,
-                },
-                "metadata": {
-                    "description": result.get('description'),
-                    "duration_string": result.get('duration_string'),
-                    "like_count": result.get('like_count'),
-                    "thumbnail": result.get('thumbnail'),
-                    "title": result.get('title'),
-                    "upload_date": result.get('upload_date'),
-                    "uploader": result.get('uploader'),
-                    "view_count": result.get('view_count'),
-                    "youtube_url": result.get('webpage_url')
-                }
-            }
-        
-        DatabaseService.log_request(api_key, request.args.to_dict(), response_data, "completed")
-        return jsonify(response_data), 200
-    except TimeoutError:
-        response_data = {
-            "status": "processing", 
-            "task_id": task.id, 
-            "check_status_url": f"{Config.BASE_URL}/api/tasks/{task.id}"
-        }
-        DatabaseService.log_request(api_key, request.args.to_dict(), response_data, "processing")
-        return jsonify(response_data), 202
-    except Exception as e:
-        logging.error(f"A tarefa {task.id} falhou durante a execução: {e}")
-        error_info = str(e)
-        response_data = {"status": "failed", "task_id": task.id, "error": error_info}
-        DatabaseService.log_request(api_key, request.args.to_dict(), response_data, "failed")
-        return jsonify(response_data), 504
-
-@api_bp.route('/tasks/<task_id>', methods=['GET'])
-@require_api_key
-def get_task_status(task_id):
-    task_result = AsyncResult(task_id, app=celery)
-    if task_result.state == 'PENDING': 
+def build_task_status(task_id, state, info):
+    """Monta o status de uma tarefa no formato da API"""
+    if state == 'PENDING': 
         response = {'status': 'pending', 'message': 'A tarefa ainda não foi iniciada.'}
-    elif task_result.state == 'PROGRESS':
+    elif state == 'PROGRESS':
         response = {
             'status': 'processing',
-            'progress': task_result.info.get('progress', 0),
-            'message': task_result.info.get('message', 'Processando...'),
-            'stage': task_result.info.get('stage', 'unknown'),
-            'type': task_result.info.get('type', 'single'),
-            **task_result.info
+            'progress': info.get('progress', 0),
+            'message': info.get('message', 'Processando...'),
+            'stage': info.get('stage', 'unknown'),
+            'type': info.get('type', 'single'),
+            **info
         }
-    elif task_result.state == 'SUCCESS': 
-        result = task_result.result
-        download_url = result.get('download_url')
-        if download_url and not download_url.startswith(('http://', 'https://')):
-            download_url = f"https://{download_url}"
-        elif download_url and download_url.startswith('http://'):
-            download_url = download_url.replace('http://', 'https://', 1)
-        
-        if result.get('playlist') or result.get('batch'):
+    elif state == 'SUCCESS': 
+        if info.get('playlist') or info.get('batch'):
             response = {
                 "status": "completed",
                 "task_id": task_id,
-                "type": "playlist" if result.get('playlist') else "batch",
-                "result": result
+                "type": "playlist" if info.get('playlist') else "batch",
+                "result": info
             }
         else:
-            response = {
-                "status": {
-                    "task": "completed",
-                    "task_id": task_id,
-                    "time_spend": result.get('time_spend', 'N/A'),
-                    "download_url": download_url,
-                },
-                "metadata": {
-                    "description": result.get('description'),
-                    "duration_string": result.get('duration_string'),
-                    "like_count": result.get('like_count'),
-                    "thumbnail": result.get('thumbnail'),
-                    "title": result.get('title'),
-                    "upload_date": result.get('upload_date'),
-                    "uploader": result.get('uploader'),
-                    "view_count": result.get('view_count'),
-                    "youtube_url": result.get('webpage_url')
-                }
-            }
-    elif task_result.state == 'FAILURE': 
-        response = {'status': 'failed', 'message': str(task_result.info)}
+            response = build_completed_response(task_id, info)
+    elif state == 'FAILURE': 
+        response = {'status': 'failed', 'message': str(info)}
     else: 
-        response = {'status': task_result.state}
-    return jsonify(response)
+        response = {'status': state}
+    return response
+
+def build_task_status_etag(state, status):
+    """ETag do status: em andamento muda só com a etapa e o progresso (velocidade e ETA não contam)"""
+    if state == 'PROGRESS':
+        status = [state, status.get('stage'), status.get('progress')]
+    return hashlib.sha1(json.dumps(status, sort_keys=True, default=str).encode()).hexdigest()[:20]
+
+@api_bp.route('/tasks/<task_id>', methods=['GET'])
+@require_api_key
+def get_task_status(task_id):
+    """Status da tarefa, com If-None-Match (304) e long-poll opcional via ?wait=N segundos.
+
+    Com wait e If-None-Match, a resposta é segurada até o status mudar em relação à versão
+    que o cliente já tem, a tarefa terminar ou o tempo acabar.
+    """
+    wait = min(max(request.args.get('wait', 0, type=float), 0), Config.TASK_STATUS_MAX_WAIT)
+    known_etags = request.if_none_match
+    
+    if wait > 0 and known_etags:
+        DatabaseService.release_connection()
+        state, info = TaskEventService.wait_for_change(
+            task_id,
+            lambda state, info: known_etags.contains_weak(
+                build_task_status_etag(state, build_task_status(task_id, state, info))),
+            wait
+        )
+    else:
+        task_result = AsyncResult(task_id, app=celery)
+        state, info = task_result.state, task_result.info
+    
+    status = build_task_status(task_id, state, info)
+    response = jsonify(status)
+    response.set_etag(build_task_status_etag(state, status), weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def build_task_summary(meta):
+    """Resumo compacto (estado, progresso e link) de uma tarefa a partir do seu registro no backend"""
+    if not meta:
+        return {'state': 'PENDING', 'progress': 0}
+    
+    state = meta.get('status')
+    info = meta.get('result')
+    summary = {'state': state, 'progress': 0}
+    if state == 'PROGRESS' and isinstance(info, dict):
+        summary['progress'] = info.get('progress', 0)
+        if info.get('stage'):
+            summary['stage'] = info['stage']
+    elif state == 'SUCCESS':
+        summary['progress'] = 100
+        if isinstance(info, dict):
+            if info.get('playlist') or info.get('batch'):
+                summary['type'] = 'playlist' if info.get('playlist') else 'batch'
+            else:
+                summary['download_url'] = normalize_download_url(info.get('download_url'))
+    elif state == 'FAILURE':
+        summary['error'] = str(info)
+    return summary
+
+@api_bp.route('/tasks/status', methods=['POST'])
+@require_api_key
+def get_tasks_status():
+    """Status resumido de várias tarefas, lidas do backend em uma única consulta"""
+    try:
+        data = TaskStatusRequest(**(request.get_json(silent=True) or {}))
+    except ValidationError as e:
+        return jsonify({'error': 'Dados de entrada inválidos', 'details': e.errors()}), 400
+    
+    task_ids = list(dict.fromkeys(task_id.strip() for task_id in data.task_ids if task_id.strip()))
+    if not task_ids:
+        return jsonify({'error': 'Informe ao menos um task_id'}), 400
+    if len(task_ids) > Config.TASK_STATUS_BATCH_LIMIT:
+        return jsonify({'error': f'Máximo de {Config.TASK_STATUS_BATCH_LIMIT} task_ids por consulta'}), 400
+    
+    states = TaskStateService.get_states(task_ids)
+    return jsonify({'tasks': {task_id: build_task_summary(states.get(task_id)) for task_id in task_ids}})
+
+@api_bp.route('/tasks/<task_id>/events', methods=['GET'])
+def stream_task_events(task_id):
+    """Stream (SSE) do progresso da tarefa, com eventos no formato de /api/tasks/<task_id>.
+
+    Aceita o header X-API-Key ou, para o EventSource do navegador (que não envia
+    cabeçalhos), ?token= obtido em POST /api/tasks/<task_id>/events/token.
+    """
+    token = request.args.get('token')
+    if token and TaskEventService.verify_stream_token(token, task_id):
+        return _task_event_stream(task_id)
+    return require_api_key(_task_event_stream)(task_id)
+
+def _task_event_stream(task_id):
+    DatabaseService.release_connection()
+    return TaskEventService.event_stream(task_id, lambda state, info: build_task_status(task_id, state, info))
+
+@api_bp.route('/tasks/<task_id>/events/token', methods=['POST'])
+@require_api_key
+def create_task_events_token(task_id):
+    """Token de curta duração para acompanhar a tarefa pelo navegador via EventSource"""
+    token = TaskEventService.create_stream_token(task_id)
+    return jsonify({
+        'token': token,
+        'events_url': f"{Config.BASE_URL}/api/tasks/{task_id}/events?token={token}",
+        'expires_in': Config.TASK_EVENTS_TOKEN_TTL
+    })
 
 @api_bp.route('/download/<filename>', methods=['GET'])
 def download_file(filename):
-    return send_from_directory(Config.DOWNLOAD_FOLDER, filename)
+    return DownloadService.send(filename)
 
 @api_bp.route('/public/media', methods=['GET'])
 @public_limiter.limit(lambda: Config.get_settings().get("PUBLIC_DOWNLOAD_LIMIT", "5 per hour"))
@@ -229,62 +336,8 @@ def public_download_media():
     except ValidationError as e:
         return jsonify({'error': 'Dados de entrada inválidos', 'details': e.errors()}), 400
     
-    FileService.ensure_cookies_available()
-    
-    task = process_media.delay(data.url, data.type, data.quality, data.bitrate)
-    
-    # Para playlists, retorna imediatamente o link de acompanhamento
-    is_playlist = 'playlist' in data.url.lower() or 'list=' in data.url
-    if is_playlist:
-        return jsonify({
-            "status": "processing", 
-            "task_id": task.id, 
-            "check_status_url": f"{Config.BASE_URL}/api/tasks/{task.id}",
-            "type": "playlist"
-        }), 202
-    
-    timeout = Config.get_settings().get("TASK_COMPLETION_TIMEOUT", 60)
-
-    try:
-        result = task.get(timeout=timeout)
-        if task.failed():
-            raise task.info
-        
-        download_url = result.get('download_url')
-        if download_url and not download_url.startswith(('http://', 'https://')):
-            download_url = f"https://{download_url}"
-        elif download_url and download_url.startswith('http://'):
-            download_url = download_url.replace('http://', 'https://', 1)
-
-        return jsonify({
-            "status": {
-                "task": "completed",
-                "task_id": task.id,
-                "time_spend": result.get('time_spend', 'N/A'),
-                "download_url": download_url,
-            },
-            "metadata": {
-                "description": result.get('description'),
-                "duration_string": result.get('duration_string'),
-                "like_count": result.get('like_count'),
-                "thumbnail": result.get('thumbnail'),
-                "title": result.get('title'),
-                "upload_date": result.get('upload_date'),
-                "uploader": result.get('uploader'),
-                "view_count": result.get('view_count'),
-                "youtube_url": result.get('webpage_url')
-            }
-        }), 200
-        
-    except TimeoutError:
-        return jsonify({
-            "status": "processing", 
-            "task_id": task.id, 
-            "check_status_url": f"{Config.BASE_URL}/api/tasks/{task.id}"
-        }), 202
-    except Exception as e:
-        logging.error(f"A tarefa {task.id} falhou durante a execução: {e}")
-        return jsonify({"status": "failed", "task_id": task.id, "error": str(e)}), 500
+    response_data, http_status = resolve_media_request(data, failure_status=500)
+    return jsonify(response_data), http_status
 
 @api_bp.route('/supported-sites', methods=['GET'])
 def get_supported_sites():
@@ -324,51 +377,3 @@ def get_supported_sites():
         "powered_by": "yt-dlp",
         "last_updated": "2024-01-01"
     })
-
-@api_bp.route('/tasks/<task_id>', methods=['GET'])
-def get_task_status_public(task_id):
-    """Endpoint público para verificar status de tarefas (sem autenticação)"""
-    task_result = AsyncResult(task_id, app=celery)
-    if task_result.state == 'PENDING': 
-        response = {'status': 'pending', 'message': 'A tarefa ainda não foi iniciada.'}
-    elif task_result.state == 'PROGRESS':
-        response = {
-            'status': 'processing',
-            'progress': task_result.info.get('progress', 0),
-            'message': task_result.info.get('message', 'Processando...'),
-            'stage': task_result.info.get('stage', 'unknown'),
-            'type': task_result.info.get('type', 'single'),
-            **task_result.info
-        }
-    elif task_result.state == 'SUCCESS': 
-        result = task_result.result
-        download_url = result.get('download_url')
-        if download_url and not download_url.startswith(('http://', 'https://')):
-            download_url = f"https://{download_url}"
-        elif download_url and download_url.startswith('http://'):
-            download_url = download_url.replace('http://', 'https://', 1)
-        
-        if result.get('playlist') or result.get('batch'):
-            response = {
-                "status": "completed",
-                "task_id": task_id,
-                "type": "playlist" if result.get('playlist') else "batch",
-                "result": result
-            }
-        else:
-            response = {
-                "status": "completed",
-                "task_id": task_id,
-                "result": {
-                    "download_url": download_url,
-                    "title": result.get('title', 'N/A'),
-                    "uploader": result.get('uploader', 'N/A'),
-                    "duration_string": result.get('duration_string', 'N/A'),
-                    "time_spend": result.get('time_spend', 'N/A')
-                }
-            }
-    elif task_result.state == 'FAILURE': 
-        response = {'status': 'failed', 'message': str(task_result.info)}
-    else: 
-        response = {'status': task_result.state}
-    return jsonify(response)
@@ -1,88 +1,115 @@
 import os
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from flask import current_app, redirect, url_for, flash
-from celery.result import AsyncResult
 from werkzeug.utils import secure_filename
 
 from services.database_service import DatabaseService
-from services.file_service import FileService
+from services.cookie_service import CookieService
+from services.task_state_service import TaskStateService
+from services.health_service import HealthService
+from utils.pagination import next_cursor
 from config import Config
-from tasks import celery
 
 class AdminService:
     
+    # Seções do dashboard, carregadas sob demanda
+    DASHBOARD_SECTIONS = ('overview', 'tester', 'history', 'files', 'settings')
+
+    @staticmethod
+    def get_section_context(section: str) -> Optional[Dict[str, Any]]:
+        """Monta apenas os dados usados pelo template da seção (None se a seção não existir)"""
+        if section == 'overview':
+            stats = AdminService.get_dashboard_stats()
+            return {
+                'stats': stats,
+                # Dados dos gráficos, entregues também fora do HTML
+                'data': {
+                    'chart_data': stats['chart_data'],
+                    'stats': {'audio_requests': stats['audio_requests'], 'video_requests': stats['video_requests']}
+                }
+            }
+        if section == 'tester':
+            return {
+                'cookie_file_exists': DatabaseService.has_cookie_file(),
+                'cookie_status': AdminService.get_cookie_status(),
+                'folders': DatabaseService.get_folders()
+            }
+        if section == 'history':
+            history = AdminService.get_processed_history(limit=Config.ADMIN_PAGE_SIZE)
+            return {'history': history, 'next_cursor': next_cursor(history, Config.ADMIN_PAGE_SIZE)}
+        if section == 'files':
+            files = AdminService.get_downloaded_files(limit=Config.ADMIN_PAGE_SIZE)
+            return {
+                'files': files,
+                'next_cursor': next_cursor(files, Config.ADMIN_PAGE_SIZE),
+                'folders': DatabaseService.get_folders()
+            }
+        if section == 'settings':
+            return {
+                'settings': Config.get_settings(),
+                'api_keys': DatabaseService.get_api_keys(),
+                'cookie_file_exists': DatabaseService.has_cookie_file(),
+                'cookie_status': AdminService.get_cookie_status(),
+                'stats': AdminService.get_dashboard_stats(),
+                'app_settings': DatabaseService.get_app_settings()
+            }
+        return None
+
+    @staticmethod
+    def get_cookie_status() -> str:
+        """Status dos cookies da última verificação em segundo plano (sem requisição ao YouTube)"""
+        return HealthService.get_snapshot().get('cookies', {}).get('status', 'unknown')
+
     @staticmethod
-    def get_downloaded_files():
-        """Retorna arquivos baixados do banco de dados com verificação de existência"""
-        files = DatabaseService.get_media_files()
-        for file in files:
-            file_path = os.path.join(Config.DOWNLOAD_FOLDER, file.filename)
-            file.file_exists = os.path.exists(file_path)
-            if file.file_exists:
-                try:
-                    file.actual_size_mb = round(os.path.getsize(file_path) / (1024 * 1024), 2)
-                except:
-                    file.actual_size_mb = 0
-            else:
-                file.actual_size_mb = 0
-        return files
+    def get_downloaded_files(limit: int = None, cursor: str = None):
+        """Retorna arquivos baixados do banco de dados (existência e tamanho vêm do inventário)"""
+        return DatabaseService.get_media_files(limit=limit, cursor=cursor)
 
     @staticmethod
     def get_dashboard_stats() -> Dict[str, Any]:
-        """Retorna estatísticas para o dashboard"""
-        history = DatabaseService.get_request_history(limit=1000)
-        now = datetime.utcnow()
-        week_ago = now - timedelta(days=7)
+        """Retorna estatísticas para o dashboard (a partir dos totais diários)"""
+        today = datetime.utcnow().date()
+        week_start = today - timedelta(days=6)
         
-        # Estatísticas gerais
-        total_requests = len(history)
-        successful_requests = len([h for h in history if h.status == 'completed'])
-        failed_requests = len([h for h in history if h.status == 'failed'])
-        processing_requests = len([h for h in history if h.status == 'processing'])
+        # Estatísticas gerais e dos últimos 7 dias
+        totals = DatabaseService.get_request_stats_totals()
+        recent = DatabaseService.get_request_stats_totals(since=week_start)
         
-        # Estatísticas dos últimos 7 dias
-        recent_history = [h for h in history if h.created_at >= week_ago]
-        recent_total = len(recent_history)
-        recent_successful = len([h for h in recent_history if h.status == 'completed'])
-        recent_failed = len([h for h in recent_history if h.status == 'failed'])
-        
-        # Estatísticas por tipo
-        audio_requests = len([h for h in history if h.request_data.get('type') == 'audio' and h.status == 'completed'])
-        video_requests = len([h for h in history if h.request_data.get('type') == 'video' and h.status == 'completed'])
+        total_requests = totals['total_requests']
+        successful_requests = totals['completed_requests']
+        recent_total = recent['total_requests']
+        recent_successful = recent['completed_requests']
         
         # Arquivos
-        files = AdminService.get_downloaded_files()
-        total_files = len(files)
-        missing_files = len([f for f in files if not f.file_exists])
-        total_size_mb = sum([f.actual_size_mb for f in files if f.file_exists])
+        files = AdminService.get_files_summary()
         
         # Dados para gráficos - últimos 7 dias
+        daily_counts = DatabaseService.get_daily_request_counts(week_start)
         chart_data = []
         for i in range(6, -1, -1):
-            date = now - timedelta(days=i)
-            day_requests = len([h for h in history if h.created_at.date() == date.date()])
+            day = today - timedelta(days=i)
             chart_data.append({
-                'date': date.strftime('%d/%m'),
-                'requests': day_requests
+                'date': day.strftime('%d/%m'),
+                'requests': daily_counts.get(day, 0)
             })
         
         return {
             'total_requests': total_requests,
             'successful_requests': successful_requests,
-            'failed_requests': failed_requests,
-            'processing_requests': processing_requests,
+            'failed_requests': totals['failed_requests'],
+            'processing_requests': totals['processing_requests'],
             'success_rate': round((successful_requests / total_requests * 100) if total_requests > 0 else 0, 1),
             'recent_total': recent_total,
             'recent_successful': recent_successful,
-            'recent_failed': recent_failed,
+            'recent_failed': recent['failed_requests'],
             'recent_success_rate': round((recent_successful / recent_total * 100) if recent_total > 0 else 0, 1),
-            'audio_requests': audio_requests,
-            'video_requests': video_requests,
-            'total_files': total_files,
-            'missing_files': missing_files,
-            'total_size_mb': round(total_size_mb, 2),
+            'audio_requests': totals['audio_completed'],
+            'video_requests': totals['video_completed'],
+            'total_files': files['total_files'],
+            'missing_files': files['missing_files'],
+            'total_size_mb': round(files['total_size_mb'], 2),
             'chart_data': chart_data,
             'week_comparison': {
                 'requests_change': recent_total - (total_requests - recent_total) if (total_requests - recent_total) > 0 else recent_total,
@@ -91,22 +118,47 @@ class AdminService:
         }
 
     @staticmethod
-    def get_processed_history():
-        """Retorna histórico com status atualizados"""
-        history = DatabaseService.get_request_history()
+    def get_files_summary() -> Dict[str, Any]:
+        """Resumo dos arquivos a partir do inventário"""
+        return DatabaseService.get_media_files_summary()
+
+    @staticmethod
+    def get_processed_history(limit: int = 100, cursor: str = None):
+        """Retorna uma página do histórico com status atualizados"""
+        history = DatabaseService.get_request_history(limit=limit, cursor=cursor)
         
-        # Atualiza status de tarefas em processamento
+        # Consulta de uma vez o estado de todas as tarefas ainda em processamento
+        pending = {}
         for item in history:
-            if item.response_data.get('status') == 'processing':
+            if item.status == 'processing' and item.response_data.get('status') == 'processing':
                 task_id = item.response_data.get('task_id')
                 if task_id:
-                    task_result = AsyncResult(task_id, app=celery)
-                    if task_result.state == 'SUCCESS':
-                        item.response_data['status'] = 'completed'
-                        item.response_data['result'] = task_result.result
-                    elif task_result.state == 'FAILURE':
-                        item.response_data['status'] = 'failed'
-                        item.response_data['error'] = str(task_result.info)
+                    pending.setdefault(task_id, []).append(item)
+        states = TaskStateService.get_states(pending.keys())
+        
+        updates = []
+        for task_id, items in pending.items():
+            meta = states.get(task_id)
+            outcome = TaskStateService.get_outcome(meta) if meta else None
+            if not outcome:
+                continue
+            for item in items:
+                item.status = outcome['status']
+                item.response_data = {**item.response_data, **outcome['fields'], 'status': outcome['status']}
+                updates.append({
+                    'id': item.id,
+                    'status': item.status,
+                    'response_data': item.response_data,
+                    'filename': outcome['filename'],
+                    'completed_at': outcome['completed_at']
+                })
+        
+        # Persiste o estado final para não consultar o Celery de novo nas próximas cargas
+        if updates:
+            try:
+                DatabaseService.finish_request_history(updates)
+            except Exception as e:
+                logging.error(f"Erro ao atualizar status do histórico: {e}")
         
         return history
 
@@ -119,9 +171,6 @@ class AdminService:
         
         api_key = api_keys[0].key
         
-        # Garante que o arquivo de cookies está disponível antes do teste
-        FileService.ensure_cookies_available()
-        
         with current_app.test_client() as client:
             response = client.get('/api/media', query_string=form_data, headers={'X-API-Key': api_key})
             return response.get_json(), response.status_code
@@ -147,12 +196,10 @@ class AdminService:
                 # Salva no banco de dados
                 DatabaseService.save_cookie_file(content, secure_filename(file.filename))
                 
-                # Escreve imediatamente no filesystem
-                cookies_path = os.path.join(os.getcwd(), 'cookies.txt')
-                with open(cookies_path, 'wb') as f:
-                    f.write(content)
+                # Publica a nova versão: cada worker atualiza sua cópia local
+                version = CookieService.publish_version(content)
                 
-                logging.info(f"Arquivo de cookies salvo: {len(content)} bytes em {cookies_path}")
+                logging.info(f"Arquivo de cookies salvo: {len(content)} bytes (versão {version[:12]})")
                 flash('Ficheiro de cookies atualizado com sucesso!', 'success')
                 
             except Exception as e:
@@ -176,14 +223,5 @@ class AdminService:
 
     @staticmethod
     def cleanup_missing_files() -> int:
-        """Remove registros de arquivos que não existem mais no filesystem"""
-        files = DatabaseService.get_media_files()
-        removed_count = 0
-        
-        for file in files:
-            file_path = os.path.join(Config.DOWNLOAD_FOLDER, file.filename)
-            if not os.path.exists(file_path):
-                DatabaseService.delete_media_file(file.filename)
-                removed_count += 1
-        
-        return removed_count
\ No newline at end of file
+        """Remove registros de arquivos marcados como ausentes no inventário"""
+        return DatabaseService.delete_missing_media_files()
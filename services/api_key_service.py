@@ -0,0 +1,116 @@
+import os
+import time
+import atexit
+import logging
+import threading
+from datetime import datetime
+from typing import Dict
+
+from config import Config
+from services.database_service import DatabaseService
+from services.redis_service import RedisService
+
+
+class ApiKeyService:
+    """Valida chaves de API a partir de um conjunto em memória das chaves ativas.
+
+    O conjunto é recarregado quando uma chave é criada/removida (aviso via Redis)
+    ou após API_KEY_CACHE_TTL. O último uso de cada chave é acumulado em memória
+    e gravado em lote a cada API_KEY_LAST_USED_FLUSH_INTERVAL segundos.
+    """
+    INVALIDATION_NAME = 'api_keys'
+
+    _lock = threading.Lock()
+    _active_keys = None
+    _loaded_at = 0.0
+    _generation = 0
+    _subscribed = False
+
+    _pending_lock = threading.Lock()
+    _pending_last_used: Dict[str, datetime] = {}
+    _flusher = None
+    _flusher_pid = None
+
+    @staticmethod
+    def validate(key: str) -> bool:
+        """Verifica se a chave está ativa e registra o uso"""
+        if not key or key not in ApiKeyService._get_active_keys():
+            return False
+        ApiKeyService._record_usage(key)
+        return True
+
+    @staticmethod
+    def invalidate(broadcast: bool = True) -> None:
+        """Descarta o conjunto local de chaves e, se pedido, avisa os demais processos"""
+        ApiKeyService._generation += 1
+        ApiKeyService._active_keys = None
+        if broadcast:
+            RedisService.publish_invalidation(ApiKeyService.INVALIDATION_NAME)
+
+    @staticmethod
+    def flush() -> None:
+        """Grava no banco os últimos usos acumulados"""
+        with ApiKeyService._pending_lock:
+            pending = ApiKeyService._pending_last_used
+            ApiKeyService._pending_last_used = {}
+        if not pending:
+            return
+
+        try:
+            DatabaseService.update_api_keys_last_used(pending)
+        except Exception as e:
+            logging.error(f"Erro ao gravar último uso das chaves de API: {e}")
+            # Devolve os registros para a próxima tentativa, sem sobrescrever usos mais recentes
+            with ApiKeyService._pending_lock:
+                for key, used_at in pending.items():
+                    current = ApiKeyService._pending_last_used.get(key)
+                    if current is None or current < used_at:
+                        ApiKeyService._pending_last_used[key] = used_at
+
+    @staticmethod
+    def _get_active_keys():
+        if not ApiKeyService._subscribed:
+            ApiKeyService._subscribed = True
+            RedisService.on_invalidation(ApiKeyService.INVALIDATION_NAME,
+                                         lambda: ApiKeyService.invalidate(broadcast=False))
+
+        active_keys = ApiKeyService._active_keys
+        if active_keys is not None and time.monotonic() - ApiKeyService._loaded_at < Config.API_KEY_CACHE_TTL:
+            return active_keys
+
+        with ApiKeyService._lock:
+            if (ApiKeyService._active_keys is not None and
+                    time.monotonic() - ApiKeyService._loaded_at < Config.API_KEY_CACHE_TTL):
+                return ApiKeyService._active_keys
+
+            loaded_at = time.monotonic()
+            generation = ApiKeyService._generation
+            active_keys = DatabaseService.get_active_api_key_values()
+            # Só guarda se nenhuma invalidação chegou durante a leitura
+            if generation == ApiKeyService._generation:
+                ApiKeyService._active_keys = active_keys
+                ApiKeyService._loaded_at = loaded_at
+            return active_keys
+
+    @staticmethod
+    def _record_usage(key: str) -> None:
+        with ApiKeyService._pending_lock:
+            ApiKeyService._pending_last_used[key] = datetime.utcnow()
+
+            flusher = ApiKeyService._flusher
+            if flusher and flusher.is_alive() and ApiKeyService._flusher_pid == os.getpid():
+                return
+            ApiKeyService._flusher_pid = os.getpid()
+            ApiKeyService._flusher = threading.Thread(target=ApiKeyService._run_flusher,
+                                                      name='api-key-last-used', daemon=True)
+            ApiKeyService._flusher.start()
+
+    @staticmethod
+    def _run_flusher() -> None:
+        while True:
+            time.sleep(Config.API_KEY_LAST_USED_FLUSH_INTERVAL)
+            ApiKeyService.flush()
+
+
+# Grava os usos pendentes ao encerrar o processo
+atexit.register(ApiKeyService.flush)
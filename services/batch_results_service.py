@@ -0,0 +1,42 @@
+import json
+import logging
+from typing import Dict, Any
+from redis.exceptions import RedisError
+
+from services.redis_service import RedisService
+
+
+class BatchResultsService:
+    KEY_PREFIX = 'batch_results:'
+    # Mesmo prazo padrão dos resultados do Celery (1 dia)
+    TTL_SECONDS = 86400
+
+    @staticmethod
+    def append(task_id: str, item: Dict[str, Any]) -> None:
+        """Acrescenta o resultado de uma URL ao log somente-anexação do lote"""
+        key = BatchResultsService.KEY_PREFIX + task_id
+        try:
+            pipe = RedisService.get_client().pipeline()
+            pipe.rpush(key, json.dumps(item))
+            pipe.expire(key, BatchResultsService.TTL_SECONDS)
+            pipe.execute()
+        except RedisError as e:
+            logging.warning(f"Erro ao registrar resultado do lote {task_id}: {e}")
+
+    @staticmethod
+    def get_page(task_id: str, cursor: int = 0, limit: int = 100) -> Dict[str, Any]:
+        """Retorna os resultados a partir do cursor (posição no log) e o próximo cursor"""
+        key = BatchResultsService.KEY_PREFIX + task_id
+        cursor = max(cursor, 0)
+        pipe = RedisService.get_client().pipeline()
+        pipe.lrange(key, cursor, cursor + limit - 1)
+        pipe.llen(key)
+        items, total = pipe.execute()
+
+        results = [json.loads(item) for item in items]
+        return {
+            'results': results,
+            'cursor': cursor,
+            'next_cursor': cursor + len(results),
+            'total': total
+        }
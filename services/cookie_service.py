@@ -0,0 +1,95 @@
+import os
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Optional
+from redis.exceptions import RedisError
+
+from services.database_service import DatabaseService
+from services.redis_service import RedisService
+
+
+class CookieService:
+    """Distribui o arquivo de cookies para os processos com base em uma versão (hash do conteúdo).
+
+    Cada processo mantém sua própria cópia em um arquivo temporário e só relê o BLOB
+    do banco quando a versão publicada no Redis muda.
+    """
+    VERSION_KEY = 'cookies:version'
+    NO_COOKIES = 'none'
+
+    _lock = threading.Lock()
+    _version = None
+    _path = None
+    _pid = None
+
+    @staticmethod
+    def compute_version(content: Optional[bytes]) -> str:
+        return hashlib.sha256(content).hexdigest() if content else CookieService.NO_COOKIES
+
+    @staticmethod
+    def publish_version(content: Optional[bytes]) -> str:
+        """Publica a versão atual dos cookies (chamado ao enviar ou remover o arquivo)"""
+        version = CookieService.compute_version(content)
+        try:
+            RedisService.get_client().set(CookieService.VERSION_KEY, version)
+        except RedisError as e:
+            logging.warning(f"Erro ao publicar versão dos cookies: {e}")
+        return version
+
+    @staticmethod
+    def get_published_version() -> Optional[str]:
+        try:
+            version = RedisService.get_client().get(CookieService.VERSION_KEY)
+            return version.decode() if version else None
+        except RedisError as e:
+            logging.warning(f"Erro ao consultar versão dos cookies: {e}")
+            return None
+
+    @staticmethod
+    def get_cookies_path() -> Optional[str]:
+        """Retorna o caminho local do arquivo de cookies deste processo, ou None se não houver cookies"""
+        version = CookieService.get_published_version()
+
+        with CookieService._lock:
+            if (version is not None and version == CookieService._version
+                    and CookieService._pid == os.getpid()):
+                return CookieService._path
+            return CookieService._refresh(publish=version is None)
+
+    @staticmethod
+    def sync() -> Optional[str]:
+        """Relê os cookies do banco, republica a versão e atualiza a cópia local"""
+        with CookieService._lock:
+            return CookieService._refresh(publish=True)
+
+    @staticmethod
+    def _refresh(publish: bool) -> Optional[str]:
+        cookie_file = DatabaseService.get_cookie_file()
+        content = cookie_file.content if cookie_file else None
+
+        # Versão ausente no Redis (ex.: Redis reiniciado): republica a partir do banco
+        version = CookieService.publish_version(content) if publish else CookieService.compute_version(content)
+        path = CookieService._write_local_copy(content)
+
+        CookieService._version = version
+        CookieService._path = path
+        CookieService._pid = os.getpid()
+        logging.info(f"Cookies atualizados no processo {os.getpid()} (versão {version[:12]})")
+        return path
+
+    @staticmethod
+    def _write_local_copy(content: Optional[bytes]) -> Optional[str]:
+        path = os.path.join(tempfile.gettempdir(), f"ytdl_cookies_{os.getpid()}.txt")
+        if not content:
+            if os.path.exists(path):
+                os.remove(path)
+            return None
+
+        # Escreve em arquivo temporário e substitui atomicamente
+        fd, tmp_path = tempfile.mkstemp(prefix='ytdl_cookies_', suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        return path
@@ -1,17 +1,39 @@
 import json
 import uuid
-from datetime import datetime
+import logging
+from collections import defaultdict
+from datetime import datetime, date
 from typing import List, Optional, Dict, Any
+from sqlalchemy import func, text, bindparam, insert, update, and_, or_, literal_column, tuple_
 from sqlalchemy.orm import Session
-from database import get_db, SessionLocal
-from database.models import User, ApiKey, Settings, RequestHistory, MediaFile, CookieFile, AppSettings, Folder, BatchDownload
+from database import get_db, get_session, release_connection, get_pool_stats
+from database.models import User, ApiKey, Settings, RequestHistory, MediaFile, CookieFile, AppSettings, Folder, BatchDownload, DailyRequestStats
 from werkzeug.security import generate_password_hash, check_password_hash
+from utils.text_search import build_search_text, normalize_search_text, escape_like
+from utils.pagination import decode_cursor
 
 class DatabaseService:
     
     @staticmethod
     def get_session() -> Session:
-        return SessionLocal()
+        """Sessão para `with`; dentro de uma requisição ou tarefa é a sessão compartilhada dela"""
+        return get_session()
+    
+    @staticmethod
+    def release_connection() -> None:
+        """Devolve a conexão da requisição ao pool antes de uma espera longa"""
+        release_connection()
+    
+    @staticmethod
+    def get_pool_stats() -> Dict[str, Any]:
+        """Métricas do pool de conexões deste processo (sem acessar o banco)"""
+        return get_pool_stats()
+    
+    @staticmethod
+    def ping() -> None:
+        """Executa uma consulta mínima para verificar a conexão com o banco"""
+        with DatabaseService.get_session() as db:
+            db.execute(text('SELECT 1'))
     
     # User Management
     @staticmethod
@@ -64,7 +86,10 @@ class DatabaseService:
             db.add(api_key)
             db.commit()
             db.refresh(api_key)
-            return api_key
+
+        from services.api_key_service import ApiKeyService
+        ApiKeyService.invalidate()
+        return api_key
     
     @staticmethod
     def delete_api_key(key: str) -> bool:
@@ -74,8 +99,27 @@ class DatabaseService:
             if api_key:
                 api_key.is_active = False
                 db.commit()
-                return True
-            return False
+            else:
+                return False
+
+        from services.api_key_service import ApiKeyService
+        ApiKeyService.invalidate()
+        return True
+    
+    @staticmethod
+    def get_active_api_key_values() -> set:
+        """Retorna o conjunto de chaves de API ativas"""
+        with DatabaseService.get_session() as db:
+            return {key for (key,) in db.query(ApiKey.key).filter(ApiKey.is_active == True)}
+    
+    @staticmethod
+    def update_api_keys_last_used(last_used: Dict[str, datetime]) -> None:
+        """Atualiza o último uso de várias chaves em uma única transação"""
+        table = ApiKey.__table__
+        stmt = table.update().where(table.c.key == bindparam('b_key')).values(last_used=bindparam('b_last_used'))
+        with DatabaseService.get_session() as db:
+            db.execute(stmt, [{'b_key': key, 'b_last_used': used_at} for key, used_at in last_used.items()])
+            db.commit()
     
     @staticmethod
     def validate_api_key(key: str) -> bool:
@@ -107,8 +151,8 @@ class DatabaseService:
             return default
     
     @staticmethod
-    def set_setting(key: str, value: Any) -> None:
-        """Define uma configuração"""
+    def set_setting(key: str, value: Any, broadcast: bool = True) -> None:
+        """Define uma configuração (broadcast avisa os processos para recarregar o cache)"""
         with DatabaseService.get_session() as db:
             setting = db.query(Settings).filter(Settings.key == key).first()
             value_str = json.dumps(value) if not isinstance(value, str) else value
@@ -121,6 +165,10 @@ class DatabaseService:
                 db.add(setting)
             
             db.commit()
+
+        if broadcast:
+            from services.settings_service import SettingsService
+            SettingsService.invalidate()
     
     @staticmethod
     def get_all_settings() -> Dict[str, Any]:
@@ -139,32 +187,208 @@ class DatabaseService:
     @staticmethod
     def log_request(api_key: str, request_data: Dict, response_data: Dict, status: str) -> None:
         """Registra uma requisição no histórico"""
+        DatabaseService.insert_request_history([
+            DatabaseService.build_request_history(api_key, request_data, response_data, status)
+        ])
+    
+    @staticmethod
+    def build_request_history(api_key: str, request_data: Dict, response_data: Dict, status: str) -> Dict[str, Any]:
+        """Monta os valores de uma linha do histórico de requisições"""
+        # Determina o status correto baseado no tipo de resposta
+        if isinstance(response_data, dict):
+            if response_data.get('status') == 'processing':
+                status = 'processing'
+            elif response_data.get('status') == 'completed':
+                status = 'completed'
+            elif response_data.get('status') == 'failed':
+                status = 'failed'
+            elif isinstance(response_data.get('status'), dict) and response_data['status'].get('task') == 'completed':
+                status = 'completed'
+        
+        return {
+            'api_key_used': f"{api_key[:4]}...{api_key[-4:]}",
+            'request_data': request_data,
+            'response_data': response_data,
+            'status': status,
+            'task_id': response_data.get('task_id') if isinstance(response_data, dict) else None,
+            'created_at': datetime.utcnow()
+        }
+    
+    @staticmethod
+    def insert_request_history(rows: List[Dict[str, Any]]) -> None:
+        """Insere várias linhas no histórico de requisições em uma única transação"""
+        if not rows:
+            return
         with DatabaseService.get_session() as db:
-            # Determina o status correto baseado no tipo de resposta
-            if isinstance(response_data, dict):
-                if response_data.get('status') == 'processing':
-                    status = 'processing'
-                elif response_data.get('status') == 'completed':
-                    status = 'completed'
-                elif response_data.get('status', {}).get('task') == 'completed':
-                    status = 'completed'
+            db.execute(insert(RequestHistory), rows)
             
-            history = RequestHistory(
-                api_key_used=f"{api_key[:4]}...{api_key[-4:]}",
-                request_data=request_data,
-                response_data=response_data,
-                status=status
-            )
-            db.add(history)
+            # Atualiza os totais diários na mesma transação
+            deltas = defaultdict(lambda: defaultdict(int))
+            for row in rows:
+                request_type = (row['request_data'] or {}).get('type')
+                for column, delta in DatabaseService._request_stats_columns(row['status'], request_type, 1).items():
+                    deltas[row['created_at'].date()][column] += delta
+            DatabaseService._apply_daily_request_stats(db, deltas)
+            db.commit()
+    
+    @staticmethod
+    def finish_request_history(updates: List[Dict[str, Any]]) -> int:
+        """Grava o status final de requisições que ainda estavam em processamento.
+        
+        Cada item tem 'id', 'status' e 'response_data' e, opcionalmente, 'filename'
+        e 'completed_at'. Linhas já finalizadas são ignoradas, então cada requisição
+        é contabilizada uma única vez.
+        Retorna a quantidade de linhas atualizadas.
+        """
+        if not updates:
+            return 0
+        
+        updated = 0
+        with DatabaseService.get_session() as db:
+            rows = {
+                row.id: row for row in db.query(
+                    RequestHistory.id, RequestHistory.created_at, RequestHistory.request_data
+                ).filter(RequestHistory.id.in_([u['id'] for u in updates]))
+            }
+            deltas = defaultdict(lambda: defaultdict(int))
+            
+            for item in updates:
+                row = rows.get(item['id'])
+                if row is None:
+                    continue
+                completed_at = item.get('completed_at') or datetime.utcnow()
+                result = db.execute(
+                    update(RequestHistory)
+                    .where(RequestHistory.id == item['id'], RequestHistory.status == 'processing')
+                    .values(
+                        status=item['status'],
+                        response_data=item['response_data'],
+                        filename=item.get('filename'),
+                        completed_at=completed_at,
+                        duration_seconds=max(int((completed_at - row.created_at).total_seconds()), 0)
+                    )
+                )
+                if result.rowcount != 1:
+                    continue
+                
+                # Move a requisição de "processing" para o status final nos totais diários
+                updated += 1
+                request_type = (row.request_data or {}).get('type')
+                for column, delta in DatabaseService._request_stats_columns(item['status'], request_type, 1).items():
+                    deltas[row.created_at.date()][column] += delta
+                for column, delta in DatabaseService._request_stats_columns('processing', request_type, -1).items():
+                    deltas[row.created_at.date()][column] += delta
+            
+            DatabaseService._apply_daily_request_stats(db, deltas)
             db.commit()
+        return updated
+    
+    @staticmethod
+    def finish_request_history_for_task(task_id: str, outcome: Dict[str, Any]) -> int:
+        """Grava o resultado de uma tarefa em todas as requisições que aguardavam por ela.
+        
+        `outcome` tem 'status', 'fields' (incluídos em response_data), 'filename' e 'completed_at'.
+        """
+        with DatabaseService.get_session() as db:
+            rows = db.query(RequestHistory.id, RequestHistory.response_data).filter(
+                RequestHistory.task_id == task_id,
+                RequestHistory.status == 'processing'
+            ).all()
+        
+        return DatabaseService.finish_request_history([
+            {
+                'id': row.id,
+                'status': outcome['status'],
+                'response_data': {**(row.response_data or {}), **outcome['fields'], 'status': outcome['status']},
+                'filename': outcome.get('filename'),
+                'completed_at': outcome.get('completed_at')
+            }
+            for row in rows
+        ])
+    
+    # Request Statistics
+    @staticmethod
+    def _request_stats_columns(status: str, request_type: Optional[str], delta: int) -> Dict[str, int]:
+        """Colunas de daily_request_stats afetadas por uma requisição com o status informado"""
+        columns = {'total_requests': delta}
+        if status in ('completed', 'failed', 'processing'):
+            columns[f"{status}_requests"] = delta
+        if status == 'completed' and request_type in ('audio', 'video'):
+            columns[f"{request_type}_completed"] = delta
+        return columns
+    
+    @staticmethod
+    def _apply_daily_request_stats(db: Session, deltas: Dict[date, Dict[str, int]]) -> None:
+        """Soma os incrementos aos totais diários (upsert por dia)"""
+        table = DailyRequestStats.__table__
+        dialect = db.get_bind().dialect.name
+        
+        for day, counts in deltas.items():
+            counts = {column: delta for column, delta in counts.items() if delta}
+            if not counts:
+                continue
+            
+            if dialect in ('postgresql', 'sqlite'):
+                if dialect == 'postgresql':
+                    from sqlalchemy.dialects.postgresql import insert as upsert
+                else:
+                    from sqlalchemy.dialects.sqlite import insert as upsert
+                stmt = upsert(table).values(day=day, updated_at=datetime.utcnow(), **counts)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[table.c.day],
+                    set_={**{column: table.c[column] + stmt.excluded[column] for column in counts},
+                          'updated_at': stmt.excluded.updated_at}
+                )
+                db.execute(stmt)
+            else:
+                result = db.execute(
+                    update(table).where(table.c.day == day)
+                    .values(updated_at=datetime.utcnow(), **{column: table.c[column] + delta for column, delta in counts.items()})
+                )
+                if result.rowcount == 0:
+                    db.execute(insert(table).values(day=day, updated_at=datetime.utcnow(), **counts))
     
     @staticmethod
-    def get_request_history(limit: int = 100) -> List[RequestHistory]:
-        """Retorna o histórico de requisições"""
+    def get_request_stats_totals(since: date = None) -> Dict[str, int]:
+        """Soma os totais diários (opcionalmente a partir de uma data)"""
+        columns = ('total_requests', 'completed_requests', 'failed_requests',
+                   'processing_requests', 'audio_completed', 'video_completed')
         with DatabaseService.get_session() as db:
-            return db.query(RequestHistory).order_by(
-                RequestHistory.created_at.desc()
-            ).limit(limit).all()
+            query = db.query(*[func.coalesce(func.sum(getattr(DailyRequestStats, c)), 0).label(c) for c in columns])
+            if since is not None:
+                query = query.filter(DailyRequestStats.day >= since)
+            return {column: int(value) for column, value in query.one()._asdict().items()}
+    
+    @staticmethod
+    def get_daily_request_counts(since: date) -> Dict[date, int]:
+        """Retorna o total de requisições por dia a partir de uma data"""
+        with DatabaseService.get_session() as db:
+            rows = db.query(DailyRequestStats.day, DailyRequestStats.total_requests).filter(
+                DailyRequestStats.day >= since
+            ).all()
+            return {row.day: row.total_requests for row in rows}
+    
+    @staticmethod
+    def get_request_history(limit: int = 100, cursor: str = None) -> List[RequestHistory]:
+        """Retorna o histórico de requisições (do mais recente), a partir do cursor se informado"""
+        with DatabaseService.get_session() as db:
+            query = DatabaseService._apply_keyset(db.query(RequestHistory), RequestHistory, cursor, descending=True)
+            return query.limit(limit).all()
+    
+    @staticmethod
+    def _apply_keyset(query, model, cursor: str = None, descending: bool = True):
+        """Ordena por (created_at, id) e continua depois do cursor sem OFFSET"""
+        if cursor:
+            created_at, item_id = decode_cursor(cursor)
+            # Comparação de tuplas: o PostgreSQL a usa como limite de faixa no índice (created_at, id)
+            position = tuple_(model.created_at, model.id)
+            if descending:
+                query = query.filter(position < tuple_(created_at, item_id))
+            else:
+                query = query.filter(position > tuple_(created_at, item_id))
+        if descending:
+            return query.order_by(model.created_at.desc(), model.id.desc())
+        return query.order_by(model.created_at.asc(), model.id.asc())
     
     @staticmethod
     def delete_history_item(history_id: int) -> bool:
@@ -186,8 +410,9 @@ class DatabaseService:
     
     # Media Files
     @staticmethod
-    def save_media_file(filename: str, metadata: Dict, media_type: str, file_size_mb: float) -> MediaFile:
-        """Salva informações de um arquivo de mídia"""
+    def save_media_file(filename: str, metadata: Dict, media_type: str, file_size_mb: float, cache_key: str = None,
+                        size_bytes: int = None, file_mtime: float = None) -> MediaFile:
+        """Salva informações de um arquivo de mídia (e seu registro no inventário)"""
         with DatabaseService.get_session() as db:
             media_file = MediaFile(
                 filename=filename,
@@ -201,7 +426,15 @@ class DatabaseService:
                 description=metadata.get('description', ''),
                 thumbnail_url=metadata.get('thumbnail', ''),
                 file_size_mb=int(file_size_mb),
-                media_type=media_type
+                media_type=media_type,
+                cache_key=cache_key,
+                file_exists=True,
+                size_bytes=size_bytes,
+                file_mtime=datetime.utcfromtimestamp(file_mtime) if file_mtime is not None else None,
+                inventory_checked_at=datetime.utcnow(),
+                search_text=build_search_text(metadata.get('title'), metadata.get('uploader'),
+                                              metadata.get('description'), metadata.get('tags')),
+                search_updated_at=datetime.utcnow()
             )
             db.add(media_file)
             db.commit()
@@ -209,8 +442,11 @@ class DatabaseService:
             return media_file
     
     @staticmethod
-    def get_media_files(folder_id: int = None, search: str = None, media_type: str = None, sort_by: str = 'created_at', sort_order: str = 'desc', limit: int = None, offset: int = 0) -> List[MediaFile]:
-        """Retorna todos os arquivos de mídia"""
+    def get_media_files(folder_id: int = None, search: str = None, media_type: str = None, sort_by: str = 'created_at', sort_order: str = 'desc', limit: int = None, offset: int = 0, cursor: str = None) -> List[MediaFile]:
+        """Retorna todos os arquivos de mídia (sort_by='relevance' ordena pela relevância da busca).
+
+        Ordenando por created_at, a paginação usa o cursor (created_at, id) em vez de offset.
+        """
         with DatabaseService.get_session() as db:
             query = db.query(MediaFile)
             
@@ -222,18 +458,27 @@ class DatabaseService:
                     query = query.filter(MediaFile.folder_id == folder_id)
             
             # Search filter
+            relevance, scores = None, None
             if search:
-                query = query.filter(
-                    MediaFile.title.ilike(f'%{search}%') |
-                    MediaFile.uploader.ilike(f'%{search}%')
-                )
+                query, relevance, scores = DatabaseService._apply_media_search(db, query, search)
             
             # Media type filter
             if media_type:
                 query = query.filter(MediaFile.media_type == media_type)
             
             # Sorting
-            if sort_order == 'desc':
+            if sort_by == 'relevance':
+                if scores is not None:
+                    # Índice em memória: ordena pela pontuação calculada em Python
+                    files = sorted(query.all(), key=lambda f: (scores.get(f.id, 0), f.created_at), reverse=True)
+                    return files[offset:offset + limit] if limit else files[offset:]
+                if relevance is not None:
+                    query = query.order_by(relevance.desc(), MediaFile.created_at.desc())
+                else:
+                    query = query.order_by(MediaFile.created_at.desc())
+            elif sort_by == 'created_at':
+                query = DatabaseService._apply_keyset(query, MediaFile, cursor, descending=sort_order == 'desc')
+            elif sort_order == 'desc':
                 query = query.order_by(getattr(MediaFile, sort_by).desc())
             else:
                 query = query.order_by(getattr(MediaFile, sort_by))
@@ -246,6 +491,142 @@ class DatabaseService:
             
             return query.all()
     
+    # Máximo de ids do índice em memória usados em um filtro IN; acima disso usa LIKE
+    LOCAL_SEARCH_MAX_IDS = 10000
+    
+    @staticmethod
+    def _apply_media_search(db: Session, query, search: str):
+        """Aplica a busca textual e retorna (query, expressão de relevância, pontuações em memória)"""
+        words = normalize_search_text(search).split()
+        if not words:
+            return query, None, None
+        word_filters = and_(*[MediaFile.search_text.ilike(f"%{escape_like(word)}%", escape='\\') for word in words])
+        
+        if db.get_bind().dialect.name == 'postgresql':
+            # ILIKE usa o índice de trigramas; a relevância combina tsvector e similaridade
+            phrase = ' '.join(words)
+            tsvector = func.to_tsvector(literal_column("'simple'::regconfig"), MediaFile.search_text)
+            relevance = (func.ts_rank(tsvector, func.plainto_tsquery(literal_column("'simple'::regconfig"), phrase))
+                         + func.similarity(MediaFile.search_text, phrase))
+            return query.filter(word_filters), relevance, None
+        
+        from services.media_search_service import MediaSearchService
+        scores = MediaSearchService.match(search)
+        if scores is None or len(scores) > DatabaseService.LOCAL_SEARCH_MAX_IDS:
+            return query.filter(word_filters), None, None
+        return query.filter(MediaFile.id.in_(list(scores))), None, scores
+    
+    @staticmethod
+    def get_media_search_rows(after_id: int = 0, updated_since: datetime = None) -> List[tuple]:
+        """Retorna (id, search_text, search_updated_at) dos arquivos com id maior que after_id
+        ou com texto de busca alterado a partir de updated_since"""
+        condition = MediaFile.id > after_id
+        if updated_since is not None:
+            condition = or_(condition, MediaFile.search_updated_at >= updated_since)
+        with DatabaseService.get_session() as db:
+            return [tuple(row) for row in db.query(
+                MediaFile.id, MediaFile.search_text, MediaFile.search_updated_at
+            ).filter(condition).order_by(MediaFile.id)]
+    
+    @staticmethod
+    def get_media_file_ids() -> List[int]:
+        """Retorna os ids de todos os arquivos registrados"""
+        with DatabaseService.get_session() as db:
+            return [media_id for media_id, in db.query(MediaFile.id)]
+    
+    @staticmethod
+    def ensure_media_search_text(batch_size: int = 500) -> int:
+        """Preenche search_text dos arquivos registrados antes da busca indexada"""
+        updated = 0
+        while True:
+            with DatabaseService.get_session() as db:
+                files = db.query(MediaFile).filter(MediaFile.search_text.is_(None)).limit(batch_size).all()
+                if not files:
+                    return updated
+                for media_file in files:
+                    media_file.search_text = build_search_text(
+                        media_file.title, media_file.uploader, media_file.description, media_file.tags
+                    )
+                    media_file.search_updated_at = datetime.utcnow()
+                db.commit()
+                updated += len(files)
+    
+    @staticmethod
+    def get_media_files_by_cache_key(cache_key: str, limit: int = 5) -> List[MediaFile]:
+        """Retorna os arquivos mais recentes, ainda presentes no disco, gerados para a mesma chave de mídia"""
+        with DatabaseService.get_session() as db:
+            return db.query(MediaFile).filter(
+                MediaFile.cache_key == cache_key,
+                MediaFile.file_exists == True
+            ).order_by(MediaFile.created_at.desc()).limit(limit).all()
+    
+    @staticmethod
+    def get_media_files_summary() -> Dict[str, Any]:
+        """Retorna quantidade de arquivos, ausentes e tamanho total no disco (MB) pelo inventário"""
+        size = func.coalesce(MediaFile.size_bytes, MediaFile.file_size_mb * 1024 * 1024)
+        with DatabaseService.get_session() as db:
+            total_files, missing_files, total_bytes = db.query(
+                func.count(MediaFile.id),
+                func.count().filter(MediaFile.file_exists == False),
+                func.coalesce(func.sum(size).filter(MediaFile.file_exists == True), 0)
+            ).one()
+            return {
+                'total_files': total_files,
+                'missing_files': missing_files,
+                'total_size_mb': float(total_bytes) / (1024 * 1024)
+            }
+    
+    @staticmethod
+    def get_media_inventory() -> Dict[str, Dict[str, Any]]:
+        """Retorna o inventário de todos os arquivos registrados, indexado pelo nome"""
+        with DatabaseService.get_session() as db:
+            rows = db.query(MediaFile.filename, MediaFile.file_exists, MediaFile.size_bytes, MediaFile.file_mtime)
+            return {
+                row.filename: {'file_exists': row.file_exists, 'size_bytes': row.size_bytes, 'file_mtime': row.file_mtime}
+                for row in rows
+            }
+    
+    @staticmethod
+    def update_media_inventory(changes: List[Dict[str, Any]]) -> None:
+        """Atualiza em lote o inventário (itens com filename, file_exists, size_bytes e file_mtime)"""
+        if not changes:
+            return
+        table = MediaFile.__table__
+        stmt = table.update().where(table.c.filename == bindparam('b_filename')).values(
+            file_exists=bindparam('b_file_exists'),
+            size_bytes=bindparam('b_size_bytes'),
+            file_mtime=bindparam('b_file_mtime'),
+            inventory_checked_at=bindparam('b_checked_at')
+        )
+        checked_at = datetime.utcnow()
+        with DatabaseService.get_session() as db:
+            db.execute(stmt, [
+                {
+                    'b_filename': change['filename'],
+                    'b_file_exists': change['file_exists'],
+                    'b_size_bytes': change.get('size_bytes'),
+                    'b_file_mtime': change.get('file_mtime'),
+                    'b_checked_at': checked_at
+                }
+                for change in changes
+            ])
+            db.commit()
+    
+    @staticmethod
+    def mark_media_files_missing(filenames: List[str]) -> None:
+        """Marca no inventário arquivos removidos do disco"""
+        DatabaseService.update_media_inventory([
+            {'filename': filename, 'file_exists': False} for filename in filenames
+        ])
+    
+    @staticmethod
+    def delete_missing_media_files() -> int:
+        """Remove os registros de arquivos marcados como ausentes no inventário"""
+        with DatabaseService.get_session() as db:
+            removed = db.query(MediaFile).filter(MediaFile.file_exists == False).delete(synchronize_session=False)
+            db.commit()
+            return removed
+    
     @staticmethod
     def get_media_files_count(folder_id: int = None, search: str = None, media_type: str = None) -> int:
         """Retorna o total de arquivos com filtros"""
@@ -258,10 +639,7 @@ class DatabaseService:
                 else:
                     query = query.filter(MediaFile.folder_id == folder_id)
             if search:
-                query = query.filter(
-                    MediaFile.title.ilike(f'%{search}%') |
-                    MediaFile.uploader.ilike(f'%{search}%')
-                )
+                query = DatabaseService._apply_media_search(db, query, search)[0]
             if media_type:
                 query = query.filter(MediaFile.media_type == media_type)
             
@@ -321,6 +699,12 @@ class DatabaseService:
         with DatabaseService.get_session() as db:
             return db.query(CookieFile).first()
     
+    @staticmethod
+    def has_cookie_file() -> bool:
+        """Verifica se há arquivo de cookies sem carregar o conteúdo"""
+        with DatabaseService.get_session() as db:
+            return db.query(CookieFile.id).first() is not None
+    
     @staticmethod
     def delete_cookie_file() -> bool:
         """Remove o arquivo de cookies"""
@@ -426,4 +810,28 @@ class DatabaseService:
                 elif failed > 0:
                     batch.status = 'processing'
                 
-                db.commit()
\ No newline at end of file
+                db.commit()
+    
+    @staticmethod
+    def record_batch_item(batch_id: int, success: bool) -> Optional[BatchDownload]:
+        """Incrementa atomicamente os contadores de um lote e retorna o estado atualizado"""
+        with DatabaseService.get_session() as db:
+            counter = BatchDownload.completed_files if success else BatchDownload.failed_files
+            db.query(BatchDownload).filter(BatchDownload.id == batch_id).update({
+                counter: counter + 1,
+                BatchDownload.progress: (BatchDownload.completed_files + BatchDownload.failed_files + 1) * 100
+                                        // func.nullif(BatchDownload.total_files, 0)
+            }, synchronize_session=False)
+            db.commit()
+            return db.query(BatchDownload).filter(BatchDownload.id == batch_id).first()
+    
+    @staticmethod
+    def finish_batch_download(batch_id: int, status: str = 'completed') -> None:
+        """Marca um lote como finalizado"""
+        with DatabaseService.get_session() as db:
+            batch = db.query(BatchDownload).filter(BatchDownload.id == batch_id).first()
+            if batch:
+                batch.status = status
+                batch.progress = 100
+                batch.completed_at = datetime.utcnow()
+                db.commit()
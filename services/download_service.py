@@ -0,0 +1,58 @@
+import os
+import logging
+import mimetypes
+from urllib.parse import quote
+from flask import Response, abort, current_app, send_from_directory
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+from config import Config
+from services.database_service import DatabaseService
+
+
+class DownloadService:
+    """Entrega os arquivos de DOWNLOAD_FOLDER diretamente ou delegando ao proxy na frente da aplicação"""
+
+    @staticmethod
+    def send(filename: str) -> Response:
+        try:
+            if Config.DOWNLOAD_SERVE_MODE == 'x-accel':
+                response = DownloadService._x_accel_response(filename)
+            else:
+                # Modo direto (ou X-Sendfile, via USE_X_SENDFILE): send_file responde a
+                # If-None-Match/If-Modified-Since e a Range com 206, e usa wsgi.file_wrapper
+                # (sendfile no gunicorn) para não copiar o arquivo pelo Python
+                response = send_from_directory(
+                    Config.DOWNLOAD_FOLDER, filename,
+                    conditional=True, etag=True, max_age=Config.DOWNLOAD_CACHE_MAX_AGE
+                )
+        except NotFound:
+            DownloadService._mark_missing(filename)
+            raise
+        response.cache_control.public = True
+        response.cache_control.max_age = Config.DOWNLOAD_CACHE_MAX_AGE
+        response.cache_control.immutable = True
+        return response
+
+    @staticmethod
+    def _x_accel_response(filename: str) -> Response:
+        """Resposta vazia com X-Accel-Redirect: o nginx envia o arquivo (Range e ETag inclusos)"""
+        folder = os.path.join(current_app.root_path, Config.DOWNLOAD_FOLDER)
+        path = safe_join(folder, filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+
+        response = Response(status=200)
+        response.headers['X-Accel-Redirect'] = f"{Config.X_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{quote(filename)}"
+        response.headers['Content-Type'] = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        return response
+
+    @staticmethod
+    def _mark_missing(filename: str) -> None:
+        """Arquivo registrado mas ausente do disco: o cache de mídia deixa de oferecê-lo"""
+        if os.path.basename(filename) != filename:
+            return
+        try:
+            DatabaseService.mark_media_files_missing([filename])
+        except Exception as e:
+            logging.warning(f"Erro ao marcar arquivo ausente {filename}: {e}")
@@ -0,0 +1,45 @@
+import os
+import logging
+from datetime import datetime
+from typing import Dict, Any
+
+from config import Config
+from services.database_service import DatabaseService
+
+
+class FileInventoryService:
+    """Mantém no banco a existência, o tamanho e o mtime de cada arquivo baixado.
+
+    As telas de listagem leem apenas o inventário; o disco é percorrido somente
+    na varredura periódica (uma listagem da pasta, sem stat por registro).
+    """
+
+    @staticmethod
+    def scan() -> Dict[str, Any]:
+        """Compara o inventário com a pasta de downloads e grava as diferenças"""
+        on_disk = {}
+        try:
+            with os.scandir(Config.DOWNLOAD_FOLDER) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        on_disk[entry.name] = (stat.st_size, datetime.utcfromtimestamp(stat.st_mtime))
+        except FileNotFoundError:
+            logging.warning(f"Pasta de downloads não encontrada: {Config.DOWNLOAD_FOLDER}")
+
+        changes = []
+        for filename, current in DatabaseService.get_media_inventory().items():
+            if filename in on_disk:
+                size_bytes, file_mtime = on_disk[filename]
+                if (not current['file_exists'] or current['size_bytes'] != size_bytes
+                        or current['file_mtime'] != file_mtime):
+                    changes.append({'filename': filename, 'file_exists': True,
+                                    'size_bytes': size_bytes, 'file_mtime': file_mtime})
+            elif current['file_exists']:
+                changes.append({'filename': filename, 'file_exists': False})
+
+        DatabaseService.update_media_inventory(changes)
+        missing = sum(1 for change in changes if not change['file_exists'])
+        if changes:
+            logging.info(f"Inventário de arquivos atualizado: {len(changes)} alterações ({missing} ausentes)")
+        return {'files_on_disk': len(on_disk), 'changed': len(changes), 'missing': missing}
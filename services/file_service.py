@@ -2,45 +2,32 @@ import os
 import logging
 import requests
 import http.cookiejar
-from services.database_service import DatabaseService
+from config import Config
+from services.cookie_service import CookieService
 
 
 class FileService:
     @staticmethod
     def ensure_cookies_available():
-        """Garante que o arquivo de cookies está disponível para o yt-dlp"""
+        """Sincroniza os cookies do banco com os workers (publica uma nova versão)"""
         try:
-            cookie_file = DatabaseService.get_cookie_file()
-            cookies_path = os.path.join(os.getcwd(), "cookies.txt")
-
-            if cookie_file:
-                # Sempre reescreve o arquivo para garantir que está atualizado
-                with open(cookies_path, "wb") as f:
-                    f.write(cookie_file.content)
-                logging.info(f"Arquivo de cookies escrito em: {cookies_path}")
-                return True
-            else:
-                # Remove o arquivo se não há cookies no banco
-                if os.path.exists(cookies_path):
-                    os.remove(cookies_path)
-                    logging.info("Arquivo de cookies removido (não há cookies no banco)")
-                return False
+            return CookieService.sync() is not None
         except Exception as e:
-            logging.error(f"Erro ao escrever arquivo de cookies: {e}")
+            logging.error(f"Erro ao sincronizar cookies: {e}")
             return False
 
     @staticmethod
     def check_cookie_status():
         """Verifica se o arquivo de cookies está sincronizado e ainda é válido no YouTube"""
         try:
-            cookie_file = DatabaseService.get_cookie_file()
-            cookies_path = os.path.join(os.getcwd(), "cookies.txt")
+            # Cópia local versionada: só lê o banco quando os cookies mudam
+            cookies_path = CookieService.get_cookies_path()
 
-            if cookie_file and not os.path.exists(cookies_path):
+            if not cookies_path:
+                return "missing"
+            elif not os.path.exists(cookies_path):
                 return "needs_sync"
-            elif not cookie_file and os.path.exists(cookies_path):
-                return "orphaned_file"
-            elif cookie_file and os.path.exists(cookies_path):
+            else:
                 # Verifica validade do cookie com o YouTube
                 try:
                     cj = http.cookiejar.MozillaCookieJar()
@@ -48,7 +35,7 @@ class FileService:
                     cookies_dict = {cookie.name: cookie.value for cookie in cj}
 
                     response = requests.get(
-                        "https://www.youtube.com/feed/subscriptions",
+                        Config.COOKIE_PROBE_URL,
                         cookies=cookies_dict,
                         allow_redirects=False,
                         timeout=10,
@@ -62,11 +49,5 @@ class FileService:
                     return "ok"
                 except:
                     return "expired"
-
-            # Se nem cookie_file nem o arquivo físico existem
-            if not cookie_file and not os.path.exists(cookies_path):
-                return "missing"
-
-            return "ok"
         except:
             return "error"
@@ -0,0 +1,119 @@
+import os
+import time
+import shutil
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any
+
+from config import Config
+from services.database_service import DatabaseService
+from services.file_service import FileService
+from services.redis_service import RedisService
+from tasks import celery
+
+
+class HealthService:
+    """Verifica as dependências em segundo plano e guarda o último resultado em memória.
+
+    O /api/health responde a partir deste snapshot, sem abrir conexões nem fazer
+    requisições externas durante a chamada.
+    """
+    _lock = threading.Lock()
+    _results: Dict[str, Dict[str, Any]] = {}
+    _thread = None
+    _pid = None
+    _last_cookie_check = 0.0
+    # Se a primeira rodada de verificações deste processo já terminou, e quando ela começou
+    _ready = False
+    _started_at = None
+
+    @staticmethod
+    def start() -> None:
+        """Inicia o loop de verificação (uma thread por processo)"""
+        with HealthService._lock:
+            if HealthService._thread and HealthService._thread.is_alive() and HealthService._pid == os.getpid():
+                return
+            HealthService._pid = os.getpid()
+            HealthService._started_at = time.monotonic()
+            HealthService._thread = threading.Thread(target=HealthService._run, name='health-prober', daemon=True)
+            HealthService._thread.start()
+
+    @staticmethod
+    def get_snapshot() -> Dict[str, Dict[str, Any]]:
+        """Retorna o último resultado de cada verificação (vazio até a primeira rodada terminar)"""
+        HealthService.start()
+        with HealthService._lock:
+            return {name: dict(result) for name, result in HealthService._results.items()}
+
+    @staticmethod
+    def is_starting() -> bool:
+        """Se a primeira rodada de verificações do processo ainda está em andamento.
+
+        Limitado a HEALTH_CHECK_INTERVAL segundos: uma verificação travada não deve
+        esconder indefinidamente uma dependência fora do ar.
+        """
+        started_at = HealthService._started_at
+        return (not HealthService._ready and started_at is not None
+                and time.monotonic() - started_at < Config.HEALTH_CHECK_INTERVAL)
+
+    @staticmethod
+    def refresh(include_cookies: bool = True) -> None:
+        """Executa todas as verificações uma vez"""
+        probes = {
+            'redis': HealthService._check_redis,
+            'database': HealthService._check_database,
+            'disk': HealthService._check_disk,
+            'workers': HealthService._check_workers,
+        }
+        if include_cookies:
+            probes['cookies'] = FileService.check_cookie_status
+            HealthService._last_cookie_check = time.monotonic()
+
+        for name, probe in probes.items():
+            started = time.monotonic()
+            try:
+                status = probe()
+            except Exception as e:
+                logging.warning(f"Verificação de saúde '{name}' falhou: {e}")
+                status = 'error'
+            result = {
+                'status': status,
+                'checked_at': datetime.utcnow().isoformat() + 'Z',
+                'latency_ms': round((time.monotonic() - started) * 1000, 1)
+            }
+            with HealthService._lock:
+                HealthService._results[name] = result
+        HealthService._ready = True
+
+    @staticmethod
+    def _run() -> None:
+        while True:
+            cookies_due = (not HealthService._last_cookie_check or
+                           time.monotonic() - HealthService._last_cookie_check >= Config.HEALTH_COOKIE_CHECK_INTERVAL)
+            try:
+                HealthService.refresh(include_cookies=cookies_due)
+            except Exception as e:
+                logging.error(f"Erro no loop de verificação de saúde: {e}")
+            time.sleep(Config.HEALTH_CHECK_INTERVAL)
+
+    @staticmethod
+    def _check_redis() -> str:
+        RedisService.get_client().ping()
+        return 'ok'
+
+    @staticmethod
+    def _check_database() -> str:
+        DatabaseService.ping()
+        return 'ok'
+
+    @staticmethod
+    def _check_disk() -> str:
+        path = Config.DOWNLOAD_FOLDER if os.path.isdir(Config.DOWNLOAD_FOLDER) else '.'
+        free_mb = shutil.disk_usage(path).free / (1024 * 1024)
+        return 'ok' if free_mb >= Config.HEALTH_MIN_FREE_DISK_MB else 'low'
+
+    @staticmethod
+    def _check_workers() -> str:
+        replies = celery.control.ping(timeout=1.0)
+        return 'ok' if replies else 'error'
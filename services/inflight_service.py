@@ -0,0 +1,94 @@
+import logging
+from typing import Callable, Tuple
+from celery.result import AsyncResult
+from celery.utils import uuid
+from redis.exceptions import RedisError
+
+from config import Config
+from services.redis_service import RedisService
+
+# Remove a chave somente se ela ainda pertence à tarefa informada
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Renova a validade da chave somente se ela ainda pertence à tarefa informada
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class InflightService:
+    KEY_PREFIX = 'inflight:'
+
+    @staticmethod
+    def get_or_start(media_key: str, start_task: Callable[[str], AsyncResult]) -> Tuple[AsyncResult, bool]:
+        """Reaproveita a tarefa em andamento para a mesma mídia ou inicia uma nova.
+
+        Retorna a tarefa e um booleano indicando se ela já estava em andamento.
+        """
+        from tasks import celery
+
+        key = InflightService.KEY_PREFIX + media_key
+        task_id = uuid()
+
+        try:
+            client = RedisService.get_client()
+            for _ in range(2):
+                if client.set(key, task_id, nx=True, ex=Config.INFLIGHT_TTL):
+                    return InflightService._start(media_key, task_id, start_task), False
+
+                existing_id = client.get(key)
+                if not existing_id:
+                    continue
+
+                existing_id = existing_id.decode()
+                existing = AsyncResult(existing_id, app=celery)
+                if existing.state in ('FAILURE', 'REVOKED'):
+                    # Tarefa anterior falhou sem liberar o registro: assume o lugar dela
+                    InflightService.release(media_key, existing_id)
+                    continue
+
+                logging.info(f"Reaproveitando tarefa em andamento {existing_id} para {media_key[:12]}")
+                return existing, True
+        except RedisError as e:
+            logging.warning(f"Registro de downloads em andamento indisponível: {e}")
+
+        return start_task(task_id), False
+
+    @staticmethod
+    def _start(media_key: str, task_id: str, start_task: Callable[[str], AsyncResult]) -> AsyncResult:
+        """Inicia a tarefa já registrada, liberando o registro se o envio falhar"""
+        try:
+            return start_task(task_id)
+        except Exception:
+            InflightService.release(media_key, task_id)
+            raise
+
+    @staticmethod
+    def renew(media_key: str, task_id: str) -> None:
+        """Mantém o registro da tarefa enquanto ela reporta progresso.
+
+        Se o worker morrer sem passar pelo finally da tarefa, o registro expira em
+        até INFLIGHT_TTL segundos em vez de prender as requisições idênticas.
+        """
+        try:
+            client = RedisService.get_client()
+            client.eval(RENEW_SCRIPT, 1, InflightService.KEY_PREFIX + media_key, task_id, Config.INFLIGHT_TTL)
+        except RedisError as e:
+            logging.warning(f"Erro ao renovar registro da tarefa {task_id}: {e}")
+
+    @staticmethod
+    def release(media_key: str, task_id: str) -> None:
+        """Libera o registro de download em andamento da tarefa"""
+        try:
+            client = RedisService.get_client()
+            client.eval(RELEASE_SCRIPT, 1, InflightService.KEY_PREFIX + media_key, task_id)
+        except RedisError as e:
+            logging.warning(f"Erro ao liberar registro da tarefa {task_id}: {e}")
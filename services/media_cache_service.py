@@ -0,0 +1,50 @@
+import logging
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+from config import Config
+from services.database_service import DatabaseService
+from utils.media_keys import build_media_key
+
+
+class MediaCacheService:
+    @staticmethod
+    def lookup(url: str, media_type: str, quality: str = None, bitrate: str = None) -> Optional[Dict[str, Any]]:
+        """Retorna o resultado de um download já existente para a mesma URL/tipo/qualidade"""
+        try:
+            cache_key = build_media_key(url, media_type, quality, bitrate)
+            # Só arquivos presentes no inventário; a varredura periódica e os 404 de
+            # /api/download marcam os que sumiram do disco
+            media_files = DatabaseService.get_media_files_by_cache_key(cache_key, limit=1)
+            if media_files:
+                logging.info(f"Cache de mídia encontrado para {url}: {media_files[0].filename}")
+                return MediaCacheService._to_result(media_files[0])
+        except Exception as e:
+            logging.warning(f"Erro ao consultar cache de mídia: {e}")
+        return None
+
+    @staticmethod
+    def _to_result(media_file) -> Dict[str, Any]:
+        """Converte um MediaFile no mesmo formato retornado pelo SingleVideoProcessor"""
+        formatted_date = media_file.upload_date or 'N/A'
+        try:
+            formatted_date = datetime.strptime(formatted_date, '%Y%m%d').strftime('%d/%m/%Y')
+        except ValueError:
+            pass
+
+        return {
+            'playlist': False,
+            'cached': True,
+            'filename': media_file.filename,
+            'download_url': f"{Config.BASE_URL}/api/download/{media_file.filename}",
+            'title': media_file.title,
+            'uploader': media_file.uploader,
+            'thumbnail': media_file.thumbnail_url or None,
+            'duration_string': media_file.duration_string,
+            'webpage_url': media_file.original_url or '#',
+            'view_count': media_file.view_count,
+            'like_count': media_file.like_count,
+            'description': media_file.description,
+            'upload_date': formatted_date,
+            'time_spend': '0s',
+        }
@@ -0,0 +1,95 @@
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Optional
+
+from services.database_service import DatabaseService
+from utils.text_search import normalize_search_text, trigrams
+
+
+class MediaSearchService:
+    """Índice de trigramas em memória para bancos sem pg_trgm/tsvector (ex.: SQLite).
+
+    O índice é carregado sob demanda e, a cada busca, recebe só os arquivos novos (id
+    maior que o último indexado) e os que tiveram o texto de busca alterado desde a
+    última leitura (search_updated_at). Arquivos removidos do banco saem do índice
+    quando a contagem de registros deixa de bater com a quantidade indexada.
+    """
+    _lock = threading.Lock()
+    _texts: Dict[int, str] = {}
+    _index = defaultdict(set)
+    _last_id = 0
+    _last_updated: Optional[datetime] = None
+
+    @staticmethod
+    def match(search: str) -> Optional[Dict[int, float]]:
+        """Retorna {id: relevância} dos arquivos que contêm todas as palavras da busca"""
+        words = normalize_search_text(search).split()
+        if not words:
+            return None
+
+        MediaSearchService._refresh()
+        with MediaSearchService._lock:
+            candidates = None
+            for word in words:
+                for gram in trigrams(word):
+                    ids = MediaSearchService._index.get(gram, set())
+                    candidates = set(ids) if candidates is None else candidates & ids
+                    if not candidates:
+                        return {}
+            if candidates is None:
+                # Só palavras curtas (menos de 3 letras): verifica todos os textos
+                candidates = MediaSearchService._texts.keys()
+
+            phrase = ' '.join(words)
+            scores = {}
+            for media_id in candidates:
+                text = MediaSearchService._texts.get(media_id, '')
+                if not all(word in text for word in words):
+                    continue
+                score = sum(text.count(word) for word in words)
+                if phrase in text:
+                    score += 2
+                if text.startswith(phrase):
+                    score += 3
+                scores[media_id] = score
+            return scores
+
+    @staticmethod
+    def _refresh() -> None:
+        with MediaSearchService._lock:
+            rows = DatabaseService.get_media_search_rows(
+                after_id=MediaSearchService._last_id,
+                updated_since=MediaSearchService._last_updated
+            )
+            for media_id, search_text, updated_at in rows:
+                MediaSearchService._remove(media_id)
+                MediaSearchService._add(media_id, search_text or '')
+                MediaSearchService._last_id = max(MediaSearchService._last_id, media_id)
+                if updated_at and (MediaSearchService._last_updated is None or updated_at > MediaSearchService._last_updated):
+                    MediaSearchService._last_updated = updated_at
+
+            if DatabaseService.get_media_files_count() != len(MediaSearchService._texts):
+                existing = set(DatabaseService.get_media_file_ids())
+                for media_id in [media_id for media_id in MediaSearchService._texts if media_id not in existing]:
+                    MediaSearchService._remove(media_id)
+
+    @staticmethod
+    def _add(media_id: int, text: str) -> None:
+        MediaSearchService._texts[media_id] = text
+        for word in set(text.split()):
+            for gram in trigrams(word):
+                MediaSearchService._index[gram].add(media_id)
+
+    @staticmethod
+    def _remove(media_id: int) -> None:
+        text = MediaSearchService._texts.pop(media_id, None)
+        if text is None:
+            return
+        for word in set(text.split()):
+            for gram in trigrams(word):
+                ids = MediaSearchService._index.get(gram)
+                if ids is not None:
+                    ids.discard(media_id)
+                    if not ids:
+                        del MediaSearchService._index[gram]
@@ -0,0 +1,76 @@
+import time
+import logging
+import os
+import threading
+from redis import Redis
+from redis.exceptions import RedisError
+from config import Config
+
+
+class RedisService:
+    _client = None
+
+    # Invalidação de caches locais entre processos via pub/sub
+    INVALIDATION_PREFIX = 'invalidate:'
+    _handlers = {}
+    _handlers_lock = threading.Lock()
+    _listener = None
+    _listener_pid = None
+
+    @staticmethod
+    def get_client() -> Redis:
+        """Retorna um cliente Redis compartilhado pelo processo"""
+        if RedisService._client is None:
+            RedisService._client = Redis.from_url(Config.REDIS_URL)
+        return RedisService._client
+
+    @staticmethod
+    def publish_invalidation(name: str) -> None:
+        """Avisa todos os processos que o cache local `name` está desatualizado"""
+        try:
+            RedisService.get_client().publish(RedisService.INVALIDATION_PREFIX + name, '1')
+        except RedisError as e:
+            logging.warning(f"Erro ao publicar invalidação de '{name}': {e}")
+
+    @staticmethod
+    def on_invalidation(name: str, callback) -> None:
+        """Registra um callback chamado quando `name` for invalidado em qualquer processo"""
+        with RedisService._handlers_lock:
+            callbacks = RedisService._handlers.setdefault(name, [])
+            if callback not in callbacks:
+                callbacks.append(callback)
+
+            listener = RedisService._listener
+            if listener and listener.is_alive() and RedisService._listener_pid == os.getpid():
+                return
+            RedisService._listener_pid = os.getpid()
+            RedisService._listener = threading.Thread(target=RedisService._listen, name='redis-invalidation', daemon=True)
+            RedisService._listener.start()
+
+    @staticmethod
+    def _dispatch(name: str = None) -> None:
+        with RedisService._handlers_lock:
+            if name is None:
+                callbacks = [cb for cbs in RedisService._handlers.values() for cb in cbs]
+            else:
+                callbacks = list(RedisService._handlers.get(name, []))
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logging.error(f"Erro ao processar invalidação de '{name}': {e}")
+
+    @staticmethod
+    def _listen() -> None:
+        while True:
+            try:
+                pubsub = RedisService.get_client().pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(RedisService.INVALIDATION_PREFIX + '*')
+                # Mensagens podem ter sido perdidas enquanto desconectado: descarta todos os caches
+                RedisService._dispatch()
+                for message in pubsub.listen():
+                    channel = message['channel'].decode()
+                    RedisService._dispatch(channel[len(RedisService.INVALIDATION_PREFIX):])
+            except Exception as e:
+                logging.warning(f"Conexão de invalidação com o Redis perdida: {e}")
+                time.sleep(1)
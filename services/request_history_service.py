@@ -0,0 +1,173 @@
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+from typing import Dict
+from redis.exceptions import RedisError
+
+from config import Config
+from services.database_service import DatabaseService
+from services.redis_service import RedisService
+
+# Item colocado na fila só para acordar o gravador no encerramento
+_WAKEUP = object()
+
+class RequestHistoryService:
+    """Grava o histórico de requisições em segundo plano.
+
+    As linhas vão para uma fila em memória e são inseridas em lote quando a fila
+    atinge HISTORY_BATCH_SIZE ou a cada HISTORY_FLUSH_INTERVAL segundos.
+    """
+    _queue = queue.Queue(maxsize=Config.HISTORY_QUEUE_MAX_SIZE)
+    _lock = threading.Lock()
+    _writer = None
+    _writer_pid = None
+    _stop = threading.Event()
+    # Tempo máximo (s) que o encerramento espera o gravador terminar
+    SHUTDOWN_TIMEOUT = 10.0
+    # Espera (s) antes de tentar gravar de novo um lote que falhou
+    RETRY_DELAY = 1.0
+    # Marca as tarefas com requisições registradas como 'processing' (202), cujo resultado
+    # o worker deve gravar mesmo que a linha ainda esteja na fila de gravação
+    PENDING_PREFIX = 'history-pending:'
+    PENDING_TTL = 86400
+
+    @staticmethod
+    def log(api_key: str, request_data: Dict, response_data: Dict, status: str) -> None:
+        """Enfileira uma requisição para o histórico sem acessar o banco"""
+        row = DatabaseService.build_request_history(api_key, request_data, response_data, status)
+        if row.get('status') == 'processing' and row.get('task_id'):
+            RequestHistoryService.mark_pending(row['task_id'])
+        if RequestHistoryService._stop.is_set():
+            # Processo encerrando: o gravador não consome mais a fila
+            RequestHistoryService._write([row])
+            return
+        RequestHistoryService._ensure_writer()
+        try:
+            RequestHistoryService._queue.put_nowait(row)
+        except queue.Full:
+            # Fila cheia (banco lento ou indisponível): grava diretamente para não perder o registro
+            logging.warning("Fila do histórico cheia, gravando requisição diretamente")
+            try:
+                DatabaseService.insert_request_history([row])
+            except Exception as e:
+                logging.error(f"Erro ao registrar requisição no histórico: {e}")
+
+    @staticmethod
+    def mark_pending(task_id: str) -> None:
+        try:
+            RedisService.get_client().set(RequestHistoryService.PENDING_PREFIX + task_id, 1,
+                                          ex=RequestHistoryService.PENDING_TTL)
+        except RedisError as e:
+            logging.warning(f"Erro ao marcar requisição pendente da tarefa {task_id}: {e}")
+
+    @staticmethod
+    def is_pending(task_id: str) -> bool:
+        """Se alguma requisição aguarda o resultado da tarefa no histórico"""
+        try:
+            return bool(RedisService.get_client().exists(RequestHistoryService.PENDING_PREFIX + task_id))
+        except RedisError as e:
+            logging.warning(f"Erro ao consultar requisição pendente da tarefa {task_id}: {e}")
+            return True
+
+    @staticmethod
+    def clear_pending(task_id: str) -> None:
+        try:
+            RedisService.get_client().delete(RequestHistoryService.PENDING_PREFIX + task_id)
+        except RedisError as e:
+            logging.warning(f"Erro ao limpar requisição pendente da tarefa {task_id}: {e}")
+
+    @staticmethod
+    def flush() -> None:
+        """Grava imediatamente tudo o que estiver na fila"""
+        while True:
+            batch = RequestHistoryService._drain(Config.HISTORY_BATCH_SIZE)
+            if not batch:
+                return
+            RequestHistoryService._write(batch)
+
+    @staticmethod
+    def shutdown() -> None:
+        """Para o gravador, que grava o lote em mãos e o que restar na fila (atexit)"""
+        RequestHistoryService._stop.set()
+        writer = RequestHistoryService._writer
+        if writer and writer.is_alive() and RequestHistoryService._writer_pid == os.getpid():
+            try:
+                RequestHistoryService._queue.put_nowait(_WAKEUP)
+            except queue.Full:
+                # Fila cheia: o gravador está ocupado e verá o aviso de parada ao fim do lote
+                pass
+            writer.join(RequestHistoryService.SHUTDOWN_TIMEOUT)
+            if writer.is_alive():
+                logging.warning("Gravador do histórico não terminou a tempo no encerramento")
+        RequestHistoryService.flush()
+
+    @staticmethod
+    def _drain(limit: int) -> list:
+        batch = []
+        while len(batch) < limit:
+            try:
+                row = RequestHistoryService._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is not _WAKEUP:
+                batch.append(row)
+        return batch
+
+    @staticmethod
+    def _write(batch: list) -> None:
+        try:
+            DatabaseService.insert_request_history(batch)
+        except Exception as e:
+            # Falhas passageiras (conexão derrubada, failover): tenta mais uma vez
+            logging.warning(f"Erro ao gravar {len(batch)} requisições no histórico, tentando novamente: {e}")
+            time.sleep(RequestHistoryService.RETRY_DELAY)
+            try:
+                DatabaseService.insert_request_history(batch)
+            except Exception as e:
+                logging.error(f"Erro ao gravar {len(batch)} requisições no histórico: {e}")
+
+    @staticmethod
+    def _ensure_writer() -> None:
+        writer = RequestHistoryService._writer
+        if writer and writer.is_alive() and RequestHistoryService._writer_pid == os.getpid():
+            return
+        with RequestHistoryService._lock:
+            writer = RequestHistoryService._writer
+            if writer and writer.is_alive() and RequestHistoryService._writer_pid == os.getpid():
+                return
+            RequestHistoryService._writer_pid = os.getpid()
+            RequestHistoryService._writer = threading.Thread(target=RequestHistoryService._run,
+                                                             name='request-history-writer', daemon=True)
+            RequestHistoryService._writer.start()
+
+    @staticmethod
+    def _run() -> None:
+        stop = RequestHistoryService._stop
+        while not stop.is_set():
+            # Espera o primeiro item e junta os demais até fechar o lote ou vencer o intervalo
+            row = RequestHistoryService._queue.get()
+            if row is _WAKEUP:
+                continue
+            batch = [row]
+            deadline = time.monotonic() + Config.HISTORY_FLUSH_INTERVAL
+            while len(batch) < Config.HISTORY_BATCH_SIZE and not stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    row = RequestHistoryService._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if row is _WAKEUP:
+                    break
+                batch.append(row)
+            RequestHistoryService._write(batch)
+        # Encerramento: grava o que ainda estiver na fila
+        RequestHistoryService.flush()
+
+
+# Ao encerrar o processo, grava o lote em andamento e o que restar na fila
+atexit.register(RequestHistoryService.shutdown)
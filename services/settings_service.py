@@ -0,0 +1,102 @@
+import time
+import logging
+import threading
+from typing import Any, Dict
+
+from config import Config
+from services.database_service import DatabaseService
+from services.redis_service import RedisService
+
+# Tipo e valor padrão de cada configuração conhecida
+SETTINGS_SCHEMA = {
+    'DEFAULT_RATE_LIMIT': (str, '20 per minute'),
+    'TASK_COMPLETION_TIMEOUT': (int, 60),
+    'PUBLIC_DOWNLOAD_LIMIT': (str, '5 per hour'),
+    'MAX_FILE_SIZE_MB': (int, 500),
+    'AUTO_CLEANUP_DAYS': (int, 30),
+}
+
+# Padrões gravados no banco quando ausentes
+PERSISTED_DEFAULTS = ('DEFAULT_RATE_LIMIT', 'TASK_COMPLETION_TIMEOUT')
+
+
+class SettingsService:
+    """Mantém em memória uma cópia das configurações do banco.
+
+    A cópia é carregada uma vez por processo e descartada quando outro processo
+    publica uma alteração no Redis (ou após SETTINGS_CACHE_TTL, como garantia).
+    """
+    INVALIDATION_NAME = 'settings'
+
+    _lock = threading.Lock()
+    _snapshot: Dict[str, Any] = None
+    _loaded_at = 0.0
+    _generation = 0
+    _subscribed = False
+
+    @staticmethod
+    def get_all() -> Dict[str, Any]:
+        """Retorna uma cópia das configurações atuais"""
+        SettingsService._subscribe()
+        snapshot = SettingsService._snapshot
+        if snapshot is None or time.monotonic() - SettingsService._loaded_at >= Config.SETTINGS_CACHE_TTL:
+            snapshot = SettingsService._load()
+        return dict(snapshot)
+
+    @staticmethod
+    def invalidate(broadcast: bool = True) -> None:
+        """Descarta a cópia local e, se pedido, avisa os demais processos"""
+        SettingsService._generation += 1
+        SettingsService._snapshot = None
+        if broadcast:
+            RedisService.publish_invalidation(SettingsService.INVALIDATION_NAME)
+
+    @staticmethod
+    def _subscribe() -> None:
+        if not SettingsService._subscribed:
+            SettingsService._subscribed = True
+            RedisService.on_invalidation(SettingsService.INVALIDATION_NAME,
+                                         lambda: SettingsService.invalidate(broadcast=False))
+
+    @staticmethod
+    def _load() -> Dict[str, Any]:
+        with SettingsService._lock:
+            # Outra thread pode ter recarregado enquanto esperávamos o lock
+            if (SettingsService._snapshot is not None and
+                    time.monotonic() - SettingsService._loaded_at < Config.SETTINGS_CACHE_TTL):
+                return SettingsService._snapshot
+
+            loaded_at = time.monotonic()
+            generation = SettingsService._generation
+            try:
+                settings = DatabaseService.get_all_settings()
+                for key in PERSISTED_DEFAULTS:
+                    if key not in settings:
+                        DatabaseService.set_setting(key, SETTINGS_SCHEMA[key][1], broadcast=False)
+            except Exception as e:
+                logging.warning(f"Erro ao carregar configurações do banco: {e}")
+                # Mantém a última cópia válida, se houver, e tenta de novo no próximo TTL
+                if SettingsService._snapshot is not None:
+                    SettingsService._loaded_at = loaded_at
+                    return SettingsService._snapshot
+                return SettingsService._coerce({})
+
+            snapshot = SettingsService._coerce(settings)
+            # Só guarda se nenhuma invalidação chegou durante a leitura
+            if generation == SettingsService._generation:
+                SettingsService._snapshot = snapshot
+                SettingsService._loaded_at = loaded_at
+            return snapshot
+
+    @staticmethod
+    def _coerce(settings: Dict[str, Any]) -> Dict[str, Any]:
+        """Aplica os tipos e padrões do schema às configurações lidas do banco"""
+        result = dict(settings)
+        for key, (value_type, default) in SETTINGS_SCHEMA.items():
+            value = result.get(key, default)
+            try:
+                result[key] = value_type(value)
+            except (TypeError, ValueError):
+                logging.warning(f"Valor inválido para a configuração {key}: {value!r}")
+                result[key] = default
+        return result
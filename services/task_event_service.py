@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import queue
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterator, Tuple
+from flask import Response
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from redis.exceptions import RedisError
+from celery.result import AsyncResult
+
+from config import Config
+from services.redis_service import RedisService
+
+# Estados finais do Celery
+READY_STATES = frozenset({'SUCCESS', 'FAILURE', 'REVOKED'})
+
+
+class TaskEventService:
+    """Eventos das tarefas do Celery distribuídos via Redis pub/sub.
+
+    Os workers publicam em `task-events:<task_id>` e cada processo web mantém uma única
+    conexão de escuta, repassando os eventos para as filas locais de quem acompanha a
+    tarefa. Esperar por uma tarefa não consulta o backend em laço nem abre conexões por
+    requisição, e com gevent cada espera custa apenas um greenlet.
+    """
+    CHANNEL_PREFIX = 'task-events:'
+    # Evento local entregue após reconectar: mensagens podem ter sido perdidas
+    RESYNC = {'resync': True}
+    # Intervalo (ms) sugerido ao EventSource para reconectar
+    STREAM_RETRY_MS = 3000
+
+    _lock = threading.Lock()
+    _subscribers: Dict[str, set] = {}
+    _listener = None
+    _listener_pid = None
+
+    @staticmethod
+    def publish(task_id: str, state: str, **fields: Any) -> None:
+        """Publica um evento da tarefa (chamado pelos workers)"""
+        try:
+            payload = json.dumps({'task_id': task_id, 'state': state, **fields}, default=str)
+            RedisService.get_client().publish(TaskEventService.CHANNEL_PREFIX + task_id, payload)
+        except (RedisError, TypeError, ValueError) as e:
+            logging.warning(f"Erro ao publicar evento da tarefa {task_id}: {e}")
+
+    @staticmethod
+    def subscribe(task_id: str) -> queue.Queue:
+        """Passa a receber os eventos da tarefa na fila retornada"""
+        events = queue.Queue(maxsize=1000)
+        with TaskEventService._lock:
+            TaskEventService._subscribers.setdefault(task_id, set()).add(events)
+            TaskEventService._ensure_listener()
+        return events
+
+    @staticmethod
+    def unsubscribe(task_id: str, events: queue.Queue) -> None:
+        with TaskEventService._lock:
+            subscribers = TaskEventService._subscribers.get(task_id)
+            if subscribers is not None:
+                subscribers.discard(events)
+                if not subscribers:
+                    del TaskEventService._subscribers[task_id]
+
+    @staticmethod
+    def wait_until_ready(task_id: str, timeout: float) -> bool:
+        """Espera a tarefa terminar por até `timeout` segundos; retorna True se terminou"""
+        from tasks import celery
+
+        events = TaskEventService.subscribe(task_id)
+        try:
+            # Inscrito antes de consultar o estado: um término neste intervalo não se perde
+            if AsyncResult(task_id, app=celery).state in READY_STATES:
+                return True
+
+            deadline = time.monotonic() + timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                try:
+                    event = events.get(timeout=remaining)
+                except queue.Empty:
+                    return False
+                if event.get('state') in READY_STATES:
+                    return True
+                if event.get('resync') and AsyncResult(task_id, app=celery).state in READY_STATES:
+                    return True
+        finally:
+            TaskEventService.unsubscribe(task_id, events)
+
+    @staticmethod
+    def wait_for_change(task_id: str, is_known: Callable[[str, Any], bool], timeout: float) -> Tuple[str, Any]:
+        """Long-poll: espera até `is_known(state, info)` deixar de ser verdadeiro, a tarefa
+        terminar ou passar `timeout` segundos, e retorna o (state, info) mais recente.
+
+        Atualizações de progresso vêm dos eventos, sem novas leituras do backend.
+        """
+        events = TaskEventService.subscribe(task_id)
+        try:
+            state, info = TaskEventService._read_event(task_id, TaskEventService.RESYNC)
+            deadline = time.monotonic() + timeout
+            while state not in READY_STATES and is_known(state, info):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    event = events.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                state, info = TaskEventService._read_event(task_id, event)
+            return state, info
+        finally:
+            TaskEventService.unsubscribe(task_id, events)
+
+    @staticmethod
+    def create_stream_token(task_id: str) -> str:
+        """Token assinado que dá acesso ao stream de uma única tarefa, sem a chave de API"""
+        return TaskEventService._token_serializer().dumps(task_id)
+
+    @staticmethod
+    def verify_stream_token(token: str, task_id: str) -> bool:
+        try:
+            return TaskEventService._token_serializer().loads(token, max_age=Config.TASK_EVENTS_TOKEN_TTL) == task_id
+        except BadSignature:
+            return False
+
+    @staticmethod
+    def _token_serializer() -> URLSafeTimedSerializer:
+        return URLSafeTimedSerializer(Config.SECRET_KEY, salt='task-events')
+
+    @staticmethod
+    def event_stream(task_id: str, render: Callable[[str, Any], Dict[str, Any]]) -> Response:
+        """Resposta SSE com o progresso da tarefa até ela terminar.
+
+        `render(state, info)` monta cada evento no mesmo formato do endpoint de status
+        correspondente; o backend só é consultado no início, ao reconectar e no término.
+        """
+        response = Response(TaskEventService._stream(task_id, render), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        # Sem buffer no nginx: cada evento deve chegar ao cliente assim que publicado
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+
+    @staticmethod
+    def _stream(task_id: str, render: Callable[[str, Any], Dict[str, Any]]) -> Iterator[str]:
+        events = TaskEventService.subscribe(task_id)
+        try:
+            yield f"retry: {TaskEventService.STREAM_RETRY_MS}\n\n"
+            deadline = time.monotonic() + Config.TASK_EVENTS_MAX_DURATION
+            event = TaskEventService.RESYNC
+            last_data = None
+            while True:
+                state, info = TaskEventService._read_event(task_id, event)
+                data = json.dumps(render(state, info), default=str)
+                if data != last_data:
+                    # Ressincronizações costumam repetir o último estado enviado
+                    yield f"data: {data}\n\n"
+                    last_data = data
+                if state in READY_STATES:
+                    return
+
+                event = None
+                while event is None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        # Encerra a conexão; o EventSource reconecta e recebe o estado atual
+                        return
+                    try:
+                        event = events.get(timeout=min(Config.TASK_EVENTS_KEEPALIVE, remaining))
+                    except queue.Empty:
+                        yield ": keepalive\n\n"
+        finally:
+            TaskEventService.unsubscribe(task_id, events)
+
+    @staticmethod
+    def _read_event(task_id: str, event: Dict[str, Any]) -> Tuple[str, Any]:
+        """(state, info) de um evento; consulta o backend no término e ao ressincronizar"""
+        if event.get('resync') or event.get('state') in READY_STATES:
+            from tasks import celery
+
+            task_result = AsyncResult(task_id, app=celery)
+            return task_result.state, task_result.info
+        return event.get('state'), {k: v for k, v in event.items() if k not in ('task_id', 'state')}
+
+    @staticmethod
+    def _ensure_listener() -> None:
+        listener = TaskEventService._listener
+        if listener and listener.is_alive() and TaskEventService._listener_pid == os.getpid():
+            return
+        TaskEventService._listener_pid = os.getpid()
+        TaskEventService._listener = threading.Thread(target=TaskEventService._listen, name='task-events', daemon=True)
+        TaskEventService._listener.start()
+
+    @staticmethod
+    def _deliver(task_id: str, event: Dict[str, Any]) -> None:
+        with TaskEventService._lock:
+            subscribers = list(TaskEventService._subscribers.get(task_id, ()))
+        for events in subscribers:
+            try:
+                events.put_nowait(event)
+            except queue.Full:
+                # Quem não consome os eventos não deve travar a entrega aos demais
+                pass
+
+    @staticmethod
+    def _listen() -> None:
+        while True:
+            try:
+                pubsub = RedisService.get_client().pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(TaskEventService.CHANNEL_PREFIX + '*')
+                with TaskEventService._lock:
+                    task_ids = list(TaskEventService._subscribers)
+                for task_id in task_ids:
+                    TaskEventService._deliver(task_id, TaskEventService.RESYNC)
+
+                for message in pubsub.listen():
+                    channel = message['channel'].decode()
+                    try:
+                        event = json.loads(message['data'])
+                    except ValueError:
+                        continue
+                    TaskEventService._deliver(channel[len(TaskEventService.CHANNEL_PREFIX):], event)
+            except Exception as e:
+                logging.warning(f"Conexão de eventos de tarefas com o Redis perdida: {e}")
+                time.sleep(1)
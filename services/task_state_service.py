@@ -0,0 +1,90 @@
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Any, Optional
+from celery.result import AsyncResult
+
+
+class TaskStateService:
+    """Consulta o estado de várias tarefas do Celery com uma única ida ao backend"""
+
+    @staticmethod
+    def get_states(task_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Retorna {task_id: meta} com 'status' e 'result' das tarefas que já têm registro no backend.
+
+        Tarefas sem registro (pendentes ou desconhecidas) ficam fora do resultado.
+        """
+        from tasks import celery
+
+        task_ids = list(dict.fromkeys(task_id for task_id in task_ids if task_id))
+        if not task_ids:
+            return {}
+
+        backend = celery.backend
+        if not (hasattr(backend, 'mget') and hasattr(backend, 'get_key_for_task')):
+            return TaskStateService._get_states_one_by_one(task_ids)
+
+        keys = [backend.get_key_for_task(task_id) for task_id in task_ids]
+        values = backend.mget(keys)
+        if isinstance(values, dict):
+            # Alguns backends (ex.: cache) devolvem um dict indexado pela chave
+            values = [values.get(key) for key in keys]
+        states = {}
+        for task_id, value in zip(task_ids, values):
+            if not value:
+                continue
+            try:
+                states[task_id] = backend.decode_result(value)
+            except Exception as e:
+                logging.warning(f"Erro ao decodificar estado da tarefa {task_id}: {e}")
+        return states
+
+    @staticmethod
+    def get_outcome(meta: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Converte o estado de uma tarefa finalizada no resultado gravado no histórico.
+
+        Retorna None se a tarefa ainda não terminou.
+        """
+        state = meta.get('status')
+        if state == 'SUCCESS':
+            result = meta.get('result')
+            outcome = {'status': 'completed', 'fields': {'result': result},
+                       'filename': TaskStateService._get_result_filename(result)}
+        elif state in ('FAILURE', 'REVOKED'):
+            outcome = {'status': 'failed', 'fields': {'error': str(meta.get('result'))}, 'filename': None}
+        else:
+            return None
+
+        outcome['completed_at'] = TaskStateService._parse_date_done(meta.get('date_done'))
+        return outcome
+
+    @staticmethod
+    def _get_result_filename(result) -> Optional[str]:
+        if not isinstance(result, dict):
+            return None
+        download_url = result.get('download_url')
+        return download_url.rsplit('/', 1)[-1] if download_url else None
+
+    @staticmethod
+    def _parse_date_done(date_done) -> Optional[datetime]:
+        """Converte date_done do backend para datetime UTC sem fuso (como no banco)"""
+        if isinstance(date_done, str):
+            try:
+                date_done = datetime.fromisoformat(date_done)
+            except ValueError:
+                return None
+        if not isinstance(date_done, datetime):
+            return None
+        if date_done.tzinfo is not None:
+            date_done = date_done.astimezone(timezone.utc).replace(tzinfo=None)
+        return date_done
+
+    @staticmethod
+    def _get_states_one_by_one(task_ids) -> Dict[str, Dict[str, Any]]:
+        from tasks import celery
+
+        states = {}
+        for task_id in task_ids:
+            result = AsyncResult(task_id, app=celery)
+            if result.state != 'PENDING':
+                states[task_id] = {'status': result.state, 'result': result.info}
+        return states
@@ -65,8 +65,8 @@ class ApiTester {
                         source: 'api-test'
                     });
                     
-                    // Também monitora no log
-                    this.pollTaskStatusForLog(result.task_id, addLog);
+                    // Também monitora no log (mesma conexão do acompanhamento)
+                    this.followTaskStatusForLog(result.task_id, addLog);
                     
                 } else if (result.status === 'completed' || (result.status && result.status.task === 'completed')) {
                     addLog('🎉 Tarefa concluída com sucesso!', 'success');
@@ -89,27 +89,15 @@ class ApiTester {
         });
     }
 
-    async pollTaskStatusForLog(taskId, addLog) {
-        let pollCount = 0;
-        const maxPolls = 60; // 3 minutos máximo
+    followTaskStatusForLog(taskId, addLog) {
+        let lastProgressLog = null;
         
-        const intervalId = setInterval(async () => {
-            pollCount++;
-            
-            if (pollCount > maxPolls) {
-                addLog('⏰ Timeout: Parando verificação automática', 'warning');
-                clearInterval(intervalId);
-                return;
-            }
-            
+        // Eventos do stream interno (sem necessidade de API key), compartilhado com o ProgressTracker
+        const unwatch = this.dashboard.progressTracker.watch(taskId, async (result) => {
             try {
-                // Usa endpoint interno sem necessidade de API key
-                const response = await fetch(`/admin/tasks/${taskId}/status`);
-                const result = await response.json();
-                
-                if (!response.ok) {
-                    addLog(`❌ Erro ao verificar status: ${result.error || 'Erro desconhecido'}`, 'error');
-                    clearInterval(intervalId);
+                if (result.state === 'ERROR') {
+                    addLog(`❌ Erro ao verificar status: ${result.message || 'Erro desconhecido'}`, 'error');
+                    unwatch();
                     return;
                 }
                 
@@ -127,14 +115,21 @@ class ApiTester {
                         }
                     } else if (taskResult.batch) {
                         addLog(`📦 Lote processado: ${taskResult.completed}/${taskResult.total_urls} sucessos`, 'success');
-                        if (taskResult.results) {
-                            taskResult.results.forEach((item, index) => {
+                        // Resultados por URL ficam em um log paginado por cursor
+                        let cursor = 0;
+                        while (true) {
+                            const pageResponse = await fetch(`/admin/tasks/${taskId}/results?cursor=${cursor}&limit=500`);
+                            const page = await pageResponse.json();
+                            if (!page.success || page.results.length === 0) break;
+                            
+                            page.results.forEach(item => {
                                 if (item.status === 'success') {
-                                    addLog(`${index + 1}. <a href="${item.download_url}" class="text-cyan-400 hover:underline" target="_blank">${item.title}</a>`, 'success');
+                                    addLog(`${item.index}. <a href="${item.download_url}" class="text-cyan-400 hover:underline" target="_blank">${item.title}</a>`, 'success');
                                 } else {
-                                    addLog(`${index + 1}. ❌ Falha: ${item.error}`, 'error');
+                                    addLog(`${item.index}. ❌ Falha: ${item.error}`, 'error');
                                 }
                             });
+                            cursor = page.next_cursor;
                         }
                     } else {
                         const downloadUrl = taskResult.download_url;
@@ -143,22 +138,28 @@ class ApiTester {
                         }
                     }
                     
-                    clearInterval(intervalId);
+                    unwatch();
                     
                     // Refresh files section after 2 seconds
                     setTimeout(() => {
                         if (window.location.hash === '#files') {
-                            this.dashboard.fileManager.filterFiles();
+                            this.dashboard.fileManager?.filterFiles();
                         }
                     }, 2000);
                     
                 } else if (result.state === 'FAILURE') {
                     addLog(`❌ Tarefa falhou: ${result.error || result.message || 'Erro desconhecido'}`, 'error');
-                    clearInterval(intervalId);
+                    unwatch();
                     
                 } else if (result.state === 'PROGRESS') {
                     const progress = result.progress || 0;
                     const message = result.message || 'Processando...';
+                    
+                    // Registra só mudanças de etapa ou a cada 10% para não inundar o log
+                    const progressLog = `${result.stage}:${Math.floor(progress / 10)}:${result.current_title || ''}:${result.current_url || ''}`;
+                    if (progressLog === lastProgressLog) return;
+                    lastProgressLog = progressLog;
+                    
                     addLog(`⏳ ${message} (${progress}%)`, 'info');
                     
                     // Log específico para playlists
@@ -173,10 +174,10 @@ class ApiTester {
                 }
                 
             } catch (error) {
-                addLog(`🌐 Erro de rede ao verificar status: ${error.message}`, 'error');
-                clearInterval(intervalId);
+                addLog(`❌ Erro ao processar status: ${error.message}`, 'error');
+                unwatch();
             }
-        }, 3000); // Verifica a cada 3 segundos
+        });
     }
 
     setupCookieSync() {
@@ -11,6 +11,7 @@ class FileManager {
         this.setupFilters();
         this.setupViewToggle();
         this.setupFolderActions();
+        this.setupLoadMore();
     }
 
     setupFileActions() {
@@ -197,36 +198,71 @@ class FileManager {
         });
     }
 
-    async filterFiles() {
-        const search = document.getElementById('file-search')?.value || '';
-        const folder = document.getElementById('folder-filter')?.value || '';
-        const type = document.getElementById('type-filter')?.value || '';
-        const sort = document.getElementById('sort-filter')?.value || 'created_at-desc';
-        
-        const params = new URLSearchParams({
-            search,
-            folder_id: folder,
-            media_type: type,
-            sort: sort
-        });
+    getFilterParams() {
+        return {
+            search: document.getElementById('file-search')?.value || '',
+            folder_id: document.getElementById('folder-filter')?.value || '',
+            media_type: document.getElementById('type-filter')?.value || '',
+            sort: document.getElementById('sort-filter')?.value || 'created_at-desc'
+        };
+    }
+
+    async filterFiles(cursor = null) {
+        const params = new URLSearchParams(this.getFilterParams());
+        if (cursor) {
+            params.set('cursor', cursor);
+        }
         
         try {
             const response = await fetch(`/admin/files/filter?${params}`);
             const data = await response.json();
             
             if (data.success) {
-                document.getElementById('files-grid').innerHTML = data.html;
-                document.getElementById('files-count').textContent = data.count;
+                const filesGrid = document.getElementById('files-grid');
+                const filesCount = document.getElementById('files-count');
+                if (cursor) {
+                    // Próxima página: acrescenta os cards aos já exibidos
+                    if (data.count) {
+                        filesGrid.insertAdjacentHTML('beforeend', data.html);
+                    }
+                    filesCount.textContent = filesGrid.querySelectorAll('.file-card').length;
+                } else {
+                    filesGrid.innerHTML = data.html;
+                    filesCount.textContent = data.count;
+                }
+                this.updateLoadMore(data.next_cursor);
                 
                 // Re-setup event listeners for new elements
                 this.dashboard.modalManager.setupMetadataModals();
                 this.dashboard.modalManager.setupPlayerModals();
+            } else {
+                this.dashboard.showNotification(data.error || 'Erro ao filtrar arquivos', 'error');
             }
         } catch (error) {
             this.dashboard.showNotification('Erro ao filtrar arquivos', 'error');
         }
     }
 
+    setupLoadMore() {
+        const loadMoreBtn = document.getElementById('files-load-more');
+        if (loadMoreBtn) {
+            loadMoreBtn.addEventListener('click', async () => {
+                if (!loadMoreBtn.dataset.cursor) return;
+                loadMoreBtn.disabled = true;
+                await this.filterFiles(loadMoreBtn.dataset.cursor);
+                loadMoreBtn.disabled = false;
+            });
+        }
+    }
+
+    updateLoadMore(nextCursor) {
+        const loadMoreBtn = document.getElementById('files-load-more');
+        if (loadMoreBtn) {
+            loadMoreBtn.dataset.cursor = nextCursor || '';
+            loadMoreBtn.classList.toggle('hidden', !nextCursor);
+        }
+    }
+
     updateFileStats() {
         const fileCards = document.querySelectorAll('.file-card');
         const totalFiles = fileCards.length;
@@ -9,6 +9,7 @@ class HistoryManager {
         this.setupHistoryActions();
         this.setupHistoryFilters();
         this.setupRefreshButton();
+        this.setupLoadMore();
     }
 
     setupHistoryActions() {
@@ -169,6 +170,45 @@ class HistoryManager {
         }
     }
 
+    setupLoadMore() {
+        const loadMoreBtn = document.getElementById('history-load-more');
+        if (loadMoreBtn) {
+            loadMoreBtn.addEventListener('click', () => this.loadMore());
+        }
+    }
+
+    async loadMore() {
+        const loadMoreBtn = document.getElementById('history-load-more');
+        const cursor = loadMoreBtn?.dataset.cursor;
+        if (!cursor) return;
+
+        const originalText = loadMoreBtn.innerHTML;
+        loadMoreBtn.disabled = true;
+        loadMoreBtn.innerHTML = '<i class="fas fa-spinner fa-spin mr-2"></i>Carregando...';
+
+        try {
+            const response = await fetch(`/admin/history/page?${new URLSearchParams({ cursor })}`);
+            const data = await response.json();
+
+            if (data.success) {
+                if (data.count) {
+                    document.getElementById('history-table-body').insertAdjacentHTML('beforeend', data.html);
+                }
+                loadMoreBtn.dataset.cursor = data.next_cursor || '';
+                loadMoreBtn.classList.toggle('hidden', !data.next_cursor);
+                // Aplica os filtros atuais também às linhas novas
+                this.filterHistory();
+            } else {
+                this.dashboard.showNotification(data.error || 'Erro ao carregar histórico', 'error');
+            }
+        } catch (error) {
+            this.dashboard.showNotification('Erro ao carregar histórico', 'error');
+        } finally {
+            loadMoreBtn.disabled = false;
+            loadMoreBtn.innerHTML = originalText;
+        }
+    }
+
     filterHistory() {
         const statusFilter = document.getElementById('history-status-filter')?.value || '';
         const typeFilter = document.getElementById('history-type-filter')?.value || '';
@@ -1,13 +1,14 @@
 // Modal Manager
 class ModalManager {
     constructor() {
-        this.modals = {
-            response: document.getElementById('response-modal'),
-            metadata: document.getElementById('metadata-modal'),
-            player: document.getElementById('player-modal'),
-            newFolder: document.getElementById('new-folder-modal'),
-            batchDownload: document.getElementById('batch-download-modal'),
-            moveFile: document.getElementById('move-file-modal')
+        // Alguns modais fazem parte das seções carregadas sob demanda: busca pelo id quando usados
+        this.modalIds = {
+            response: 'response-modal',
+            metadata: 'metadata-modal',
+            player: 'player-modal',
+            newFolder: 'new-folder-modal',
+            batchDownload: 'batch-download-modal',
+            moveFile: 'move-file-modal'
         };
         this.init();
     }
@@ -19,23 +20,22 @@ class ModalManager {
         this.setupPlayerModals();
     }
 
+    getModal(modalName) {
+        return document.getElementById(this.modalIds[modalName]);
+    }
+
     setupModalHandlers() {
-        // Close modal handlers
-        document.querySelectorAll('.close-modal-btn').forEach(btn => {
-            btn.addEventListener('click', (e) => {
+        document.addEventListener('click', (e) => {
+            // Close modal handlers
+            if (e.target.closest('.close-modal-btn')) {
                 e.preventDefault();
                 this.closeAllModals();
-            });
-        });
+                return;
+            }
 
-        // Close on outside click
-        Object.values(this.modals).forEach(modal => {
-            if (modal) {
-                modal.addEventListener('click', (e) => {
-                    if (e.target === modal) {
-                        this.closeAllModals();
-                    }
-                });
+            // Close on outside click
+            if (e.target.classList.contains('modal')) {
+                this.closeAllModals();
             }
         });
 
@@ -47,46 +47,51 @@ class ModalManager {
         });
     }
 
+    // Os botões são ligados uma única vez, mesmo que a função seja chamada de novo após recarregar uma lista
+    bindOnce(selector, handler) {
+        document.querySelectorAll(selector).forEach(button => {
+            if (button.dataset.modalBound) return;
+            button.dataset.modalBound = 'true';
+            button.addEventListener('click', () => handler(button));
+        });
+    }
+
     setupResponseModals() {
-        document.querySelectorAll('.view-response-btn').forEach(button => {
-            button.addEventListener('click', () => {
-                const responseData = JSON.parse(button.dataset.response);
-                document.getElementById('modal-json-content').textContent = JSON.stringify(responseData, null, 2);
-                this.showModal('response');
-            });
+        this.bindOnce('.view-response-btn', (button) => {
+            const responseData = JSON.parse(button.dataset.response);
+            document.getElementById('modal-json-content').textContent = JSON.stringify(responseData, null, 2);
+            this.showModal('response');
         });
     }
 
     setupMetadataModals() {
-        document.querySelectorAll('.view-metadata-btn').forEach(button => {
-            button.addEventListener('click', () => {
-                const metadata = JSON.parse(button.dataset.metadata);
-                this.renderMetadataModal(metadata);
-                this.showModal('metadata');
-            });
+        this.bindOnce('.view-metadata-btn', (button) => {
+            const metadata = JSON.parse(button.dataset.metadata);
+            this.renderMetadataModal(metadata);
+            this.showModal('metadata');
         });
     }
 
     setupPlayerModals() {
-        document.querySelectorAll('.play-media-btn').forEach(button => {
-            button.addEventListener('click', () => {
-                const { filename, type, title } = button.dataset;
-                this.renderPlayerModal(filename, type, title);
-                this.showModal('player');
-            });
+        this.bindOnce('.play-media-btn', (button) => {
+            const { filename, type, title } = button.dataset;
+            this.renderPlayerModal(filename, type, title);
+            this.showModal('player');
         });
     }
 
     showModal(modalName) {
         this.closeAllModals();
-        if (this.modals[modalName]) {
-            this.modals[modalName].classList.add('active');
+        const modal = this.getModal(modalName);
+        if (modal) {
+            modal.classList.add('active');
             document.body.style.overflow = 'hidden';
         }
     }
 
     closeAllModals() {
-        Object.values(this.modals).forEach(modal => {
+        Object.keys(this.modalIds).forEach(modalName => {
+            const modal = this.getModal(modalName);
             if (modal) {
                 modal.classList.remove('active');
             }
@@ -3,6 +3,12 @@ class ProgressTracker {
     constructor(dashboard) {
         this.dashboard = dashboard;
         this.activeTrackers = new Map();
+        this.resultCursors = new Map();
+        // Busca de resultados em andamento por tarefa (evita duas leituras do mesmo cursor)
+        this.resultFetches = new Map();
+        // Uma única conexão por tarefa, compartilhada por todos que a acompanham
+        this.watchers = new Map();
+        this.cardUnwatchers = new Map();
         this.init();
     }
 
@@ -28,8 +34,8 @@ class ProgressTracker {
         const tracker = this.createProgressCard(taskId, taskType, initialData);
         this.activeTrackers.set(taskId, tracker);
         
-        // Start polling for updates
-        this.pollTaskStatus(taskId);
+        // Recebe as atualizações pelo stream de eventos da tarefa
+        this.cardUnwatchers.set(taskId, this.watch(taskId, (data) => this.handleTaskUpdate(taskId, data)));
     }
 
     createProgressCard(taskId, taskType, initialData) {
@@ -110,38 +116,88 @@ class ProgressTracker {
         return card;
     }
 
-    async pollTaskStatus(taskId) {
-        const pollInterval = setInterval(async () => {
-            if (!this.activeTrackers.has(taskId)) {
-                clearInterval(pollInterval);
-                return;
+    watch(taskId, listener) {
+        let watcher = this.watchers.get(taskId);
+        if (!watcher) {
+            watcher = { listeners: new Set(), close: () => {} };
+            this.watchers.set(taskId, watcher);
+            watcher.close = window.EventSource
+                ? this.openEventStream(taskId, watcher)
+                : this.pollTaskStatus(taskId, watcher);
+        }
+        watcher.listeners.add(listener);
+        return () => this.unwatch(taskId, watcher, listener);
+    }
+
+    unwatch(taskId, watcher, listener) {
+        watcher.listeners.delete(listener);
+        if (watcher.listeners.size === 0) {
+            this.closeWatcher(taskId, watcher);
+        }
+    }
+
+    closeWatcher(taskId, watcher) {
+        watcher.close();
+        if (this.watchers.get(taskId) === watcher) {
+            this.watchers.delete(taskId);
+        }
+    }
+
+    dispatch(taskId, watcher, data) {
+        watcher.listeners.forEach(listener => listener(data));
+        
+        if (['SUCCESS', 'FAILURE', 'REVOKED', 'ERROR'].includes(data.state)) {
+            this.closeWatcher(taskId, watcher);
+        }
+    }
+
+    openEventStream(taskId, watcher) {
+        const source = new EventSource(`/admin/tasks/${taskId}/events`);
+        
+        source.onmessage = (event) => {
+            this.dispatch(taskId, watcher, JSON.parse(event.data));
+        };
+        
+        // Quedas de conexão são reconectadas pelo próprio EventSource; se o stream
+        // for recusado de vez, volta para a consulta periódica
+        source.onerror = () => {
+            if (source.readyState === EventSource.CLOSED && this.watchers.get(taskId) === watcher) {
+                watcher.close = this.pollTaskStatus(taskId, watcher);
             }
+        };
+        
+        return () => source.close();
+    }
 
+    pollTaskStatus(taskId, watcher) {
+        const pollInterval = setInterval(async () => {
             try {
                 const response = await fetch(`/admin/tasks/${taskId}/status`);
                 const data = await response.json();
                 
-                this.updateProgressCard(taskId, data);
-                
-                if (data.state === 'SUCCESS' || data.state === 'FAILURE') {
-                    clearInterval(pollInterval);
-                    
-                    // Auto-remove after 15 seconds if successful
-                    if (data.state === 'SUCCESS') {
-                        setTimeout(() => {
-                            this.stopTracking(taskId);
-                            // Refresh files section if visible
-                            if (window.location.hash === '#files') {
-                                this.dashboard.fileManager.filterFiles();
-                            }
-                        }, 15000);
-                    }
-                }
+                this.dispatch(taskId, watcher, data);
             } catch (error) {
                 console.error(`Erro ao obter status da tarefa ${taskId}:`, error);
                 this.addLogToCard(taskId, `❌ Erro de rede: ${error.message}`, 'error');
             }
         }, 2000); // Poll every 2 seconds
+        
+        return () => clearInterval(pollInterval);
+    }
+
+    handleTaskUpdate(taskId, data) {
+        this.updateProgressCard(taskId, data);
+        
+        // Auto-remove after 15 seconds if successful
+        if (data.state === 'SUCCESS') {
+            setTimeout(() => {
+                this.stopTracking(taskId);
+                // Refresh files section if visible
+                if (window.location.hash === '#files') {
+                    this.dashboard.fileManager?.filterFiles();
+                }
+            }, 15000);
+        }
     }
 
     updateProgressCard(taskId, data) {
@@ -165,8 +221,9 @@ class ProgressTracker {
         if (data.stage === 'batch_processing') {
             detailsText.textContent = `${data.completed || 0}/${data.total_urls || 0} URLs`;
             
-            if (data.current_url) {
-                this.addLogToCard(taskId, `🔗 Processando: ${data.current_url}`, 'info');
+            // Busca apenas os resultados novos desde o último cursor
+            if ((data.completed || 0) + (data.failed || 0) > (this.resultCursors.get(taskId) || 0)) {
+                this.tailBatchResults(taskId);
             }
         } else if (data.stage === 'downloading' && data.total_videos) {
             detailsText.textContent = `${data.completed_videos || 0}/${data.total_videos} vídeos`;
@@ -196,6 +253,7 @@ class ProgressTracker {
                 if (data.result.playlist) {
                     this.addLogToCard(taskId, `📋 Playlist: ${data.result.videos?.length || 0} vídeos baixados`, 'success');
                 } else if (data.result.batch) {
+                    this.tailBatchResults(taskId);
                     this.addLogToCard(taskId, `📦 Lote: ${data.result.completed}/${data.result.total_urls} sucessos`, 'success');
                 } else if (data.result.download_url) {
                     this.addLogToCard(taskId, `📥 Arquivo disponível para download`, 'success');
@@ -210,6 +268,49 @@ class ProgressTracker {
         }
     }
 
+    tailBatchResults(taskId) {
+        const inFlight = this.resultFetches.get(taskId);
+        if (inFlight) {
+            // Novos resultados chegaram durante a busca: lê mais uma vez ao terminar
+            inFlight.again = true;
+            return inFlight.promise;
+        }
+        
+        const fetchState = { again: false };
+        fetchState.promise = (async () => {
+            try {
+                do {
+                    fetchState.again = false;
+                    await this.fetchBatchResults(taskId);
+                } while (fetchState.again);
+            } finally {
+                this.resultFetches.delete(taskId);
+            }
+        })();
+        this.resultFetches.set(taskId, fetchState);
+        return fetchState.promise;
+    }
+
+    async fetchBatchResults(taskId) {
+        const cursor = this.resultCursors.get(taskId) || 0;
+        try {
+            const response = await fetch(`/admin/tasks/${taskId}/results?cursor=${cursor}`);
+            const page = await response.json();
+            if (!page.success) return;
+            
+            page.results.forEach(item => {
+                if (item.status === 'success') {
+                    this.addLogToCard(taskId, `✅ ${item.title || item.url}`, 'success');
+                } else {
+                    this.addLogToCard(taskId, `⚠️ ${item.url}: ${item.error || 'Falha'}`, 'warning');
+                }
+            });
+            this.resultCursors.set(taskId, page.next_cursor);
+        } catch (error) {
+            console.error(`Erro ao obter resultados da tarefa ${taskId}:`, error);
+        }
+    }
+
     addLogToCard(taskId, message, type = 'info') {
         const card = this.activeTrackers.get(taskId);
         if (!card) return;
@@ -217,6 +318,10 @@ class ProgressTracker {
         const logsDiv = card.querySelector('.task-logs');
         const timestamp = new Date().toLocaleTimeString();
         
+        // Eventos chegam a cada avanço do download: não repete a mesma linha
+        if (logsDiv.dataset.lastLog === message) return;
+        logsDiv.dataset.lastLog = message;
+        
         // Remove placeholder if exists
         const placeholder = logsDiv.querySelector('.text-center');
         if (placeholder) placeholder.remove();
@@ -243,6 +348,12 @@ class ProgressTracker {
     }
 
     stopTracking(taskId) {
+        const unwatch = this.cardUnwatchers.get(taskId);
+        if (unwatch) {
+            unwatch();
+            this.cardUnwatchers.delete(taskId);
+        }
+        
         const card = this.activeTrackers.get(taskId);
         if (card) {
             card.style.transition = 'all 0.3s ease';
@@ -251,6 +362,7 @@ class ProgressTracker {
             setTimeout(() => {
                 card.remove();
                 this.activeTrackers.delete(taskId);
+                this.resultCursors.delete(taskId);
             }, 300);
         }
     }
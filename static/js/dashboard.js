@@ -5,27 +5,23 @@ class Dashboard {
     }
 
     init() {
-        this.setupNavigation();
+        this.sectionLoads = new Map();
         this.autoHideFlashMessages();
         this.initializeTooltips();
-        this.initializeCharts();
         
-        // Initialize component managers
+        // Componentes que não dependem das seções
         this.modalManager = new ModalManager();
         this.progressTracker = new ProgressTracker(this);
-        this.fileManager = new FileManager(this);
-        this.folderManager = new FolderManager(this);
-        this.batchManager = new BatchManager(this);
-        this.apiTester = new ApiTester(this);
-        this.historyManager = new HistoryManager(this);
-        this.settingsManager = new SettingsManager(this);
+        
+        // As demais seções são carregadas (e seus componentes iniciados) ao serem abertas
+        this.setupNavigation();
     }
 
     setupNavigation() {
-        const sections = document.querySelectorAll('.content-section');
         const navLinks = document.querySelectorAll('#sidebar-nav a');
 
         const showSection = (hash) => {
+            const sections = document.querySelectorAll('.content-section');
             sections.forEach(section => section.classList.remove('active'));
             navLinks.forEach(link => link.classList.remove('active'));
             
@@ -34,6 +30,8 @@ class Dashboard {
             
             if (targetSection) targetSection.classList.add('active');
             if (targetLink) targetLink.classList.add('active');
+            
+            this.loadSection(hash.slice(1));
         };
 
         navLinks.forEach(link => {
@@ -49,6 +47,79 @@ class Dashboard {
         showSection(initialHash);
     }
 
+    loadSection(name) {
+        if (this.sectionLoads.has(name)) return this.sectionLoads.get(name);
+        
+        const placeholder = document.querySelector(`[data-lazy-section="${name}"]`);
+        if (!placeholder) return Promise.resolve();
+        
+        const load = (async () => {
+            try {
+                const response = await fetch(`/admin/sections/${name}`);
+                const data = await response.json();
+                if (!data.success) throw new Error(data.error || 'Erro desconhecido');
+                
+                const template = document.createElement('template');
+                template.innerHTML = data.html;
+                const nodes = Array.from(template.content.childNodes);
+                const wasActive = placeholder.classList.contains('active');
+                placeholder.replaceWith(...nodes);
+                
+                // Scripts inseridos via innerHTML não são executados: recria cada um
+                nodes.forEach(node => {
+                    if (node.nodeType !== Node.ELEMENT_NODE) return;
+                    const scripts = node.tagName === 'SCRIPT' ? [node] : node.querySelectorAll('script');
+                    scripts.forEach(oldScript => {
+                        const script = document.createElement('script');
+                        script.textContent = oldScript.textContent;
+                        oldScript.replaceWith(script);
+                    });
+                });
+                
+                if (wasActive) document.getElementById(name)?.classList.add('active');
+                this.initializeSection(name, data.data || {});
+            } catch (error) {
+                console.error(`Erro ao carregar seção ${name}:`, error);
+                this.sectionLoads.delete(name);
+                placeholder.innerHTML = `
+                    <div class="flex items-center justify-center py-20 text-red-400">
+                        <i class="fas fa-exclamation-triangle mr-3"></i>Erro ao carregar seção. Tente novamente.
+                    </div>
+                `;
+            }
+        })();
+        
+        this.sectionLoads.set(name, load);
+        return load;
+    }
+
+    initializeSection(name, data) {
+        switch (name) {
+            case 'overview':
+                window.dashboardData = data;
+                this.initializeCharts();
+                break;
+            case 'tester':
+                this.apiTester = new ApiTester(this);
+                this.batchManager = new BatchManager(this);
+                break;
+            case 'history':
+                this.historyManager = new HistoryManager(this);
+                this.modalManager.setupResponseModals();
+                break;
+            case 'files':
+                this.fileManager = new FileManager(this);
+                this.folderManager = new FolderManager(this);
+                this.modalManager.setupMetadataModals();
+                this.modalManager.setupPlayerModals();
+                break;
+            case 'settings':
+                this.settingsManager = new SettingsManager(this);
+                break;
+        }
+        this.initializeTooltips();
+    }
+
     initializeCharts() {
         // Requests Timeline Chart
         const requestsCtx = document.getElementById('requestsChart');
@@ -5,6 +5,10 @@ import time
 from yt_dlp import YoutubeDL
 from config import Config
 from services.database_service import DatabaseService
+from services.batch_results_service import BatchResultsService
+from utils.media_keys import build_media_key
+from .download_utils import create_staging_dir, finalize_download, remove_staging_dir
+from .progress_reporter import ProgressReporter, describe_progress
 
 logger = logging.getLogger(__name__)
 
@@ -14,137 +18,155 @@ class BatchProcessor:
         self.cookies_path = cookies_path
         self.task_id = task_self.request.id
 
-    def process(self, urls, media_type, quality, bitrate, folder_id, batch_name=None):
-        """Processa download em lote de múltiplas URLs"""
-        start_time = time.time()
+    def start(self, urls, media_type, quality, bitrate, folder_id, batch_name=None, batch_id=None):
+        """Registra o lote e publica o status inicial antes de distribuir as URLs"""
+        batch_info = f" '{batch_name}'" if batch_name else ""
+        total_urls = len(urls)
+        logger.info(f"[{self.task_id}] Iniciando batch download{batch_info} com {total_urls} URLs")
+        
+        if batch_id is None:
+            batch = DatabaseService.create_batch_download(
+                batch_name or f"Lote {self.task_id[:8]}",
+                urls,
+                media_type,
+                quality=quality,
+                bitrate=bitrate,
+                folder_id=folder_id,
+                status='processing'
+            )
+            batch_id = batch.id
+        
+        # Status inicial
+        self.task_self.update_state(
+            state='PROGRESS',
+            meta={
+                'stage': 'batch_processing',
+                'message': f'Iniciando download{batch_info} de {total_urls} URLs...',
+                'progress': 0,
+                'total_urls': total_urls,
+                'completed': 0,
+                'failed': 0,
+                'current_url': '',
+                'type': 'batch',
+                'batch_id': batch_id,
+                'batch_name': batch_name
+            }
+        )
+        
+        return batch_id
+
+    def process_item(self, batch_task_id, batch_id, index, url, media_type, quality, bitrate, folder_id):
+        """Processa uma URL do lote (executado como subtarefa independente)"""
+        logger.info(f"[{batch_task_id}] Processando URL {index+1} do lote {batch_id}: {url}")
         
         try:
-            batch_info = f" '{batch_name}'" if batch_name else ""
-            logger.info(f"[{self.task_id}] Iniciando batch download{batch_info} com {len(urls)} URLs")
+            single_result = self._process_single_video_for_batch(url, media_type, quality, bitrate, f"{index}_{uuid.uuid4().hex[:6]}")
             
-            total_urls = len(urls)
-            completed = 0
-            failed = 0
-            results = []
-            
-            # Status inicial
-            self.task_self.update_state(
-                state='PROGRESS',
-                meta={
-                    'stage': 'batch_processing',
-                    'message': f'Iniciando download{batch_info} de {total_urls} URLs...',
-                    'progress': 0,
-                    'total_urls': total_urls,
-                    'completed': 0,
-                    'failed': 0,
-                    'current_url': '',
-                    'results': [],
-                    'type': 'batch',
-                    'batch_name': batch_name
+            if single_result:
+                result = {
+                    'url': url,
+                    'status': 'success',
+                    'filename': single_result['filename'],
+                    'title': single_result['title'],
+                    'download_url': single_result['download_url']
                 }
-            )
-            
-            for i, url in enumerate(urls):
-                try:
-                    # Progresso baseado no índice atual
-                    progress = int((i / total_urls) * 100)
-                    
-                    logger.info(f"[{self.task_id}] Processando URL {i+1}/{total_urls}: {url}")
-                    
-                    # Atualiza status
-                    self.task_self.update_state(
-                        state='PROGRESS',
-                        meta={
-                            'stage': 'batch_processing',
-                            'message': f'Processando URL {i+1}/{total_urls}',
-                            'progress': progress,
-                            'total_urls': total_urls,
-                            'completed': completed,
-                            'failed': failed,
-                            'current_url': url,
-                            'current_index': i + 1,
-                            'results': results,
-                            'type': 'batch'
-                        }
-                    )
-                    
-                    # Processa URL individual
-                    single_result = self._process_single_video_for_batch(url, media_type, quality, bitrate, f"{i}_{uuid.uuid4().hex[:6]}")
-                    
-                    if single_result:
-                        completed += 1
-                        results.append({
-                            'url': url,
-                            'status': 'success',
-                            'filename': single_result['filename'],
-                            'title': single_result['title'],
-                            'download_url': single_result['download_url']
-                        })
-                        
-                        # Move para pasta se especificado
-                        if folder_id:
-                            DatabaseService.move_file_to_folder_by_filename(single_result['filename'], folder_id)
-                            
-                        logger.info(f"[{self.task_id}] URL {i+1} concluída com sucesso")
-                    else:
-                        failed += 1
-                        results.append({
-                            'url': url,
-                            'status': 'failed',
-                            'error': 'Falha no processamento'
-                        })
-                        logger.warning(f"[{self.task_id}] URL {i+1} falhou")
-                    
-                except Exception as e:
-                    failed += 1
-                    error_msg = str(e)
-                    logger.error(f"[{self.task_id}] Erro na URL {i+1} ({url}): {error_msg}")
-                    results.append({
-                        'url': url,
-                        'status': 'failed',
-                        'error': error_msg
-                    })
-            
-            processing_time = round(time.time() - start_time)
-            
-            # Status final
-            self.task_self.update_state(
-                state='SUCCESS',
-                meta={
-                    'stage': 'completed',
-                    'message': f'Batch concluído: {completed} sucessos, {failed} falhas',
-                    'progress': 100,
-                    'total_urls': total_urls,
-                    'completed': completed,
-                    'failed': failed,
-                    'results': results,
-                    'type': 'batch'
+                
+                # Move para pasta se especificado
+                if folder_id:
+                    DatabaseService.move_file_to_folder_by_filename(single_result['filename'], folder_id)
+                
+                logger.info(f"[{batch_task_id}] URL {index+1} concluída com sucesso")
+            else:
+                result = {
+                    'url': url,
+                    'status': 'failed',
+                    'error': 'Falha no processamento'
                 }
-            )
-            
-            return {
-                'batch': True,
-                'total_urls': total_urls,
-                'completed': completed,
-                'failed': failed,
-                'results': results,
-                'time_spend': f"{processing_time}s",
-                'success_rate': round((completed / total_urls) * 100, 1) if total_urls > 0 else 0
+                logger.warning(f"[{batch_task_id}] URL {index+1} falhou")
+        except Exception as e:
+            error_msg = str(e)
+            logger.error(f"[{batch_task_id}] Erro na URL {index+1} ({url}): {error_msg}")
+            result = {
+                'url': url,
+                'status': 'failed',
+                'error': error_msg
             }
-            
+        
+        # Resultado completo vai para o log do lote; o estado da tarefa leva só contadores
+        result['index'] = index + 1
+        BatchResultsService.append(batch_task_id, result)
+        
+        # Falhas aqui não podem derrubar a subtarefa: o chord inteiro falharia e o
+        # agregador não rodaria para as demais URLs
+        try:
+            # Contadores atômicos no banco: cada subtarefa pode rodar em um worker diferente
+            batch = DatabaseService.record_batch_item(batch_id, result['status'] == 'success')
+            if batch:
+                finished = batch.completed_files + batch.failed_files
+                self.task_self.update_state(
+                    task_id=batch_task_id,
+                    state='PROGRESS',
+                    meta={
+                        'stage': 'batch_processing',
+                        'message': f'Processadas {finished}/{batch.total_files} URLs',
+                        'progress': batch.progress,
+                        'total_urls': batch.total_files,
+                        'completed': batch.completed_files,
+                        'failed': batch.failed_files,
+                        'current_url': url,
+                        'current_index': index + 1,
+                        'latest_result': result,
+                        'type': 'batch',
+                        'batch_id': batch_id,
+                        'batch_name': batch.name
+                    }
+                )
         except Exception as e:
-            logger.error(f"[{self.task_id}] Erro no batch download: {e}")
-            raise
+            logger.error(f"[{batch_task_id}] Erro ao registrar o progresso da URL {index+1} do lote {batch_id}: {e}")
+        
+        # Apenas o necessário para o agregador contar sucessos e falhas
+        return {'index': index + 1, 'status': result['status']}
+
+    def finalize(self, results, batch_id, batch_name=None, start_time=None):
+        """Consolida os resultados das subtarefas e grava o resumo final do lote"""
+        total_urls = len(results)
+        completed = len([r for r in results if r.get('status') == 'success'])
+        failed = total_urls - completed
+        processing_time = round(time.time() - start_time) if start_time else 0
+        
+        DatabaseService.finish_batch_download(batch_id, 'completed' if completed > 0 or total_urls == 0 else 'failed')
+        logger.info(f"[{self.task_id}] Batch {batch_id} concluído: {completed} sucessos, {failed} falhas")
+        
+        return {
+            'batch': True,
+            'batch_id': batch_id,
+            'batch_name': batch_name,
+            'total_urls': total_urls,
+            'completed': completed,
+            'failed': failed,
+            'results_url': f"{Config.BASE_URL}/admin/tasks/{self.task_id}/results",
+            'time_spend': f"{processing_time}s",
+            'success_rate': round((completed / total_urls) * 100, 1) if total_urls > 0 else 0
+        }
+
+    def _report_item_progress(self, url, info):
+        """Publica o progresso real do download de uma URL do lote"""
+        self.task_self.update_state(
+            state='PROGRESS',
+            meta={
+                'message': describe_progress(info),
+                'progress': int(info.get('download_percent') or 0),
+                'current_url': url,
+                'type': 'batch_item',
+                **info
+            }
+        )
 
     def _process_single_video_for_batch(self, url, media_type, quality, bitrate, unique_suffix):
         """Processa um vídeo individual para batch download"""
+        # Pasta temporária exclusiva para evitar conflitos
+        staging_dir = create_staging_dir(f"batch_{self.task_id}_{unique_suffix}")
         try:
-            if not os.path.exists(Config.DOWNLOAD_FOLDER):
-                os.makedirs(Config.DOWNLOAD_FOLDER)
-
-            # Nome único para evitar conflitos
-            unique_filename = f"batch_{self.task_id}_{unique_suffix}"
-            
             # Configurações do yt-dlp
             ydl_opts = {
                 'noplaylist': True,
@@ -152,7 +174,7 @@ class BatchProcessor:
                 'writeinfojson': False,
                 'extract_flat': False,
                 'ignoreerrors': True,
-                'outtmpl': os.path.join(Config.DOWNLOAD_FOLDER, f"{unique_filename}.%(ext)s")
+                'outtmpl': os.path.join(staging_dir, "media.%(ext)s")
             }
             
             # Adiciona cookies se disponível
@@ -176,30 +198,22 @@ class BatchProcessor:
                 }]
                 expected_extension = '.mp4'
 
+            # Progresso do download fica no estado da própria subtarefa
+            ProgressReporter(lambda info: self._report_item_progress(url, info)).attach(ydl_opts)
+
             # Download
             with YoutubeDL(ydl_opts) as ydl:
                 info_dict = ydl.extract_info(url, download=True)
 
-            # Encontra arquivo baixado
-            found_file = None
-            for filename in os.listdir(Config.DOWNLOAD_FOLDER):
-                if filename.startswith(unique_filename) and not filename.endswith('.json'):
-                    found_file = os.path.join(Config.DOWNLOAD_FOLDER, filename)
-                    break
-
-            if not found_file or not os.path.exists(found_file):
-                raise FileNotFoundError(f"Arquivo não encontrado após download: {unique_filename}")
-
-            # Nome final único
-            final_filename = f"{uuid.uuid4().hex}{expected_extension}"
-            final_path = os.path.join(Config.DOWNLOAD_FOLDER, final_filename)
-            
-            # Renomeia para nome final
-            os.rename(found_file, final_path)
+            # Caminho final informado pelo yt-dlp, movido atomicamente para a biblioteca
+            final_filename, final_path = finalize_download(info_dict, expected_extension)
             
             # Salva no banco
-            file_size_mb = round(os.path.getsize(final_path) / (1024 * 1024), 2)
-            DatabaseService.save_media_file(final_filename, info_dict, media_type, file_size_mb)
+            file_stat = os.stat(final_path)
+            file_size_mb = round(file_stat.st_size / (1024 * 1024), 2)
+            cache_key = build_media_key(url, media_type, quality, bitrate)
+            DatabaseService.save_media_file(final_filename, info_dict, media_type, file_size_mb, cache_key,
+                                            size_bytes=file_stat.st_size, file_mtime=file_stat.st_mtime)
             
             return {
                 'filename': final_filename,
@@ -209,4 +223,6 @@ class BatchProcessor:
             
         except Exception as e:
             logger.error(f"Erro ao processar vídeo individual para batch: {e}")
-            return None
\ No newline at end of file
+            return None
+        finally:
+            remove_staging_dir(staging_dir)
\ No newline at end of file
@@ -0,0 +1,43 @@
+import os
+import uuid
+import shutil
+import tempfile
+from config import Config
+
+STAGING_FOLDER = Config.STAGING_FOLDER
+
+def create_staging_dir(prefix: str) -> str:
+    """Cria uma pasta temporária exclusiva para um download.
+
+    Fica dentro de DOWNLOAD_FOLDER para que a movimentação final seja um rename atômico.
+    """
+    os.makedirs(STAGING_FOLDER, exist_ok=True)
+    return tempfile.mkdtemp(prefix=f"{prefix}_", dir=STAGING_FOLDER)
+
+def get_downloaded_filepath(info_dict) -> str:
+    """Retorna o caminho do arquivo final informado pelo yt-dlp (após os pós-processadores)"""
+    if not info_dict:
+        raise FileNotFoundError("yt-dlp não retornou informações do download")
+
+    for download in info_dict.get('requested_downloads') or []:
+        filepath = download.get('filepath')
+        if filepath and os.path.isfile(filepath):
+            return filepath
+
+    filepath = info_dict.get('filepath')
+    if filepath and os.path.isfile(filepath):
+        return filepath
+
+    raise FileNotFoundError(f"Arquivo processado não encontrado: {info_dict.get('id', 'N/A')}")
+
+def finalize_download(info_dict, expected_extension: str):
+    """Move o arquivo baixado para DOWNLOAD_FOLDER com um nome único e retorna (nome, caminho)"""
+    found_file = get_downloaded_filepath(info_dict)
+    final_filename = f"{uuid.uuid4().hex}{expected_extension}"
+    final_path = os.path.join(Config.DOWNLOAD_FOLDER, final_filename)
+    os.replace(found_file, final_path)
+    return final_filename, final_path
+
+def remove_staging_dir(staging_dir: str) -> None:
+    """Remove a pasta temporária e eventuais arquivos intermediários"""
+    shutil.rmtree(staging_dir, ignore_errors=True)
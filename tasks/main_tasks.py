@@ -3,31 +3,83 @@ import uuid
 import logging
 import time
 from datetime import datetime
-from celery import Celery
+from celery import Celery, Task, chord, group
+from celery.signals import task_success, task_failure, task_revoked, task_prerun, task_postrun, worker_process_init
 from config import Config
+from database import configure_engine, begin_unit_of_work, end_unit_of_work
 from services.database_service import DatabaseService
+from services.inflight_service import InflightService
+from services.cookie_service import CookieService
+from services.task_state_service import TaskStateService
+from services.request_history_service import RequestHistoryService
+from services.task_event_service import TaskEventService, READY_STATES
+from services.file_inventory_service import FileInventoryService
+from utils.media_keys import build_media_key
 from .playlist_processor import PlaylistProcessor
 from .single_video_processor import SingleVideoProcessor
 from .batch_processor import BatchProcessor
 
 logger = logging.getLogger(__name__)
-celery = Celery(__name__, broker=Config.REDIS_URL, backend=Config.REDIS_URL)
+
+class EventTask(Task):
+    """Tarefa que também publica cada atualização de progresso em Redis pub/sub.
+
+    Os streams de eventos (SSE) recebem o progresso sem consultar o backend. Estados
+    finais não são publicados aqui: os sinais de término avisam só depois que o
+    resultado foi gravado.
+    """
+
+    def update_state(self, task_id=None, state=None, meta=None, **kwargs):
+        super().update_state(task_id=task_id, state=state, meta=meta, **kwargs)
+        if state not in READY_STATES:
+            fields = {k: v for k, v in (meta or {}).items() if k not in ('task_id', 'state')}
+            TaskEventService.publish(task_id or self.request.id, state, **fields)
+
+class MediaTask(EventTask):
+    """process_media: cada atualização de progresso também renova o registro de download
+    em andamento (InflightService), que expira pouco depois se o worker morrer"""
+
+    def update_state(self, task_id=None, state=None, meta=None, **kwargs):
+        super().update_state(task_id=task_id, state=state, meta=meta, **kwargs)
+        if state not in READY_STATES and self.request.args:
+            InflightService.renew(build_media_key(*self.request.args), task_id or self.request.id)
+
+celery = Celery(__name__, broker=Config.REDIS_URL, backend=Config.REDIS_URL, task_cls=EventTask)
+
+# Tarefas periódicas (executadas pelo celery beat)
+celery.conf.beat_schedule = {
+    'scan-file-inventory': {
+        'task': 'tasks.main_tasks.scan_file_inventory',
+        'schedule': Config.INVENTORY_SCAN_INTERVAL,
+    },
+}
+
+@worker_process_init.connect
+def configure_worker_database(**kwargs):
+    # Cada processo filho usa seu próprio pool, com as configurações de worker
+    configure_engine('worker')
+
+# Sessão compartilhada por tarefa; a conexão volta ao pool entre os acessos porque
+# as tarefas passam a maior parte do tempo baixando arquivos
+_task_units = {}
+
+@task_prerun.connect
+def begin_task_db_session(task_id=None, **kwargs):
+    _task_units[task_id] = begin_unit_of_work(hold_connection=False)
+
+@task_postrun.connect
+def end_task_db_session(task_id=None, **kwargs):
+    end_unit_of_work(_task_units.pop(task_id, None))
 
 def ensure_cookies_available():
+    """Retorna a cópia local dos cookies deste worker, atualizada só quando a versão muda"""
     try:
-        cookie_file = DatabaseService.get_cookie_file()
-        if cookie_file:
-            cookies_path = os.path.join(os.getcwd(), 'cookies.txt')
-            with open(cookies_path, 'wb') as f:
-                f.write(cookie_file.content)
-            logger.info(f"Arquivo de cookies disponibilizado para yt-dlp: {cookies_path}")
-            return cookies_path
-        return None
+        return CookieService.get_cookies_path()
     except Exception as e:
         logger.error(f"Erro ao preparar arquivo de cookies: {e}")
         return None
 
-@celery.task(bind=True)
+@celery.task(bind=True, base=MediaTask)
 def process_media(self, url, media_type, quality=None, bitrate=None):
     start_time = time.time()
     task_id = self.request.id
@@ -74,9 +126,96 @@ def process_media(self, url, media_type, quality=None, bitrate=None):
             }
         )
         raise
+    finally:
+        # Novas requisições idênticas passam a usar o cache de mídia
+        InflightService.release(build_media_key(url, media_type, quality, bitrate), task_id)
+
+@celery.task(bind=True)
+def process_batch_download(self, urls, media_type, quality=None, bitrate=None, folder_id=None, batch_name=None, task_id=None, batch_id=None):
+    """Distribui o download em lote em uma subtarefa por URL"""
+    processor = BatchProcessor(self, None)
+    batch_id = processor.start(urls, media_type, quality, bitrate, folder_id, batch_name, batch_id)
+    
+    items = group(
+        process_batch_item.s(self.request.id, batch_id, i, url, media_type, quality, bitrate, folder_id)
+        for i, url in enumerate(urls)
+    )
+    # O agregador herda o ID desta tarefa, então o acompanhamento continua no mesmo task_id
+    finalize = finalize_batch_download.s(batch_id, batch_name, time.time()).on_error(fail_batch_download.s(batch_id))
+    return self.replace(chord(items, finalize))
 
 @celery.task(bind=True)
-def process_batch_download(self, urls, media_type, quality=None, bitrate=None, folder_id=None, batch_name=None, task_id=None):
-    """Processa download em lote de múltiplas URLs"""
+def process_batch_item(self, batch_task_id, batch_id, index, url, media_type, quality=None, bitrate=None, folder_id=None):
+    """Processa uma única URL de um download em lote"""
     processor = BatchProcessor(self, ensure_cookies_available())
-    return processor.process(urls, media_type, quality, bitrate, folder_id, batch_name)
\ No newline at end of file
+    return processor.process_item(batch_task_id, batch_id, index, url, media_type, quality, bitrate, folder_id)
+
+@celery.task(bind=True)
+def finalize_batch_download(self, results, batch_id, batch_name=None, start_time=None):
+    """Agrega os resultados das subtarefas de um download em lote"""
+    processor = BatchProcessor(self, None)
+    return processor.finalize(results, batch_id, batch_name, start_time)
+
+@celery.task
+def fail_batch_download(request, exc, traceback, batch_id):
+    """Marca o lote como falho quando o chord falha e o agregador não roda"""
+    logger.error(f"[{request.id}] Download em lote {batch_id} interrompido: {exc}")
+    DatabaseService.finish_batch_download(batch_id, 'failed')
+
+# Avisa quem aguarda a tarefa (TaskEventService) logo após o resultado ser gravado
+@task_success.connect
+def publish_task_success(sender=None, **kwargs):
+    if sender is not None:
+        TaskEventService.publish(sender.request.id, 'SUCCESS')
+
+@task_failure.connect
+def publish_task_failure(sender=None, task_id=None, **kwargs):
+    if task_id:
+        TaskEventService.publish(task_id, 'FAILURE')
+
+@task_revoked.connect
+def publish_task_revoked(request=None, **kwargs):
+    if request is not None:
+        TaskEventService.publish(request.id, 'REVOKED')
+
+# Atualização do histórico de requisições assim que a tarefa termina
+def record_task_outcome(task_id, meta, retry=True):
+    """Grava o resultado da tarefa nas requisições do histórico que aguardavam por ela"""
+    outcome = TaskStateService.get_outcome(meta)
+    if not outcome:
+        return
+    try:
+        # Só requisições respondidas com 202 ficam aguardando o resultado no histórico
+        if not RequestHistoryService.is_pending(task_id):
+            return
+        if DatabaseService.finish_request_history_for_task(task_id, outcome) == 0 and retry:
+            # A linha do histórico pode ainda estar na fila de gravação da API
+            sync_request_history.apply_async((task_id,), countdown=Config.HISTORY_FLUSH_INTERVAL + 5)
+        else:
+            RequestHistoryService.clear_pending(task_id)
+    except Exception as e:
+        logger.error(f"[{task_id}] Erro ao atualizar histórico da requisição: {e}")
+
+@task_success.connect
+def on_task_success(sender=None, result=None, **kwargs):
+    if sender is not None and sender.name in (process_media.name, finalize_batch_download.name):
+        record_task_outcome(sender.request.id, {'status': 'SUCCESS', 'result': result},
+                            retry=sender.name == process_media.name)
+
+@task_failure.connect
+def on_task_failure(sender=None, task_id=None, exception=None, **kwargs):
+    if sender is not None and sender.name in (process_media.name, finalize_batch_download.name):
+        record_task_outcome(task_id, {'status': 'FAILURE', 'result': exception},
+                            retry=sender.name == process_media.name)
+
+@celery.task(ignore_result=True)
+def sync_request_history(task_id):
+    """Nova tentativa de gravar o resultado de uma tarefa no histórico"""
+    meta = TaskStateService.get_states([task_id]).get(task_id)
+    if meta:
+        record_task_outcome(task_id, meta, retry=False)
+
+@celery.task(ignore_result=True)
+def scan_file_inventory():
+    """Reconcilia o inventário de arquivos com a pasta de downloads"""
+    return FileInventoryService.scan()
@@ -1,11 +1,15 @@
 import os
-import uuid
 import logging
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from yt_dlp import YoutubeDL
 from config import Config
 from services.database_service import DatabaseService
+from utils.media_keys import build_media_key
+from .download_utils import create_staging_dir, finalize_download, remove_staging_dir
+from .progress_reporter import ProgressReporter, ProgressThrottle
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +18,13 @@ class PlaylistProcessor:
         self.task_self = task_self
         self.base_opts = base_opts
         self.task_id = task_self.request.id
+        # Estado compartilhado entre as threads de download
+        self.lock = threading.Lock()
+        self.throttle = ProgressThrottle()
+        self.active_downloads = {}
+        self.total_videos = 0
+        self.completed = 0
+        self.failed = 0
 
     def process(self, url, media_type, quality, bitrate):
         start_time = time.time()
@@ -64,52 +75,45 @@ class PlaylistProcessor:
             }
         )
         
-        results = []
-        completed = 0
-        failed = 0
+        self.total_videos = total_videos
+        results_by_index = {}
+        max_workers = max(1, min(Config.PLAYLIST_CONCURRENCY, total_videos))
         
-        for i, entry in enumerate(entries):
-            try:
-                # Calcula progresso (10% para extração + 90% para downloads)
-                download_progress = int(10 + (i / total_videos) * 90)
-                
+        logger.info(f"[{self.task_id}] Baixando até {max_workers} vídeos em paralelo")
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self._process_entry, entry, i, total_videos, media_type, quality, bitrate): (i, entry)
+                for i, entry in enumerate(entries)
+            }
+            
+            for future in as_completed(futures):
+                i, entry = futures[future]
                 video_title = entry.get('title', f'Vídeo {i+1}')
-                logger.info(f"[{self.task_id}] Processando vídeo {i+1}/{total_videos}: {video_title}")
                 
-                # Atualiza status
-                self.task_self.update_state(
-                    state='PROGRESS',
-                    meta={
-                        'stage': 'downloading',
-                        'message': f'Baixando: {video_title}',
-                        'progress': download_progress,
-                        'total_videos': total_videos,
-                        'completed_videos': completed,
-                        'failed_videos': failed,
-                        'current_video': i + 1,
-                        'current_title': video_title,
-                        'type': 'playlist'
-                    }
-                )
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"[{self.task_id}] Erro ao processar vídeo {i+1}: {e}")
+                    result = None
                 
-                # URL do vídeo individual
-                video_url = entry.get('url') or f"https://www.youtube.com/watch?v={entry.get('id')}"
-                
-                # Processa vídeo individual
-                result = self._process_single_video(video_url, media_type, quality, bitrate, i)
+                with self.lock:
+                    self.active_downloads.pop(i, None)
+                    if result:
+                        self.completed += 1
+                        results_by_index[i] = result
+                    else:
+                        self.failed += 1
                 
                 if result:
-                    completed += 1
-                    results.append(result)
                     logger.info(f"[{self.task_id}] Vídeo {i+1} concluído: {result['filename']}")
                 else:
-                    failed += 1
                     logger.warning(f"[{self.task_id}] Vídeo {i+1} falhou: {video_title}")
                 
-            except Exception as e:
-                failed += 1
-                logger.error(f"[{self.task_id}] Erro ao processar vídeo {i+1}: {e}")
-                continue
+                self._publish_progress(video_title)
+        
+        # Mantém a ordem original da playlist
+        results = [results_by_index[i] for i in sorted(results_by_index)]
         
         if not results:
             raise Exception("Nenhum vídeo da playlist pôde ser processado")
@@ -121,11 +125,11 @@ class PlaylistProcessor:
             state='SUCCESS',
             meta={
                 'stage': 'completed',
-                'message': f'Playlist concluída: {completed} sucessos, {failed} falhas',
+                'message': f'Playlist concluída: {self.completed} sucessos, {self.failed} falhas',
                 'progress': 100,
                 'total_videos': total_videos,
-                'completed_videos': completed,
-                'failed_videos': failed,
+                'completed_videos': self.completed,
+                'failed_videos': self.failed,
                 'type': 'playlist'
             }
         )
@@ -148,15 +152,62 @@ class PlaylistProcessor:
             'upload_date': 'N/A'
         }
 
-    def _process_single_video(self, url, media_type, quality, bitrate, index):
+    def _process_entry(self, entry, index, total_videos, media_type, quality, bitrate):
+        """Baixa uma entrada da playlist (executado em paralelo)"""
+        video_title = entry.get('title', f'Vídeo {index+1}')
+        logger.info(f"[{self.task_id}] Processando vídeo {index+1}/{total_videos}: {video_title}")
+        
+        # URL do vídeo individual
+        video_url = entry.get('url') or f"https://www.youtube.com/watch?v={entry.get('id')}"
+        
+        # Todas as threads compartilham o mesmo limitador (frequência das atualizações do
+        # estado agregado), mas o avanço percentual é comparado só dentro de cada vídeo
+        reporter = ProgressReporter(
+            lambda info: self._report_entry_progress(index, video_title, info),
+            self.throttle,
+            key=index
+        )
+        return self._process_single_video(video_url, media_type, quality, bitrate, index, reporter)
+
+    def _report_entry_progress(self, index, video_title, info):
+        """Registra o progresso de um vídeo em andamento e publica o estado agregado"""
+        with self.lock:
+            self.active_downloads[index] = {'index': index + 1, 'title': video_title, **info}
+        self._publish_progress(video_title)
+
+    def _publish_progress(self, video_title):
+        """Publica contadores e progresso agregado (10% para extração + 90% para downloads)"""
+        with self.lock:
+            finished = self.completed + self.failed
+            partial = sum((d.get('download_percent') or 0) / 100 for d in self.active_downloads.values())
+            active = list(self.active_downloads.values())
+            completed, failed = self.completed, self.failed
+        
+        total = self.total_videos or 1
+        self.task_self.update_state(
+            state='PROGRESS',
+            meta={
+                'stage': 'downloading',
+                'message': f'{finished}/{self.total_videos} vídeos processados',
+                'progress': int(10 + min(finished + partial, total) / total * 90),
+                'total_videos': self.total_videos,
+                'completed_videos': completed,
+                'failed_videos': failed,
+                'current_video': finished,
+                'current_title': video_title,
+                'active_downloads': active,
+                'type': 'playlist'
+            }
+        )
+
+    def _process_single_video(self, url, media_type, quality, bitrate, index, reporter=None):
         """Processa um vídeo individual da playlist"""
+        # Pasta temporária exclusiva deste vídeo
+        staging_dir = create_staging_dir(f"playlist_{self.task_id}_{index}")
         try:
-            # Nome único para evitar conflitos
-            unique_filename = f"playlist_{self.task_id}_{index}_{uuid.uuid4().hex[:6]}"
-            
             # Configurações do yt-dlp
             video_opts = self.base_opts.copy()
-            video_opts['outtmpl'] = os.path.join(Config.DOWNLOAD_FOLDER, f"{unique_filename}.%(ext)s")
+            video_opts['outtmpl'] = os.path.join(staging_dir, "media.%(ext)s")
 
             if media_type == 'audio':
                 video_opts['format'] = 'bestaudio/best'
@@ -175,33 +226,22 @@ class PlaylistProcessor:
                 }]
                 expected_extension = '.mp4'
 
+            if reporter:
+                reporter.attach(video_opts)
+
             # Download
             with YoutubeDL(video_opts) as ydl:
                 info_dict = ydl.extract_info(url, download=True)
 
-            # Encontra arquivo baixado
-            found_file = None
-            for filename in os.listdir(Config.DOWNLOAD_FOLDER):
-                if filename.startswith(unique_filename) and not filename.endswith('.json'):
-                    found_file = os.path.join(Config.DOWNLOAD_FOLDER, filename)
-                    break
-
-            if not found_file or not os.path.exists(found_file):
-                logger.error(f"[{self.task_id}] Arquivo não encontrado após download: {unique_filename}")
-                return None
-
-            # Nome final único
-            final_filename = f"{uuid.uuid4().hex}{expected_extension}"
-            final_path = os.path.join(Config.DOWNLOAD_FOLDER, final_filename)
-            
-            # Renomeia para nome final
-            # Aguarda um pouco para evitar conflitos de I/O
-            time.sleep(0.1)
-            os.rename(found_file, final_path)
+            # Caminho final informado pelo yt-dlp, movido atomicamente para a biblioteca
+            final_filename, final_path = finalize_download(info_dict, expected_extension)
             
             # Salva no banco
-            file_size_mb = round(os.path.getsize(final_path) / (1024 * 1024), 2)
-            DatabaseService.save_media_file(final_filename, info_dict, media_type, file_size_mb)
+            file_stat = os.stat(final_path)
+            file_size_mb = round(file_stat.st_size / (1024 * 1024), 2)
+            cache_key = build_media_key(url, media_type, quality, bitrate)
+            DatabaseService.save_media_file(final_filename, info_dict, media_type, file_size_mb, cache_key,
+                                            size_bytes=file_stat.st_size, file_mtime=file_stat.st_mtime)
             
             return {
                 'filename': final_filename,
@@ -213,4 +253,6 @@ class PlaylistProcessor:
             
         except Exception as e:
             logger.error(f"[{self.task_id}] Erro ao processar vídeo individual: {e}")
-            return None
\ No newline at end of file
+            return None
+        finally:
+            remove_staging_dir(staging_dir)
\ No newline at end of file
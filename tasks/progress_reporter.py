@@ -0,0 +1,104 @@
+import time
+import logging
+import threading
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class ProgressThrottle:
+    """Limita a frequência de atualizações de estado enviadas ao backend do Celery"""
+    # Mesmo sem avanço percentual, publica de tempos em tempos (velocidade/ETA)
+    HEARTBEAT_SECONDS = 5.0
+
+    def __init__(self, min_interval=None, min_step=None):
+        self.min_interval = Config.PROGRESS_MIN_INTERVAL if min_interval is None else min_interval
+        self.min_step = Config.PROGRESS_MIN_STEP if min_step is None else min_step
+        self._lock = threading.Lock()
+        self._last_time = 0.0
+        # Último percentual publicado por download (`key`): um mesmo limitador pode ser
+        # compartilhado por downloads paralelos, e o avanço só é comparado dentro de cada um
+        self._last_percent = {}
+
+    def ready(self, percent=None, force=False, key=None):
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._last_time
+            last_percent = self._last_percent.get(key)
+            if not force:
+                if elapsed < self.min_interval:
+                    return False
+                if (percent is not None and last_percent is not None
+                        and abs(percent - last_percent) < self.min_step
+                        and elapsed < self.HEARTBEAT_SECONDS):
+                    return False
+            self._last_time = now
+            if percent is not None:
+                self._last_percent[key] = percent
+            return True
+
+class ProgressReporter:
+    """Converte os progress_hooks/postprocessor_hooks do yt-dlp em atualizações de progresso"""
+
+    def __init__(self, on_update, throttle=None, key=None):
+        self.on_update = on_update
+        self.throttle = throttle or ProgressThrottle()
+        self.key = key
+
+    def attach(self, ydl_opts):
+        """Registra os hooks nas opções do yt-dlp"""
+        ydl_opts['progress_hooks'] = [self.progress_hook]
+        ydl_opts['postprocessor_hooks'] = [self.postprocessor_hook]
+        return ydl_opts
+
+    def progress_hook(self, d):
+        status = d.get('status')
+        downloaded = d.get('downloaded_bytes') or 0
+        total = d.get('total_bytes') or d.get('total_bytes_estimate')
+        percent = round(min(downloaded / total * 100, 100), 1) if total else None
+        if status == 'finished':
+            percent = 100.0
+
+        if not self.throttle.ready(percent, force=status != 'downloading', key=self.key):
+            return
+
+        self._emit({
+            'stage': 'downloading',
+            'download_status': status,
+            'downloaded_bytes': downloaded,
+            'total_bytes': total,
+            'download_percent': percent,
+            'speed': d.get('speed'),
+            'eta': d.get('eta'),
+        })
+
+    def postprocessor_hook(self, d):
+        status = d.get('status')
+        if not self.throttle.ready(force=status != 'processing', key=self.key):
+            return
+
+        self._emit({
+            'stage': 'processing',
+            'postprocessor': d.get('postprocessor'),
+            'postprocess_status': status,
+        })
+
+    def _emit(self, info):
+        # Falhas ao publicar progresso nunca devem interromper o download
+        try:
+            self.on_update(info)
+        except Exception as e:
+            logger.warning(f"Erro ao publicar progresso: {e}")
+
+def describe_progress(info):
+    """Monta uma mensagem legível a partir das informações de progresso"""
+    if info.get('stage') == 'processing':
+        return f"Processando arquivo ({info.get('postprocessor') or 'ffmpeg'})..."
+
+    parts = []
+    if info.get('download_percent') is not None:
+        parts.append(f"{info['download_percent']}%")
+    if info.get('speed'):
+        parts.append(f"{info['speed'] / (1024 * 1024):.1f} MiB/s")
+    if info.get('eta') is not None:
+        parts.append(f"ETA {info['eta']}s")
+    return f"Baixando... {' - '.join(parts)}" if parts else 'Baixando...'
@@ -1,11 +1,13 @@
 import os
-import uuid
 import logging
 import time
 from datetime import datetime
 from yt_dlp import YoutubeDL
 from config import Config
 from services.database_service import DatabaseService
+from utils.media_keys import build_media_key
+from .download_utils import create_staging_dir, finalize_download, remove_staging_dir
+from .progress_reporter import ProgressReporter, describe_progress
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +16,7 @@ class SingleVideoProcessor:
         self.task_self = task_self
         self.base_opts = base_opts
         self.task_id = task_self.request.id
+        self.progress = 10
 
     def process(self, url, media_type, quality, bitrate):
         start_time = time.time()
@@ -31,11 +34,11 @@ class SingleVideoProcessor:
             }
         )
         
-        # Nome único para o arquivo
-        unique_filename = f"single_{self.task_id}_{uuid.uuid4().hex[:8]}"
+        # Pasta temporária exclusiva desta tarefa
+        staging_dir = create_staging_dir(f"single_{self.task_id}")
         
         video_opts = self.base_opts.copy()
-        video_opts['outtmpl'] = os.path.join(Config.DOWNLOAD_FOLDER, f"{unique_filename}.%(ext)s")
+        video_opts['outtmpl'] = os.path.join(staging_dir, "media.%(ext)s")
 
         if media_type == 'audio':
             video_opts['format'] = 'bestaudio/best'
@@ -60,43 +63,39 @@ class SingleVideoProcessor:
             meta={
                 'stage': 'downloading',
                 'message': 'Baixando vídeo...',
-                'progress': 50,
+                'progress': 10,
                 'type': 'single'
             }
         )
 
-        with YoutubeDL(video_opts) as ydl:
-            info_dict = ydl.extract_info(url, download=True)
+        # Progresso real (bytes, velocidade, ETA) vindo dos hooks do yt-dlp
+        ProgressReporter(self._report_progress).attach(video_opts)
 
-        # Atualiza status
-        self.task_self.update_state(
-            state='PROGRESS',
-            meta={
-                'stage': 'processing',
-                'message': 'Processando arquivo...',
-                'progress': 80,
-                'type': 'single'
-            }
-        )
+        try:
+            with YoutubeDL(video_opts) as ydl:
+                info_dict = ydl.extract_info(url, download=True)
 
-        # Encontra e renomeia o arquivo baixado
-        final_filename = f"{uuid.uuid4().hex}{expected_extension}"
-        final_path = os.path.join(Config.DOWNLOAD_FOLDER, final_filename)
-        
-        # Procura pelo arquivo processado
-        found_file = None
-        for filename in os.listdir(Config.DOWNLOAD_FOLDER):
-            if filename.startswith(unique_filename) and not filename.endswith('.json'):
-                found_file = os.path.join(Config.DOWNLOAD_FOLDER, filename)
-                break
-        
-        if found_file and os.path.exists(found_file):
-            os.rename(found_file, final_path)
-        else:
-            raise FileNotFoundError(f"Arquivo processado não encontrado: {unique_filename}")
+            # Atualiza status
+            self.task_self.update_state(
+                state='PROGRESS',
+                meta={
+                    'stage': 'processing',
+                    'message': 'Processando arquivo...',
+                    'progress': 90,
+                    'type': 'single'
+                }
+            )
+
+            # Caminho final informado pelo yt-dlp, movido atomicamente para a biblioteca
+            final_filename, final_path = finalize_download(info_dict, expected_extension)
+        finally:
+            remove_staging_dir(staging_dir)
 
-        file_size_mb = round(os.path.getsize(final_path) / (1024 * 1024), 2)
-        DatabaseService.save_media_file(final_filename, info_dict, media_type, file_size_mb)
+        file_stat = os.stat(final_path)
+        file_size_mb = round(file_stat.st_size / (1024 * 1024), 2)
+        cache_key = build_media_key(url, media_type, quality, bitrate)
+        DatabaseService.save_media_file(final_filename, info_dict, media_type, file_size_mb, cache_key,
+                                        size_bytes=file_stat.st_size, file_mtime=file_stat.st_mtime)
 
         processing_time = round(time.time() - start_time)
         
@@ -132,4 +131,23 @@ class SingleVideoProcessor:
             'description': info_dict.get('description'),
             'upload_date': formatted_date,
             'time_spend': f"{processing_time}s",
-        }
\ No newline at end of file
+        }
+
+    def _report_progress(self, info):
+        """Publica o progresso do download (10-80%) e do pós-processamento"""
+        if info['stage'] == 'processing':
+            progress = 85
+        else:
+            progress = 10 + int((info.get('download_percent') or 0) * 0.7)
+        # Formatos separados (vídeo + áudio) reiniciam o percentual: mantém o progresso crescente
+        self.progress = max(self.progress, progress)
+
+        self.task_self.update_state(
+            state='PROGRESS',
+            meta={
+                'message': describe_progress(info),
+                'progress': self.progress,
+                'type': 'single',
+                **info
+            }
+        )
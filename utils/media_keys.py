@@ -0,0 +1,55 @@
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Parâmetros que não alteram o conteúdo baixado
+TRACKING_PARAMS = {'si', 'feature', 'pp', 'ab_channel', 'fbclid', 'gclid', 'igshid'}
+YOUTUBE_HOSTS = {'youtube.com', 'music.youtube.com', 'youtube-nocookie.com'}
+YOUTUBE_IGNORED_PARAMS = {'t', 'start', 'index'}
+
+def normalize_url(url: str) -> str:
+    """Normaliza uma URL para que variações equivalentes gerem a mesma chave"""
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or 'https').lower()
+    if scheme == 'http':
+        scheme = 'https'
+
+    host = parts.netloc.lower()
+    for prefix in ('www.', 'm.'):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+
+    path = parts.path.rstrip('/') or '/'
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and not key.startswith('utm_')
+    ]
+
+    # Formas curtas do YouTube apontam para o mesmo vídeo de /watch?v=
+    video_id = None
+    if host == 'youtu.be':
+        video_id = path.strip('/')
+    elif host in YOUTUBE_HOSTS:
+        segments = path.strip('/').split('/')
+        if len(segments) == 2 and segments[0] in ('shorts', 'live', 'embed', 'v'):
+            video_id = segments[1]
+
+    if video_id:
+        host = 'youtube.com'
+        path = '/watch'
+        query = [('v', video_id)] + [(k, v) for k, v in query if k != 'v']
+
+    if host in YOUTUBE_HOSTS:
+        query = [(k, v) for k, v in query if k not in YOUTUBE_IGNORED_PARAMS]
+
+    return urlunsplit((scheme, host, path, urlencode(sorted(query)), ''))
+
+def build_media_key(url: str, media_type: str, quality: str = None, bitrate: str = None) -> str:
+    """Gera a chave que identifica um arquivo de mídia (URL + tipo + qualidade/bitrate)"""
+    media_type = (media_type or '').lower()
+    if media_type == 'audio':
+        variant = str(bitrate or '192').lower().rstrip('k')
+    else:
+        variant = (quality or 'best').lower().replace('p', '')
+
+    raw_key = f"{normalize_url(url)}|{media_type}|{variant}"
+    return hashlib.sha256(raw_key.encode('utf-8')).hexdigest()
@@ -0,0 +1,24 @@
+import base64
+from datetime import datetime
+from typing import Tuple
+
+def encode_cursor(created_at: datetime, item_id: int) -> str:
+    """Gera o cursor opaco da paginação por (created_at, id)"""
+    raw = f"{created_at.isoformat()}|{item_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Lê um cursor gerado por encode_cursor (ValueError se for inválido)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, item_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(item_id)
+    except Exception:
+        raise ValueError('Cursor de paginação inválido')
+
+def next_cursor(items, limit: int):
+    """Cursor da próxima página, ou None se a página atual não veio cheia"""
+    if not limit or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(last.created_at, last.id)
@@ -0,0 +1,28 @@
+import re
+import unicodedata
+
+# Limite do texto indexado por arquivo (descrições podem ser muito longas)
+MAX_DESCRIPTION_LENGTH = 2000
+
+def normalize_search_text(text: str) -> str:
+    """Minúsculas, sem acentos e com espaços simples, para busca e indexação"""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return re.sub(r'\s+', ' ', text.lower()).strip()
+
+def build_search_text(title=None, uploader=None, description=None, tags=None) -> str:
+    """Monta o texto pesquisável de um arquivo de mídia"""
+    parts = [title, uploader, (description or '')[:MAX_DESCRIPTION_LENGTH]]
+    if isinstance(tags, (list, tuple)):
+        parts.extend(str(tag) for tag in tags)
+    return normalize_search_text(' '.join(part for part in parts if part and part != 'N/A'))
+
+def trigrams(word: str) -> set:
+    """Trigramas de uma palavra (vazio para palavras com menos de 3 caracteres)"""
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+def escape_like(term: str) -> str:
+    """Escapa os curingas do LIKE (usar com barra invertida como caractere de escape)"""
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')